@@ -0,0 +1,481 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import bisect
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from types import SimpleNamespace as N
+
+from core.discovery import FakeSearchClient
+from utils.clients import ClientRegistry
+from utils.throttle import ThrottledClient
+
+class FakeServiceError(Exception):
+    """Equivalente mínimo de oci.exceptions.ServiceError (el limitador solo mira `status`)."""
+
+    def __init__(self, status, code, message):
+        super().__init__(f"{status} {code}: {message}")
+        self.status = status
+        self.code = code
+        self.message = message
+
+class FakeResponse:
+    """Respuesta compatible con oci.pagination (data, has_next_page, next_page...)."""
+
+    def __init__(self, data, next_page=None):
+        self.data = data
+        self.next_page = next_page
+        self.has_next_page = next_page is not None
+        self.status = 200
+        self.headers = {}
+        self.request = None
+
+class FakeProfile:
+    """
+    Comportamiento simulado de la API.
+
+    latency:       segundos por llamada (con ±jitter proporcional)
+    page_size:     elementos por página en los list_* paginados
+    throttle_rps:  límite de llamadas/segundo por servicio; al superarlo se
+                   responde 429 como haría OCI (None = sin límite)
+    """
+
+    def __init__(self, latency=0.02, jitter=0.25, page_size=100, throttle_rps=None, seed=7):
+        self.latency = latency
+        self.jitter = jitter
+        self.page_size = page_size
+        self.throttle_rps = throttle_rps
+        self._random = random.Random(seed)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def gate(self, service):
+        """Aplica el límite del lado del servidor y la latencia de red."""
+        if self.throttle_rps:
+            with self._lock:
+                now = time.monotonic()
+                tokens, updated = self._buckets.get(service, (self.throttle_rps, now))
+                tokens = min(self.throttle_rps, tokens + (now - updated) * self.throttle_rps)
+                if tokens < 1:
+                    self._buckets[service] = (tokens, now)
+                    raise FakeServiceError(429, "TooManyRequests", f"{service} throttled")
+                self._buckets[service] = (tokens - 1, now)
+        if self.latency:
+            with self._lock:
+                factor = 1 + self._random.uniform(-self.jitter, self.jitter)
+            time.sleep(self.latency * factor)
+
+class CallStats:
+    """Contador thread-safe de llamadas por servicio y método."""
+
+    def __init__(self):
+        self.calls = Counter()
+        self.throttled = Counter()
+        self._lock = threading.Lock()
+
+    def count(self, service, method):
+        with self._lock:
+            self.calls[f"{service}.{method}"] += 1
+
+    def count_throttled(self, service, method):
+        with self._lock:
+            self.throttled[f"{service}.{method}"] += 1
+
+    def total(self):
+        return sum(self.calls.values())
+
+class FakeTenancy:
+    """
+    Tenancy sintético y determinista.
+
+    Los tamaños son por compartimento poblado; `empty_ratio` es la fracción
+    de compartimentos sin ningún recurso (lo habitual en tenancies grandes).
+    Los objetos de los buckets no se materializan: se generan por página.
+    """
+
+    def __init__(self, compartments=20, instances=10, vnics_per_instance=1, block_volumes=1,
+                 db_systems=1, buckets=3, objects_per_bucket=2000, load_balancers=1,
+                 oic_instances=1, file_systems=2, empty_ratio=0.5, ads=3,
+                 regions=("fake-region-1",), seed=7):
+        rnd = random.Random(seed)
+        self.tenancy_id = "ocid1.tenancy.oc1..fake"
+        self.namespace = "fakenamespace"
+        self.regions = list(regions)
+        self.ads = [f"FAKE:AD-{i + 1}" for i in range(ads)]
+        self.objects_per_bucket = objects_per_bucket
+        self.images = {
+            f"ocid1.image.oc1..img{i}": N(id=f"ocid1.image.oc1..img{i}", display_name=f"Oracle-Linux-8-{i}",
+                                          operating_system="Oracle Linux")
+            for i in range(5)
+        }
+        created = datetime(2024, 1, 1)
+
+        # Árbol de compartimentos: cinco bajo la raíz y el resto anidados debajo
+        self.compartments = [
+            N(id=f"ocid1.compartment.oc1..c{c}", name=f"comp-{c}", lifecycle_state="ACTIVE",
+              compartment_id=self.tenancy_id if c < 5 else f"ocid1.compartment.oc1..c{c // 5 - 1}")
+            for c in range(compartments)
+        ]
+        self.by_compartment = {}
+        self.private_ips = {}
+        self.vnics = {}
+        self.subnets = {}
+        self.boot_volumes = {}
+        self.volumes = {}
+        self.buckets = {}
+        self.load_balancers = {}
+
+        for comp in self.compartments:
+            data = self.by_compartment.setdefault(comp.id, {
+                'instances': [], 'vnic_attachments': [], 'boot_attachments': [], 'volume_attachments': [],
+                'boot_volumes': [], 'volumes': [], 'public_ips': [], 'db_systems': [], 'buckets': [],
+                'load_balancers': [], 'oic': [], 'file_systems': [],
+            })
+            if rnd.random() < empty_ratio:
+                continue
+            subnet_id = f"ocid1.subnet.oc1..{comp.name}"
+            self.subnets[subnet_id] = N(id=subnet_id, compartment_id=comp.id, prohibit_public_ip_on_vnic=False)
+            ip_seq = iter(range(1, 1 << 16))
+
+            def new_private_ip(vnic_id, primary=True, name="ip"):
+                n = next(ip_seq)
+                pip = N(id=f"ocid1.privateip.oc1..{comp.name}-{n}", vnic_id=vnic_id, subnet_id=subnet_id,
+                        ip_address=f"10.{n >> 8}.{n & 255}.{len(self.private_ips) % 250 + 1}",
+                        is_primary=primary, display_name=f"{name}-{n}")
+                self.private_ips[pip.id] = pip
+                return pip
+
+            for i in range(instances):
+                ad = self.ads[i % len(self.ads)]
+                inst = N(id=f"ocid1.instance.oc1..{comp.name}-{i}", display_name=f"{comp.name}-vm{i}",
+                         compartment_id=comp.id, availability_domain=ad, lifecycle_state="RUNNING",
+                         image_id=rnd.choice(list(self.images)), shape="VM.Standard.E4.Flex",
+                         shape_config=N(ocpus=2.0, memory_in_gbs=16.0), time_created=created + timedelta(days=i))
+                data['instances'].append(inst)
+                for v in range(vnics_per_instance):
+                    vnic_id = f"ocid1.vnic.oc1..{comp.name}-{i}-{v}"
+                    pip = new_private_ip(vnic_id, name=inst.display_name)
+                    public_ip = f"129.{i % 250}.{v}.{len(self.vnics) % 250}" if i % 2 == 0 else None
+                    self.vnics[vnic_id] = N(id=vnic_id, private_ip=pip.ip_address, public_ip=public_ip)
+                    data['vnic_attachments'].append(N(instance_id=inst.id, vnic_id=vnic_id, subnet_id=subnet_id,
+                                                      lifecycle_state="ATTACHED", availability_domain=ad))
+                    if public_ip:
+                        data['public_ips'].append(N(assigned_entity_id=pip.id, ip_address=public_ip,
+                                                    lifetime="EPHEMERAL", availability_domain=ad))
+                boot = N(id=f"ocid1.bootvolume.oc1..{comp.name}-{i}", size_in_gbs=50, availability_domain=ad)
+                self.boot_volumes[boot.id] = boot
+                data['boot_volumes'].append(boot)
+                data['boot_attachments'].append(N(instance_id=inst.id, boot_volume_id=boot.id,
+                                                  lifecycle_state="ATTACHED", availability_domain=ad))
+                for b in range(block_volumes):
+                    vol = N(id=f"ocid1.volume.oc1..{comp.name}-{i}-{b}", size_in_gbs=100, availability_domain=ad)
+                    self.volumes[vol.id] = vol
+                    data['volumes'].append(vol)
+                    data['volume_attachments'].append(N(instance_id=inst.id, volume_id=vol.id,
+                                                        lifecycle_state="ATTACHED", availability_domain=ad))
+
+            for d in range(db_systems):
+                vnic_id = f"ocid1.vnic.oc1..{comp.name}-db{d}"
+                scan = [new_private_ip(vnic_id, False, "scan").id for _ in range(3)]
+                vips = [new_private_ip(vnic_id, False, "vip").id for _ in range(2)]
+                data['db_systems'].append(N(
+                    id=f"ocid1.dbsystem.oc1..{comp.name}-{d}", display_name=f"{comp.name}-db{d}",
+                    compartment_id=comp.id, lifecycle_state="AVAILABLE", shape="VM.Standard2.4",
+                    cpu_core_count=4, data_storage_size_in_gbs=256, memory_size_in_gbs=60, node_count=2,
+                    license_model="LICENSE_INCLUDED", scan_ip_ids=scan, vip_ids=vips, version="19.0.0.0",
+                    subnet_id=subnet_id, time_created=created))
+
+            for b in range(buckets):
+                bucket = N(name=f"{comp.name}-bucket{b}", namespace=self.namespace, compartment_id=comp.id,
+                           etag=f"etag-{comp.name}-{b}", time_created=created,
+                           id=f"ocid1.bucket.oc1..{comp.name}-{b}")
+                self.buckets[bucket.name] = bucket
+                data['buckets'].append(bucket)
+
+            for lb_n in range(load_balancers):
+                lb = N(id=f"ocid1.loadbalancer.oc1..{comp.name}-{lb_n}", display_name=f"{comp.name}-lb{lb_n}",
+                       compartment_id=comp.id, lifecycle_state="ACTIVE",
+                       shape_name="flexible" if lb_n % 2 else "flex",
+                       shape_details=N(minimum_bandwidth_in_mbps=10, maximum_bandwidth_in_mbps=100),
+                       ip_addresses=[N(ip_address=f"140.1.{lb_n}.1", is_public=True)])
+                self.load_balancers[lb.id] = lb
+                data['load_balancers'].append(lb)
+
+            for o in range(oic_instances):
+                data['oic'].append(N(id=f"ocid1.integrationinstance.oc1..{comp.name}-{o}",
+                                     display_name=f"{comp.name}-oic{o}", compartment_id=comp.id,
+                                     lifecycle_state="ACTIVE", instance_url=f"https://{comp.name}-oic{o}.fake",
+                                     message_packs=1, is_byol=bool(o % 2)))
+
+            for f in range(file_systems):
+                data['file_systems'].append(N(id=f"ocid1.filesystem.oc1..{comp.name}-{f}",
+                                              display_name=f"{comp.name}-fs{f}", compartment_id=comp.id,
+                                              availability_domain=self.ads[f % len(self.ads)],
+                                              lifecycle_state="ACTIVE", metered_bytes=(f + 1) * 10 * 1024 ** 3))
+
+    def search_index(self):
+        """Recursos en el formato de FakeSearchClient (core.discovery)."""
+        kinds = [('instances', 'Instance'), ('db_systems', 'DbSystem'), ('buckets', 'Bucket'),
+                 ('oic', 'IntegrationInstance'), ('load_balancers', 'LoadBalancer'), ('file_systems', 'FileSystem')]
+        resources = []
+        for comp_id, data in self.by_compartment.items():
+            for key, resource_type in kinds:
+                for r in data[key]:
+                    resources.append({'resourceType': resource_type, 'identifier': r.id,
+                                      'compartmentId': comp_id, 'displayName': getattr(r, 'display_name', r.id)})
+        return resources
+
+    def compartment(self, compartment_id):
+        return self.by_compartment.get(compartment_id, {})
+
+class _ObjectNames:
+    """Secuencia virtual de nombres ordenados de objetos (para bisect sin materializar)."""
+
+    def __init__(self, count):
+        self.count = count
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, i):
+        return f"obj-{i:010d}"
+
+class FakeService:
+    service = None
+
+    def __init__(self, tenancy, profile, stats):
+        self.tenancy = tenancy
+        self.profile = profile
+        self.stats = stats
+
+    def _call(self, method):
+        try:
+            self.profile.gate(self.service)
+        except FakeServiceError:
+            self.stats.count_throttled(self.service, method)
+            raise
+        finally:
+            self.stats.count(self.service, method)
+
+    def _page(self, method, items, page=None, limit=None):
+        self._call(method)
+        size = limit or self.profile.page_size
+        start = int(page or 0)
+        end = start + size
+        return FakeResponse(items[start:end], str(end) if end < len(items) else None)
+
+    def _get(self, method, mapping, key):
+        self._call(method)
+        if key not in mapping:
+            raise FakeServiceError(404, "NotAuthorizedOrNotFound", key)
+        return FakeResponse(mapping[key])
+
+class FakeIdentityClient(FakeService):
+    service = 'identity'
+
+    def list_compartments(self, compartment_id, page=None, limit=None, **kwargs):
+        return self._page('list_compartments', self.tenancy.compartments, page, limit)
+
+    def list_region_subscriptions(self, tenancy_id, **kwargs):
+        self._call('list_region_subscriptions')
+        return FakeResponse([N(region_name=r, status="READY") for r in self.tenancy.regions])
+
+class FakeComputeClient(FakeService):
+    service = 'compute'
+
+    def list_instances(self, compartment_id, page=None, limit=None, **kwargs):
+        return self._page('list_instances', self.tenancy.compartment(compartment_id).get('instances', []), page, limit)
+
+    def list_vnic_attachments(self, compartment_id, page=None, limit=None, instance_id=None, **kwargs):
+        items = self.tenancy.compartment(compartment_id).get('vnic_attachments', [])
+        if instance_id:
+            items = [va for va in items if va.instance_id == instance_id]
+        return self._page('list_vnic_attachments', items, page, limit)
+
+    def get_image(self, image_id, **kwargs):
+        return self._get('get_image', self.tenancy.images, image_id)
+
+    def list_boot_volume_attachments(self, availability_domain, compartment_id, page=None, limit=None,
+                                     instance_id=None, **kwargs):
+        items = [a for a in self.tenancy.compartment(compartment_id).get('boot_attachments', [])
+                 if a.availability_domain == availability_domain and (not instance_id or a.instance_id == instance_id)]
+        return self._page('list_boot_volume_attachments', items, page, limit)
+
+    def list_volume_attachments(self, compartment_id, page=None, limit=None, availability_domain=None,
+                                instance_id=None, **kwargs):
+        items = [a for a in self.tenancy.compartment(compartment_id).get('volume_attachments', [])
+                 if (not availability_domain or a.availability_domain == availability_domain)
+                 and (not instance_id or a.instance_id == instance_id)]
+        return self._page('list_volume_attachments', items, page, limit)
+
+class FakeNetworkClient(FakeService):
+    service = 'network'
+
+    def list_private_ips(self, subnet_id=None, vnic_id=None, page=None, limit=None, **kwargs):
+        items = [p for p in self.tenancy.private_ips.values()
+                 if (not subnet_id or p.subnet_id == subnet_id) and (not vnic_id or p.vnic_id == vnic_id)]
+        return self._page('list_private_ips', items, page, limit)
+
+    def list_public_ips(self, scope, compartment_id, availability_domain=None, lifetime=None,
+                        page=None, limit=None, **kwargs):
+        items = [p for p in self.tenancy.compartment(compartment_id).get('public_ips', [])
+                 if (not lifetime or p.lifetime == lifetime)
+                 and (scope == "REGION" or p.availability_domain == availability_domain)]
+        return self._page('list_public_ips', items, page, limit)
+
+    def get_private_ip(self, private_ip_id, **kwargs):
+        return self._get('get_private_ip', self.tenancy.private_ips, private_ip_id)
+
+    def get_vnic(self, vnic_id, **kwargs):
+        return self._get('get_vnic', self.tenancy.vnics, vnic_id)
+
+    def get_subnet(self, subnet_id, **kwargs):
+        return self._get('get_subnet', self.tenancy.subnets, subnet_id)
+
+class FakeBlockstorageClient(FakeService):
+    service = 'blockstorage'
+
+    def list_boot_volumes(self, availability_domain=None, compartment_id=None, page=None, limit=None, **kwargs):
+        items = [v for v in self.tenancy.compartment(compartment_id).get('boot_volumes', [])
+                 if not availability_domain or v.availability_domain == availability_domain]
+        return self._page('list_boot_volumes', items, page, limit)
+
+    def list_volumes(self, compartment_id=None, page=None, limit=None, availability_domain=None, **kwargs):
+        items = [v for v in self.tenancy.compartment(compartment_id).get('volumes', [])
+                 if not availability_domain or v.availability_domain == availability_domain]
+        return self._page('list_volumes', items, page, limit)
+
+    def get_boot_volume(self, boot_volume_id, **kwargs):
+        return self._get('get_boot_volume', self.tenancy.boot_volumes, boot_volume_id)
+
+    def get_volume(self, volume_id, **kwargs):
+        return self._get('get_volume', self.tenancy.volumes, volume_id)
+
+class FakeDatabaseClient(FakeService):
+    service = 'database'
+
+    def list_db_systems(self, compartment_id, page=None, limit=None, **kwargs):
+        return self._page('list_db_systems', self.tenancy.compartment(compartment_id).get('db_systems', []), page, limit)
+
+class FakeObjectStorageClient(FakeService):
+    service = 'object_storage'
+
+    def get_namespace(self, **kwargs):
+        self._call('get_namespace')
+        return FakeResponse(self.tenancy.namespace)
+
+    def list_buckets(self, namespace_name, compartment_id, page=None, limit=None, **kwargs):
+        return self._page('list_buckets', self.tenancy.compartment(compartment_id).get('buckets', []), page, limit)
+
+    def get_bucket(self, namespace_name, bucket_name, fields=None, **kwargs):
+        response = self._get('get_bucket', self.tenancy.buckets, bucket_name)
+        count = self.tenancy.objects_per_bucket
+        # Tamaño medio de _object_size: 49 KB
+        response.data = N(**vars(response.data), approximate_count=count, approximate_size=count * 49 * 1024)
+        return response
+
+    def list_objects(self, namespace_name, bucket_name, prefix=None, start=None, end=None, limit=1000,
+                     fields=None, delimiter=None, **kwargs):
+        self._call('list_objects')
+        names = _ObjectNames(self.tenancy.objects_per_bucket)
+        first = bisect.bisect_left(names, start) if start else 0
+        last = bisect.bisect_left(names, end) if end else len(names)
+        stop = min(last, first + min(limit, 1000))
+        objects = [N(name=names[i], size=_object_size(i)) for i in range(first, stop)]
+        return FakeResponse(N(objects=objects, prefixes=[], next_start_with=names[stop] if stop < last else None))
+
+def _object_size(i):
+    return 1024 * (i % 97 + 1)
+
+class FakeIntegrationClient(FakeService):
+    service = 'integration'
+
+    def list_integration_instances(self, compartment_id, page=None, limit=None, **kwargs):
+        return self._page('list_integration_instances', self.tenancy.compartment(compartment_id).get('oic', []), page, limit)
+
+class FakeLoadBalancerClient(FakeService):
+    service = 'load_balancer'
+
+    def list_load_balancers(self, compartment_id, page=None, limit=None, **kwargs):
+        return self._page('list_load_balancers', self.tenancy.compartment(compartment_id).get('load_balancers', []), page, limit)
+
+    def get_load_balancer(self, load_balancer_id, **kwargs):
+        return self._get('get_load_balancer', self.tenancy.load_balancers, load_balancer_id)
+
+class FakeFileStorageClient(FakeService):
+    service = 'file_storage'
+
+    def list_file_systems(self, compartment_id, availability_domain=None, page=None, limit=None, **kwargs):
+        items = [f for f in self.tenancy.compartment(compartment_id).get('file_systems', [])
+                 if not availability_domain or f.availability_domain == availability_domain]
+        return self._page('list_file_systems', items, page, limit)
+
+class FakeMonitoringClient(FakeService):
+    service = 'monitoring'
+
+    def summarize_metrics_data(self, compartment_id, summarize_metrics_data_details,
+                               compartment_id_in_subtree=False, **kwargs):
+        """Devuelve UsedBytes por resourceId para los file systems del alcance consultado."""
+        self._call('summarize_metrics_data')
+        query = summarize_metrics_data_details.query
+        if compartment_id_in_subtree:
+            file_systems = [f for data in self.tenancy.by_compartment.values() for f in data['file_systems']]
+        else:
+            file_systems = self.tenancy.compartment(compartment_id).get('file_systems', [])
+        if "resourceId='" in query:
+            wanted = query.split("resourceId='")[1].split("'")[0]
+            file_systems = [f for f in file_systems if f.id == wanted]
+        now = datetime.utcnow()
+        return FakeResponse([
+            N(namespace=summarize_metrics_data_details.namespace, name=query.split('[')[0],
+              dimensions={'resourceId': f.id},
+              aggregated_datapoints=[N(timestamp=now, value=f.metered_bytes * 0.8)])
+            for f in file_systems
+        ])
+
+class FakeResourceSearchClient(FakeService):
+    service = 'resource_search'
+
+    def __init__(self, tenancy, profile, stats):
+        super().__init__(tenancy, profile, stats)
+        self._backend = FakeSearchClient(tenancy.search_index())
+
+    def search_resources(self, search_details, limit=1000, page=None, **kwargs):
+        self._call('search_resources')
+        return self._backend.search_resources(search_details, limit=limit, page=page)
+
+FAKE_CLIENTS = {
+    'identity': FakeIdentityClient,
+    'compute': FakeComputeClient,
+    'network': FakeNetworkClient,
+    'blockstorage': FakeBlockstorageClient,
+    'database': FakeDatabaseClient,
+    'object_storage': FakeObjectStorageClient,
+    'integration': FakeIntegrationClient,
+    'load_balancer': FakeLoadBalancerClient,
+    'file_storage': FakeFileStorageClient,
+    'monitoring': FakeMonitoringClient,
+    'resource_search': FakeResourceSearchClient,
+}
+
+class FakeClientRegistry(ClientRegistry):
+    """ClientRegistry que entrega clientes simulados en lugar de clientes del SDK."""
+
+    def __init__(self, tenancy, profile=None, limiter=None, recorder=None, details=None):
+        super().__init__({'tenancy': tenancy.tenancy_id, 'region': tenancy.regions[0]},
+                         limiter=limiter, recorder=recorder, details=details)
+        self.tenancy = tenancy
+        self.profile = profile or FakeProfile()
+        self.stats = CallStats()
+
+    def _create(self, service, region):
+        client = FAKE_CLIENTS[service](self.tenancy, self.profile, self.stats)
+        # Como ClientRegistry: siempre con proxy (limitador, instrumentación y plazo de la unidad)
+        return ThrottledClient(client, self.limiter, f"{region}/{service}", self.recorder, service, region)
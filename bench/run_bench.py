@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+
+Benchmark offline de los colectores de core/ contra un tenancy simulado.
+
+Uso:
+    python -m bench.run_bench --scale medium --save bench/baseline.json
+    python -m bench.run_bench --scale medium --baseline bench/baseline.json
+    python -m bench.run_bench --startup --only compute,buckets
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from functools import partial
+
+from bench.fake_oci import FakeClientRegistry, FakeProfile, FakeTenancy
+from utils.async_runtime import AsyncRuntime
+from utils.scheduler import CostModel, GlobalScheduler
+from utils.settings import load_settings
+from utils.throttle import AdaptiveRateLimiter
+
+# Tamaños de tenancy predefinidos (valores por compartimento poblado)
+SCALES = {
+    'small': dict(compartments=20, instances=10, buckets=2, objects_per_bucket=2000),
+    'medium': dict(compartments=100, instances=30, buckets=3, objects_per_bucket=20000),
+    'large': dict(compartments=400, instances=60, buckets=5, objects_per_bucket=100000),
+}
+
+# Presupuesto de arranque: importar main (sin SDK de OCI ni pandas), en milisegundos
+STARTUP_BUDGET_MS = 150
+
+# Mide en un proceso nuevo el import de main y la resolución de los colectores seleccionados
+_STARTUP_PROBE = """
+import json, os, sys, time
+start = time.perf_counter()
+import main
+imported = time.perf_counter()
+settings = main.load_settings(path=os.devnull)
+settings['services'] = sys.argv[1]
+main.build_tasks(settings)
+done = time.perf_counter()
+from utils.clients import SERVICES
+heavy = {'oci', 'pandas', 'numpy', 'openpyxl', 'pyarrow', *(module for module, _ in SERVICES.values())}
+print(json.dumps({
+    'import_main_ms': (imported - start) * 1000,
+    'build_tasks_ms': (done - imported) * 1000,
+    'modules': sorted(heavy & set(sys.modules)),
+}))
+"""
+
+def measure_startup(services, repeat=5):
+    """Mediana de `repeat` arranques en frío (proceso nuevo cada vez) para los servicios dados."""
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    runs = []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _STARTUP_PROBE, services], cwd=root,
+                             capture_output=True, text=True, check=True).stdout
+        runs.append(json.loads(out.strip().splitlines()[-1]))
+    return {
+        'services': services,
+        'import_main_ms': statistics.median(r['import_main_ms'] for r in runs),
+        'build_tasks_ms': statistics.median(r['build_tasks_ms'] for r in runs),
+        'modules': runs[-1]['modules'],
+    }
+
+def collectors(bucket_sizing):
+    from core import compute, dbsystem, buckets, oic_instances, load_balancers, file_storage
+    return [
+        ("compute", compute.get_compute_instances, "Compute"),
+        ("dbsystem", dbsystem.get_db_systems, "Base de Datos"),
+        ("buckets", partial(buckets.get_buckets, sizing_mode=bucket_sizing), "Buckets"),
+        ("oic_instances", oic_instances.get_oic_instances, "OIC"),
+        ("load_balancers", load_balancers.get_load_balancers, "LoadBalancers"),
+        ("file_storage", file_storage.get_file_systems, "FileStorage"),
+    ]
+
+@contextlib.contextmanager
+def thread_peak():
+    """Máximo de hilos vivos durante el bloque (muestreo cada 5 ms)."""
+    peak = [threading.active_count()]
+    done = threading.Event()
+
+    def sample():
+        while not done.wait(0.005):
+            peak[0] = max(peak[0], threading.active_count())
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield peak
+    finally:
+        done.set()
+        sampler.join()
+
+def measure(run, registry_factory, verbose=False):
+    """Ejecuta `run(registry)` dos veces: una para tiempo/llamadas y otra con tracemalloc."""
+    registry = registry_factory()
+    out = None if verbose else io.StringIO()
+    with contextlib.redirect_stdout(out) if out else contextlib.nullcontext():
+        with thread_peak() as threads:
+            start = time.perf_counter()
+            run(registry)
+            wall = time.perf_counter() - start
+
+    # La latencia no cambia el uso de memoria: la pasada de memoria va sin latencia
+    mem_registry = registry_factory(latency=0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        tracemalloc.start()
+        run(mem_registry)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {
+        'wall_s': round(wall, 3),
+        'api_calls': registry.stats.total(),
+        'throttled': sum(registry.stats.throttled.values()),
+        'peak_mb': round(peak / 1024 ** 2, 2),
+        # Sin contar el hilo de muestreo
+        'threads_peak': threads[0] - 1,
+        'calls_by_method': dict(sorted(registry.stats.calls.items())),
+    }
+
+def run_benchmarks(args):
+    tenancy_kwargs = dict(SCALES[args.scale])
+    if args.compartments:
+        tenancy_kwargs['compartments'] = args.compartments
+    tenancy = FakeTenancy(regions=[f"fake-region-{i + 1}" for i in range(args.regions)], **tenancy_kwargs)
+
+    def registry_factory(latency=None):
+        profile = FakeProfile(
+            latency=args.latency if latency is None else latency,
+            page_size=args.page_size,
+            throttle_rps=args.throttle,
+        )
+        limiter = AdaptiveRateLimiter(rate=args.rate_limit, max_rate=args.rate_limit * 5) if args.rate_limit else None
+        return FakeClientRegistry(tenancy, profile, limiter=limiter)
+
+    config = {'tenancy': tenancy.tenancy_id, 'region': tenancy.regions[0]}
+    compartments = tenancy.compartments
+    selected = [c for c in collectors(args.bucket_sizing) if not args.only or c[0] in args.only]
+
+    # Los costos del planificador se conservan entre pasadas, como entre ejecuciones reales
+    costs = CostModel()
+
+    def run_collector(func, service, registry):
+        if args.runtime == 'async':
+            with AsyncRuntime(max_in_flight=args.max_in_flight) as runtime:
+                return func(config, compartments, clients=registry, runner=runtime.runner(service))
+        if args.runtime == 'scheduler':
+            with GlobalScheduler(max_workers=args.max_in_flight, costs=costs) as runtime:
+                return func(config, compartments, clients=registry, runner=runtime.runner(service))
+        return func(config, compartments, clients=registry)
+
+    results = {}
+    for service, func, _ in selected:
+        results[service] = measure(
+            partial(run_collector, func, service), registry_factory, args.verbose
+        )
+        print_row(service, results[service])
+
+    if args.end_to_end:
+        import main as inventory_main
+        settings = load_settings(path=os.devnull)
+        settings['regions'] = ",".join(tenancy.regions)
+        settings['bucket_sizing'] = args.bucket_sizing
+        settings['runtime'] = args.runtime
+        settings['async_max_in_flight'] = str(args.max_in_flight)
+        settings['scheduler_workers'] = str(args.max_in_flight)
+        settings['unit_costs_path'] = os.path.join(tempfile.gettempdir(), "bench_unit_costs.json")
+        with tempfile.TemporaryDirectory() as reports_dir:
+            settings['checkpoint_path'] = os.path.join(reports_dir, "checkpoint.jsonl")
+            results['main'] = measure(
+                lambda registry: inventory_main.run_inventory(
+                    config, registry, settings, selected, reports_dir=reports_dir, send_report=False
+                ),
+                registry_factory, args.verbose
+            )
+        print_row('main', results['main'])
+
+    return {
+        'scenario': {
+            'scale': args.scale, 'tenancy': tenancy_kwargs, 'regions': args.regions,
+            'latency': args.latency, 'page_size': args.page_size, 'throttle_rps': args.throttle,
+            'rate_limit': args.rate_limit, 'bucket_sizing': args.bucket_sizing,
+            'runtime': args.runtime, 'max_in_flight': args.max_in_flight,
+        },
+        'results': results,
+    }
+
+def print_row(name, r, baseline=None):
+    line = (f"{name:<16} {r['wall_s']:>9.3f}s {r['api_calls']:>9} calls {r['throttled']:>6} 429 "
+            f"{r['peak_mb']:>9.2f} MB {r.get('threads_peak', 0):>5} hilos")
+    if baseline:
+        line += "   vs baseline: " + "  ".join(
+            f"{key} {_delta(r[key], baseline.get(key))}" for key in ('wall_s', 'api_calls', 'peak_mb', 'threads_peak')
+        )
+    print(line)
+
+def _delta(value, base):
+    if not base:
+        return "n/a"
+    return f"{(value - base) / base * 100:+.1f}%"
+
+def compare(report, baseline_path):
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get('scenario') != report['scenario']:
+        print("⚠️ El escenario del baseline no coincide con el actual; la comparación es orientativa.")
+    print(f"\n📊 Comparación contra {baseline_path}")
+    for name, r in report['results'].items():
+        print_row(name, r, baseline['results'].get(name))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark offline de oci-inventory-unified")
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--compartments', type=int, help="Sobrescribe el número de compartimentos de la escala")
+    parser.add_argument('--regions', type=int, default=1)
+    parser.add_argument('--latency', type=float, default=0.02, help="Segundos por llamada")
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--throttle', type=float, default=None, help="Límite simulado de llamadas/s por servicio")
+    parser.add_argument('--rate-limit', type=float, default=20.0, help="Tasa del limitador tras el primer 429 si aún no hay tráfico medido (0 = sin limitador)")
+    parser.add_argument('--bucket-sizing', choices=("fast", "exact"), default="fast")
+    parser.add_argument('--runtime', choices=("threads", "async", "scheduler"), default="threads",
+                        help="Motor de recolección a medir")
+    parser.add_argument('--max-in-flight', type=int, default=64, help="Hilos del SDK en modo async / workers del planificador")
+    parser.add_argument('--only', type=lambda s: s.split(','), help="Colectores a medir, separados por coma")
+    parser.add_argument('--end-to-end', action='store_true', help="Mide también main.run_inventory completo")
+    parser.add_argument('--baseline', help="JSON de una ejecución anterior para comparar")
+    parser.add_argument('--save', help="Guarda los resultados en JSON")
+    parser.add_argument('--verbose', action='store_true', help="Muestra la salida de los colectores")
+    parser.add_argument('--startup', action='store_true',
+                        help="Solo mide el arranque (import de main y de los colectores de --only)")
+    parser.add_argument('--startup-budget-ms', type=float, default=STARTUP_BUDGET_MS,
+                        help="Presupuesto para importar main; si se excede el comando termina con error")
+    return parser.parse_args(argv)
+
+def check_startup(args):
+    result = measure_startup(",".join(args.only) if args.only else "all")
+    within = result['import_main_ms'] <= args.startup_budget_ms
+    print(f"{'import main':<16} {result['import_main_ms']:>9.1f} ms "
+          f"(presupuesto {args.startup_budget_ms:.0f} ms) {'✅' if within else '❌'}")
+    print(f"{'colectores':<16} {result['build_tasks_ms']:>9.1f} ms ({result['services']})")
+    print(f"{'módulos':<16} {', '.join(result['modules']) or '-'}")
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'startup': result}, f, indent=2)
+    return within
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.startup:
+        if not check_startup(args):
+            sys.exit(1)
+        return
+    print(f"{'colector':<16} {'tiempo':>10} {'llamadas':>15} {'':>10} {'memoria pico':>12} {'hilos':>6}")
+    report = run_benchmarks(args)
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Resultados guardados en {args.save}")
+    if args.baseline:
+        compare(report, args.baseline)
+
+if __name__ == "__main__":
+    main()
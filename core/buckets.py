@@ -5,9 +5,12 @@ Autor: Daniel de Jesús Cervantes Velázquez
 Equipo: Automatización OCI
 Licencia: MIT
 """
-import oci
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+from utils.clients import ClientRegistry
+from utils.runner import CompartmentRunner
+from utils.snapshot import fingerprint
+from utils.records import Sheet
+from utils.object_listing import ShardedListing
+from utils.budget import BudgetExceeded
 
 def format_size(bytes_val):
     for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
@@ -15,43 +18,155 @@ def format_size(bytes_val):
         bytes_val /= 1024
     return f"{bytes_val:.2f} PB"
 
-def get_buckets(config, compartments):
-    print("\n🔄 Obteniendo Buckets de Object Storage...")
-    os_client = oci.object_storage.ObjectStorageClient(config)
+SIZING_MODES = ("fast", "exact")
+
+COLUMNS = ['compartment_name', 'bucket_name', 'objects', 'size', 'sizing_method']
+CATEGORICAL = ('compartment_name', 'sizing_method')
+
+def get_buckets(config, compartments, sizing_mode="fast", clients=None, runner=None, snapshot=None, sink=None,
+                shard_objects=200000, shard_workers=8):
+    """
+    Obtiene los buckets y su tamaño.
+
+    sizing_mode:
+      - "fast": usa approximateCount/approximateSize del bucket (una llamada por
+        bucket, el tiempo no depende del número de objetos).
+      - "exact": recorre list_objects sumando el tamaño de cada objeto. Con
+        snapshot, el recorrido se omite si las estadísticas y el etag del
+        bucket no cambiaron desde la ejecución anterior. Los buckets con al
+        menos `shard_objects` objetos (aproximados) se recorren en rangos de
+        claves en paralelo con hasta `shard_workers` hilos (ver ShardedListing).
+    """
+    if sizing_mode not in SIZING_MODES:
+        raise ValueError(f"sizing_mode inválido: {sizing_mode} (opciones: {', '.join(SIZING_MODES)})")
+
+    import oci
+    print(f"\n🔄 Obteniendo Buckets de Object Storage (modo {sizing_mode})...")
+    clients = clients or ClientRegistry(config)
+    runner = runner or CompartmentRunner(max_workers=10)
+    os_client = clients.get('object_storage')
+    # Plazo del servicio (BudgetedRunner): los recorridos largos se detienen en la página actual
+    deadline = getattr(runner, 'deadline', None)
+    region = getattr(clients, 'region', None) or config.get('region')
     
     try:
         namespace = os_client.get_namespace().data
     except Exception as e:
         print(f"  ❌ Error obteniendo namespace: {e}")
-        return pd.DataFrame()
+        return Sheet(COLUMNS, CATEGORICAL).frame([])
+
+    sheet = Sheet(COLUMNS, CATEGORICAL, sink=sink)
+
+    def bucket_stats(bucket_name):
+        return os_client.get_bucket(
+            namespace, bucket_name, fields=['approximateCount', 'approximateSize']
+        ).data
+
+    def size_fast(bucket_name, stats=None):
+        """Estadísticas aproximadas que Object Storage mantiene por bucket."""
+        bucket = stats or bucket_stats(bucket_name)
+        if bucket.approximate_count is None:
+            # Bucket recién creado sin estadísticas calculadas todavía
+            return size_exact(bucket_name, bucket)
+        return bucket.approximate_count, (bucket.approximate_size or 0), 'approximate'
+
+    def size_exact(bucket_name, stats=None):
+        """
+        Recorre todos los objetos del bucket (1000 por página). Con bitácora,
+        cada `cursor_pages` páginas se guarda el cursor y los totales parciales,
+        y una ejecución reanudada continúa desde ahí.
+        """
+        total_size = 0
+        obj_count = 0
+        next_start = None
+        checkpoint = sheet.checkpoint
+        saved = checkpoint.cursor(bucket_name) if checkpoint else None
+        if saved:
+            next_start, obj_count, total_size = saved
+            print(f"    ↩️ Bucket {bucket_name}: continuando desde {obj_count} objetos ya contados")
+
+        if isinstance(next_start, list):
+            # Recorrido en rangos guardado en la bitácora
+            return size_sharded(bucket_name, next_start, obj_count, total_size)
+        if shard_workers > 1 and not saved:
+            stats = stats or bucket_stats(bucket_name)
+            if (stats.approximate_count or 0) >= shard_objects:
+                return size_sharded(bucket_name, None, 0, 0)
+
+        pages = 0
+        while True:
+            if deadline:
+                deadline.check()
+            res = os_client.list_objects(
+                namespace, bucket_name,
+                fields="name,size", limit=1000, start=next_start
+            ).data
+            for obj in res.objects:
+                total_size += (obj.size if obj.size else 0)
+                obj_count += 1
+            next_start = res.next_start_with
+            if not next_start: break
+            pages += 1
+            if checkpoint and pages % checkpoint.cursor_pages == 0:
+                checkpoint.save_cursor(bucket_name, next_start, obj_count, total_size)
+
+        return obj_count, total_size, 'exact'
 
-    all_buckets_data = []
+    def size_sharded(bucket_name, ranges, obj_count, total_size):
+        """Bucket grande: rangos de claves en paralelo, sumados en una sola fila."""
+        checkpoint = sheet.checkpoint
+
+        def list_page(start, end, limit):
+            return os_client.list_objects(
+                namespace, bucket_name,
+                fields="name,size", limit=limit, start=start, end=end
+            ).data
+
+        def save_progress(pending, objects, total_bytes):
+            checkpoint.save_cursor(bucket_name, pending, objects, total_bytes)
+
+        listing = ShardedListing(
+            list_page, ranges, workers=shard_workers,
+            on_progress=save_progress if checkpoint else None,
+            progress_pages=checkpoint.cursor_pages if checkpoint else None,
+            deadline=deadline
+        )
+        obj_count, total_size = listing.run(obj_count, total_size)
+        print(f"    🧩 Bucket {bucket_name}: {obj_count} objetos listados en {listing.shards} rangos")
+        return obj_count, total_size, 'exact'
+
+    sizer = size_fast if sizing_mode == "fast" else size_exact
 
     def process_bucket(bucket_summary, comp_name):
         try:
-            # Print sutil para buckets grandes
-            # print(f"    📦 Procesando objetos de: {bucket_summary.name}...")
-            total_size = 0
-            obj_count = 0
-            next_start = None
-            
-            while True:
-                res = os_client.list_objects(
-                    namespace, bucket_summary.name, 
-                    fields="name,size", limit=1000, start=next_start
-                ).data
-                for obj in res.objects:
-                    total_size += (obj.size if obj.size else 0)
-                    obj_count += 1
-                next_start = res.next_start_with
-                if not next_start: break
-            
-            return {
+            # Los buckets no traen OCID en el listado: se identifican por región/namespace/nombre
+            key = f"{region}/{namespace}/{bucket_summary.name}"
+            cached, marker, stats = None, None, None
+            if snapshot and sizing_mode == "exact":
+                stats = bucket_stats(bucket_summary.name)
+                marker = fingerprint(bucket_summary.etag, stats.approximate_count, stats.approximate_size)
+                cached = snapshot.cached('buckets', key, marker)
+
+            if cached:
+                obj_count, total_size, method = cached['objects'], cached['bytes'], 'exact'
+            else:
+                obj_count, total_size, method = sizer(bucket_summary.name, stats)
+
+            row = {
                 'compartment_name': comp_name,
                 'bucket_name': bucket_summary.name,
                 'objects': obj_count,
-                'size': format_size(total_size)
+                'size': format_size(total_size),
+                'sizing_method': method
             }
+            if snapshot:
+                marker = marker or fingerprint(bucket_summary.etag, obj_count, total_size)
+                snapshot.record('buckets', key, marker, row, {'objects': obj_count, 'bytes': total_size})
+            buffer = sheet.buffer()
+            buffer.append(row)
+            return buffer
+        except BudgetExceeded:
+            raise
         except Exception as e:
             print(f"    ⚠️ Error en bucket {bucket_summary.name}: {e}")
             return None
@@ -66,18 +181,14 @@ def get_buckets(config, compartments):
             if bs:
                 for b in bs: 
                     buckets_to_process.append((b, comp.name))
-        except Exception:
-            continue
+        except Exception as e:
+            if "Authorization failed" not in str(e) and getattr(e, 'status', None) != 404:
+                print(f"    ⚠️ Error listando buckets de {comp.name}: {e}")
+                sheet.fail()
 
     # 2. Procesar detalles en paralelo
-    if not buckets_to_process:
-        return pd.DataFrame(columns=['compartment_name', 'bucket_name', 'objects', 'size'])
-
+    results = runner.map(sheet.unit(lambda p: process_bucket(*p)), buckets_to_process)
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        results = list(executor.map(lambda p: process_bucket(*p), buckets_to_process))
-    
-    final_data = [r for r in results if r]
-    print(f" ✅ Buckets: {len(final_data)} procesados exitosamente.")
-    
-    return pd.DataFrame(final_data)
\ No newline at end of file
+    df = sheet.frame(results)
+    print(f" ✅ Buckets: {sheet.row_count} procesados exitosamente.")
+    return df
\ No newline at end of file
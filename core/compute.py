@@ -5,88 +5,194 @@ Autor: Daniel de Jesús Cervantes Velázquez
 Equipo: Automatización OCI
 Licencia: MIT
 """
-import oci
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+from utils.clients import ClientRegistry
+from utils.runner import CompartmentRunner
+from utils.snapshot import fingerprint
+from utils.records import Sheet
+from utils.budget import BudgetExceeded
 
-def get_compute_instances(config, compartments):
+COLUMNS = [
+    'compartment_name', 'server_name', 'Type', 'image', 'shape', 'ocpus', 'memory_gb',
+    'public_ips', 'private_ips', 'boot_volume_size_gb', 'block_volumes_total_gb', 'status'
+]
+CATEGORICAL = ('compartment_name', 'Type', 'image', 'shape', 'status')
+
+def get_compute_instances(config, compartments, clients=None, runner=None, snapshot=None, sink=None):
+    import oci
     print("\n🚀 Iniciando obtención de instancias (Optimización Masiva)...")
 
-    compute_client = oci.core.ComputeClient(config)
-    network_client = oci.core.VirtualNetworkClient(config)
-    block_storage_client = oci.core.BlockstorageClient(config)
+    clients = clients or ClientRegistry(config)
+    runner = runner or CompartmentRunner(max_workers=10)
+    compute_client = clients.get('compute')
+    network_client = clients.get('network')
+    block_storage_client = clients.get('blockstorage')
+    sheet = Sheet(COLUMNS, CATEGORICAL, sink=sink)
+
+    # Detalles individuales (imágenes, volúmenes fuera del compartimento) desde la
+    # caché compartida: thread-safe, sin llamadas duplicadas y persistente entre ejecuciones
+    details = clients.details
+    # Las subnets pueden compartirse entre compartimentos (y con otros colectores):
+    # el índice regional las lista una sola vez
+    ip_resolver = clients.ip_resolver()
+
+    def list_all(func, **kwargs):
+        return oci.pagination.list_call_get_all_results(func, **kwargs).data
+
+    def build_ip_maps(compartment, vnic_attachments, ads):
+        """{vnic_id: (ip_privada_primaria, ip_publica)} a partir de listados masivos; get_vnic solo para los faltantes."""
+        vnic_ids = {va.vnic_id for va in vnic_attachments}
+        primary_ips = {}
+        for subnet_id in {va.subnet_id for va in vnic_attachments if va.subnet_id}:
+            for pip in ip_resolver.subnet_ips(subnet_id):
+                if pip.vnic_id in vnic_ids and pip.is_primary:
+                    primary_ips[pip.vnic_id] = pip
+
+        # IPs públicas: efímeras (por AD) y reservadas (regionales)
+        public_by_private = {}
+        scopes = [dict(scope="REGION", lifetime="RESERVED")]
+        scopes += [dict(scope="AVAILABILITY_DOMAIN", availability_domain=ad, lifetime="EPHEMERAL") for ad in ads]
+        for kwargs in scopes:
+            try:
+                for pub in list_all(network_client.list_public_ips, compartment_id=compartment.id, **kwargs):
+                    if pub.assigned_entity_id:
+                        public_by_private[pub.assigned_entity_id] = pub.ip_address
+            except BudgetExceeded:
+                raise
+            except Exception as e:
+                print(f"  ⚠️ Error listando IPs públicas en {compartment.name}: {e}")
+
+        ip_map = {}
+        for va in vnic_attachments:
+            pip = primary_ips.get(va.vnic_id)
+            public = public_by_private.get(pip.id) if pip else None
+            # VNIC en otra subnet/compartimento o IP pública reservada de otro compartimento:
+            # se consulta la VNIC (como antes de los listados masivos), salvo en subnets privadas
+            if pip is None or (public is None and subnet_allows_public(va.subnet_id)):
+                found = vnic_ips(va.vnic_id)
+                if found:
+                    ip_map[va.vnic_id] = (pip.ip_address if pip else found[0], public or found[1])
+                    continue
+            if pip:
+                ip_map[va.vnic_id] = (pip.ip_address, public)
+        return ip_map
 
-    image_cache = {}
+    def subnet_allows_public(subnet_id):
+        if not subnet_id:
+            return True
+        return details.get('subnet', subnet_id,
+                           lambda: not network_client.get_subnet(subnet_id).data.prohibit_public_ip_on_vnic,
+                           fallback=True)
+
+    def vnic_ips(vnic_id):
+        """[ip_privada, ip_pública] de la VNIC; None si no se puede consultar."""
+        try:
+            return details.get('vnic', vnic_id, lambda: vnic_fields(network_client.get_vnic(vnic_id).data))
+        except Exception:
+            return None
+
+    def vnic_fields(vnic):
+        return [vnic.private_ip, vnic.public_ip]
+
+    def build_size_maps(compartment, ads):
+        """Adjuntos y tamaños de boot/block volumes del compartimento en bloque."""
+        boot_map, boot_sizes, block_map, block_sizes = {}, {}, {}, {}
+        try:
+            for ad in ads:
+                for ba in list_all(compute_client.list_boot_volume_attachments,
+                                   availability_domain=ad, compartment_id=compartment.id):
+                    if ba.lifecycle_state != "DETACHED":
+                        boot_map[ba.instance_id] = ba.boot_volume_id
+                for bv in list_all(block_storage_client.list_boot_volumes,
+                                   availability_domain=ad, compartment_id=compartment.id):
+                    boot_sizes[bv.id] = bv.size_in_gbs
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"  ⚠️ Error listando boot volumes en {compartment.name}: {e}")
+        try:
+            for va in list_all(compute_client.list_volume_attachments, compartment_id=compartment.id):
+                if va.lifecycle_state != "DETACHED":
+                    block_map.setdefault(va.instance_id, []).append(va.volume_id)
+            for vol in list_all(block_storage_client.list_volumes, compartment_id=compartment.id):
+                block_sizes[vol.id] = vol.size_in_gbs
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            print(f"  ⚠️ Error listando block volumes en {compartment.name}: {e}")
+        return boot_map, boot_sizes, block_map, block_sizes
+
+    def volume_size(sizes, volume_id, kind, getter):
+        """Tamaño desde el mapa masivo; si el volumen vive en otro compartimento se consulta aparte."""
+        if volume_id not in sizes:
+            try:
+                sizes[volume_id] = details.get(kind, volume_id, lambda: getter(volume_id).data.size_in_gbs)
+            except Exception:
+                sizes[volume_id] = 0
+        return sizes[volume_id] or 0
+
+    def image_info(image_id):
+        img = compute_client.get_image(image_id).data
+        return [img.display_name, img.operating_system]
 
     def process_compartment(compartment):
-        """Procesa un compartimento completo de forma más eficiente."""
-        comp_instances_data = []
+        """Procesa un compartimento completo con listados masivos y joins en memoria."""
+        comp_instances_data = sheet.buffer()
         try:
             # 1. Obtener todas las instancias del compartimento
-            instances = oci.pagination.list_call_get_all_results(
-                compute_client.list_instances, compartment_id=compartment.id
-            ).data
-            
+            instances = list_all(compute_client.list_instances, compartment_id=compartment.id)
+            instances = [i for i in instances if i.lifecycle_state not in ["TERMINATED", "TERMINATING"]]
+
             if not instances:
-                return []
+                return comp_instances_data
+
+            ads = sorted({inst.availability_domain for inst in instances})
 
             # 2. Pre-cargar mapeos masivos para evitar llamadas individuales por instancia
             # Mapeo de VNIC attachments: {instance_id: [vnic_id1, ...]}
-            vnic_attachments = oci.pagination.list_call_get_all_results(
-                compute_client.list_vnic_attachments, compartment_id=compartment.id
-            ).data
+            vnic_attachments = [
+                va for va in list_all(compute_client.list_vnic_attachments, compartment_id=compartment.id)
+                if va.lifecycle_state == "ATTACHED"
+            ]
             vnic_map = {}
             for va in vnic_attachments:
-                if va.lifecycle_state == "ATTACHED":
-                    vnic_map[va.instance_id] = va.vnic_id
+                vnic_map.setdefault(va.instance_id, []).append(va.vnic_id)
+
+            ip_map = build_ip_maps(compartment, vnic_attachments, ads)
+            boot_map, boot_sizes, block_map, block_sizes = build_size_maps(compartment, ads)
 
             # 3. Procesar cada instancia usando los datos pre-cargados
             for inst in instances:
-                if inst.lifecycle_state in ["TERMINATED", "TERMINATING"]:
-                    continue
+                # --- IPs (una entrada por VNIC) ---
+                pub_ips, priv_ips = [], []
+                for vnic_id in vnic_map.get(inst.id, []):
+                    priv, pub = ip_map.get(vnic_id, (None, None))
+                    if priv: priv_ips.append(priv)
+                    if pub: pub_ips.append(pub)
+                pub_ip = ", ".join(pub_ips) if pub_ips else "N/A"
+                priv_ip = ", ".join(priv_ips) if priv_ips else "N/A"
 
-                # --- IPs (Solo si tenemos el ID en el mapa) ---
-                pub_ip, priv_ip = "N/A", "N/A"
-                vnic_id = vnic_map.get(inst.id)
-                if vnic_id:
-                    try:
-                        vnic = network_client.get_vnic(vnic_id).data
-                        pub_ip = vnic.public_ip or "N/A"
-                        priv_ip = vnic.private_ip or "N/A"
-                    except: pass
-
-                # --- Info de Imagen (Caché) ---
+                # --- Info de Imagen (Snapshot de la ejecución anterior o caché) ---
                 img_name, os_type = "N/A", "N/A"
-                if inst.image_id:
-                    if inst.image_id not in image_cache:
-                        try:
-                            img = compute_client.get_image(inst.image_id).data
-                            image_cache[inst.image_id] = (img.display_name, img.operating_system)
-                        except: image_cache[inst.image_id] = ("Custom/Private", "N/A")
-                    img_name, os_type = image_cache[inst.image_id]
-
-                # --- Almacenamiento (Se mantiene individual por AD/ID) ---
+                marker = fingerprint(inst.lifecycle_state, inst.shape, inst.image_id, inst.time_created)
+                cached = snapshot.cached('compute', inst.id, marker) if snapshot else None
+                if cached:
+                    img_name, os_type = cached['image'], cached['Type']
+                elif inst.image_id:
+                    # Imagen personalizada/eliminada o sin permisos: "Custom/Private" por una hora
+                    img_name, os_type = details.get('image', inst.image_id, lambda: image_info(inst.image_id),
+                                                    fallback=["Custom/Private", "N/A"])
+
+                # --- Almacenamiento (join contra los mapas del compartimento) ---
                 boot_size = 0
-                try:
-                    ba = compute_client.list_boot_volume_attachments(
-                        availability_domain=inst.availability_domain,
-                        compartment_id=inst.compartment_id, instance_id=inst.id
-                    ).data
-                    if ba:
-                        boot_size = block_storage_client.get_boot_volume(ba[0].boot_volume_id).data.size_in_gbs
-                except: pass
+                if inst.id in boot_map:
+                    boot_size = volume_size(boot_sizes, boot_map[inst.id], 'boot_volume',
+                                            block_storage_client.get_boot_volume)
 
                 block_total = 0
-                try:
-                    vas = compute_client.list_volume_attachments(
-                        availability_domain=inst.availability_domain,
-                        compartment_id=inst.compartment_id, instance_id=inst.id
-                    ).data
-                    for a in vas:
-                        block_total += block_storage_client.get_volume(a.volume_id).data.size_in_gbs
-                except: pass
-
-                comp_instances_data.append({
+                for volume_id in block_map.get(inst.id, []):
+                    block_total += volume_size(block_sizes, volume_id, 'volume', block_storage_client.get_volume)
+
+                row = {
                     'compartment_name': compartment.name,
                     'server_name': inst.display_name,
                     'Type': os_type,
@@ -99,19 +205,26 @@ def get_compute_instances(config, compartments):
                     'boot_volume_size_gb': boot_size,
                     'block_volumes_total_gb': block_total,
                     'status': inst.lifecycle_state
-                })
+                }
+                comp_instances_data.append(row)
+                if snapshot:
+                    snapshot.record('compute', inst.id, marker, row, {'image': img_name, 'Type': os_type})
+        except BudgetExceeded:
+            raise
         except Exception as e:
+            if "Authorization failed" in str(e) or getattr(e, 'status', None) == 404:
+                # Sin permisos sobre el compartimento: se da por revisado
+                return comp_instances_data
             print(f"⚠️ Error en compartimento {compartment.name}: {e}")
-        
+            # None = unidad fallida: queda pendiente para `--resume`
+            return None
+
         return comp_instances_data
 
     # Ejecución paralela por COMPARTIMENTO
     # Es mejor paralelizar por compartimento que por instancia para no saturar los límites de la API
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        results = list(executor.map(process_compartment, compartments))
-
-    # Aplanar lista de listas
-    flat_results = [item for sublist in results for item in sublist]
-    print(f"✅ Proceso completado. {len(flat_results)} instancias encontradas.")
-    
-    return pd.DataFrame(flat_results)
\ No newline at end of file
+    results = runner.map(sheet.unit(process_compartment), compartments)
+
+    df = sheet.frame(results)
+    print(f"✅ Proceso completado. {sheet.row_count} instancias encontradas.")
+    return df
\ No newline at end of file
@@ -5,45 +5,70 @@ Autor: Daniel de Jesús Cervantes Velázquez
 Equipo: Automatización OCI
 Licencia: MIT
 """
-import oci
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+from utils.clients import ClientRegistry
+from utils.runner import CompartmentRunner
+from utils.snapshot import fingerprint
+from utils.records import Sheet
+from utils.budget import BudgetExceeded
 
-def get_db_systems(config, compartments):
+COLUMNS = [
+    'compartment_name', 'name', 'shape', 'cpu_core_count',
+    'db_storage_gb', 'shape_ocpus', 'memory_gb', 'local_storage_tb',
+    'node_count', 'license_model', 'scan_ips', 'vip_ips', 'db_home_version', 'status'
+]
+CATEGORICAL = ('compartment_name', 'shape', 'license_model', 'db_home_version', 'status')
+
+def get_db_systems(config, compartments, clients=None, runner=None, snapshot=None, sink=None):
     """
     Obtiene todos los DB Systems usando procesamiento paralelo por compartimento.
     """
+    import oci
     print("\n🚀 Iniciando obtención de DB Systems (Modo Paralelo)...")
 
     # Clientes OCI
-    database_client = oci.database.DatabaseClient(config)
-    network_client = oci.core.VirtualNetworkClient(config)
+    clients = clients or ClientRegistry(config)
+    runner = runner or CompartmentRunner(max_workers=10)
+    database_client = clients.get('database')
+    sheet = Sheet(COLUMNS, CATEGORICAL, sink=sink)
+    # Índice de IPs privadas de la región (compartido con los demás colectores)
+    ip_resolver = clients.ip_resolver()
 
-    def get_ip_details(ip_ids):
-        """Helper para obtener detalles de IPs privadas en paralelo si fuera necesario, 
-        aunque aquí lo mantenemos simple pero controlado."""
-        ips = []
-        for ip_id in ip_ids:
-            try:
-                private_ip = network_client.get_private_ip(ip_id).data
-                ips.append(f"{private_ip.ip_address} ({private_ip.display_name})")
-            except: continue
-        return ", ".join(ips) if ips else "N/A"
+    def ip_marker(db_sys):
+        return fingerprint(db_sys.lifecycle_state, db_sys.scan_ip_ids, db_sys.vip_ids, db_sys.time_created)
 
-    def process_compartment(compartment):
-        comp_db_data = []
+    def list_compartment(compartment):
         try:
             # Listar DB Systems del compartimento
             db_systems = oci.pagination.list_call_get_all_results(
                 database_client.list_db_systems,
                 compartment_id=compartment.id
             ).data
+            # Filtrar estados no deseados
+            return [d for d in db_systems if d.lifecycle_state not in ["TERMINATED", "TERMINATING", "FAILED"]]
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            if "Authorization failed" in str(e):
+                return []
+            print(f" ⚠️ Error en compartimento {compartment.name}: {e}")
+            # None = listado fallido: el compartimento queda pendiente
+            return None
 
-            for db_sys in db_systems:
-                # Filtrar estados no deseados
-                if db_sys.lifecycle_state in ["TERMINATED", "TERMINATING", "FAILED"]:
-                    continue
+    def needs_ips(db_sys):
+        return not (snapshot and snapshot.cached('dbsystem', db_sys.id, ip_marker(db_sys)))
 
+    def process_compartment(compartment):
+        db_systems = list_compartment(compartment)
+        if db_systems is None:
+            return None
+        comp_db_data = sheet.buffer()
+        try:
+            # IPs SCAN/VIP en bloque: un list_private_ips por subnet (compartido con los
+            # demás compartimentos y colectores) para los sistemas que no vienen del snapshot
+            ip_resolver.prefetch(
+                [d.subnet_id for d in db_systems if (d.scan_ip_ids or d.vip_ids) and needs_ips(d)]
+            )
+            for db_sys in db_systems:
                 # Lógica de OCPUs mejorada
                 shape = db_sys.shape
                 cpu_count = db_sys.cpu_core_count
@@ -55,11 +80,16 @@ def get_db_systems(config, compartments):
                     if parts[-1].isdigit():
                         shape_ocpus = int(parts[-1])
 
-                # Obtener IPs (SCAN y VIP)
-                formatted_scan = get_ip_details(db_sys.scan_ip_ids) if db_sys.scan_ip_ids else "N/A"
-                formatted_vip = get_ip_details(db_sys.vip_ids) if db_sys.vip_ids else "N/A"
+                # Obtener IPs (SCAN y VIP), reutilizando el snapshot si el sistema no cambió
+                marker = ip_marker(db_sys)
+                cached = snapshot.cached('dbsystem', db_sys.id, marker) if snapshot else None
+                if cached:
+                    formatted_scan, formatted_vip = cached['scan_ips'], cached['vip_ips']
+                else:
+                    formatted_scan = ip_resolver.format(db_sys.scan_ip_ids)
+                    formatted_vip = ip_resolver.format(db_sys.vip_ids)
 
-                comp_db_data.append({
+                row = {
                     'compartment_name': compartment.name,
                     'name': db_sys.display_name,
                     'shape': shape,
@@ -74,26 +104,23 @@ def get_db_systems(config, compartments):
                     'vip_ips': formatted_vip,
                     'db_home_version': db_sys.version,
                     'status': db_sys.lifecycle_state
-                })
+                }
+                comp_db_data.append(row)
+                if snapshot:
+                    snapshot.record('dbsystem', db_sys.id, marker, row,
+                                    {'scan_ips': formatted_scan, 'vip_ips': formatted_vip})
+        except BudgetExceeded:
+            raise
         except Exception as e:
             if "Authorization failed" not in str(e):
                 print(f" ⚠️ Error en compartimento {compartment.name}: {e}")
-        
-        return comp_db_data
+                return None
 
-    # Ejecución paralela por compartimento
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        results = list(executor.map(process_compartment, compartments))
+        return comp_db_data
 
-    # Aplanar resultados
-    db_data = [item for sublist in results for item in sublist]
+    # Un lote por compartimento: al vencer el tiempo se conserva lo ya recolectado
+    results = runner.map(sheet.unit(process_compartment), compartments)
 
-    columns = [
-        'compartment_name', 'name', 'shape', 'cpu_core_count',
-        'db_storage_gb', 'shape_ocpus', 'memory_gb', 'local_storage_tb',
-        'node_count', 'license_model', 'scan_ips', 'vip_ips', 'db_home_version', 'status'
-    ]
-    
-    df = pd.DataFrame(db_data) if db_data else pd.DataFrame(columns=columns)
-    print(f" ✅ DB Systems: {len(db_data)} sistemas procesados.")
+    df = sheet.frame(results)
+    print(f" ✅ DB Systems: {sheet.row_count} sistemas procesados.")
     return df
\ No newline at end of file
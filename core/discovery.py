@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import json
+from types import SimpleNamespace
+
+# Servicio (módulo de core) -> tipo de recurso en OCI Resource Search
+RESOURCE_TYPES = {
+    'compute': 'Instance',
+    'dbsystem': 'DbSystem',
+    'buckets': 'Bucket',
+    'oic_instances': 'IntegrationInstance',
+    'load_balancers': 'LoadBalancer',
+    'file_storage': 'FileSystem',
+}
+
+# Estados que no deben disparar al colector de detalle
+INACTIVE_STATES = {"TERMINATED", "TERMINATING", "DELETED", "DELETING"}
+
+PAGE_SIZE = 1000
+
+class Discovery:
+    """
+    Resultado del descubrimiento: {servicio: {compartment_id: [ocid, ...]}}.
+
+    Solo acota los compartimentos a recorrer; dentro de cada uno los
+    colectores listan como siempre (un listado por compartimento es más barato
+    que un get por OCID y no pierde recursos que el índice de búsqueda aún no tiene).
+    """
+
+    def __init__(self, found):
+        self.found = found
+
+    def compartments_for(self, service, compartments):
+        """Filtra la lista de compartimentos a los que contienen recursos del servicio."""
+        if service not in self.found:
+            return compartments
+        with_resources = self.found[service]
+        return [c for c in compartments if c.id in with_resources]
+
+def search_all(search_client, resource_type):
+    """Ejecuta una consulta estructurada paginada para un tipo de recurso en todo el tenancy."""
+    details = _structured_query(f"query {resource_type} resources")
+    items, page = [], None
+    while True:
+        response = search_client.search_resources(details, limit=PAGE_SIZE, page=page)
+        items.extend(response.data.items)
+        page = response.next_page
+        if not response.has_next_page:
+            return items
+
+def discover(search_client, services):
+    """Una consulta por tipo de recurso en lugar de compartimentos × servicios."""
+    print("\n🔎 Descubriendo recursos con Resource Search...")
+    found = {}
+    for service in services:
+        resource_type = RESOURCE_TYPES.get(service)
+        if not resource_type:
+            continue
+        try:
+            by_compartment = {}
+            for res in search_all(search_client, resource_type):
+                if res.lifecycle_state in INACTIVE_STATES:
+                    continue
+                by_compartment.setdefault(res.compartment_id, []).append(res.identifier)
+            found[service] = by_compartment
+            total = sum(len(ids) for ids in by_compartment.values())
+            print(f"  🔹 {resource_type}: {total} recursos en {len(by_compartment)} compartimentos")
+        except Exception as e:
+            # Sin descubrimiento para este servicio se recorren todos los compartimentos
+            print(f"  ⚠️ Error en búsqueda de {resource_type}: {e}")
+    return Discovery(found)
+
+def _structured_query(query):
+    try:
+        from oci.resource_search.models import StructuredSearchDetails
+    except ImportError:
+        return SimpleNamespace(query=query, type="Structured", matching_context_type="NONE")
+    return StructuredSearchDetails(query=query, type="Structured", matching_context_type="NONE")
+
+class FakeSearchClient:
+    """
+    Backend local de Resource Search para pruebas sin tenancy.
+
+    Se alimenta con una lista de recursos (dicts con resourceType, identifier,
+    compartmentId, lifecycleState y displayName) y pagina igual que el SDK.
+    """
+
+    def __init__(self, resources):
+        self.resources = [
+            SimpleNamespace(
+                resource_type=r['resourceType'],
+                identifier=r['identifier'],
+                compartment_id=r['compartmentId'],
+                lifecycle_state=r.get('lifecycleState', 'ACTIVE'),
+                display_name=r.get('displayName', r['identifier']),
+            )
+            for r in resources
+        ]
+        self.calls = 0
+
+    @classmethod
+    def from_file(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f))
+
+    def search_resources(self, search_details, limit=PAGE_SIZE, page=None, **kwargs):
+        self.calls += 1
+        # "query <Tipo> resources" -> <Tipo>
+        resource_type = search_details.query.split()[1].lower()
+        matches = [r for r in self.resources if r.resource_type.lower() == resource_type]
+        start = int(page or 0)
+        chunk = matches[start:start + limit]
+        has_next = start + limit < len(matches)
+        return SimpleNamespace(
+            data=SimpleNamespace(items=chunk),
+            has_next_page=has_next,
+            next_page=str(start + limit) if has_next else None,
+        )
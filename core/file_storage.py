@@ -5,80 +5,113 @@ Autor: Daniel de Jesús Cervantes Velázquez
 Equipo: Automatización OCI
 Licencia: MIT
 """
-import oci
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+from utils.clients import ClientRegistry
+from utils.runner import CompartmentRunner
+from utils.snapshot import fingerprint
+from utils.records import Sheet
+from utils.metrics import MetricsEngine
+from utils.budget import BudgetExceeded
 
-def get_file_systems(config, compartments):
-    """
-    Obtiene File Systems y su tamaño utilizado mediante procesamiento paralelo.
-    """
-    print("\n🚀 Iniciando obtención de File Storage (FSS) con métricas paralelas...")
+# Métrica de uso real de los file systems en OCI Monitoring
+METRIC_NAMESPACE = "oci_os"
+METRIC_NAME = "UsedBytes"
+# auto: una consulta por tenancy (subárbol) si se recorre más de un compartimento
+METRICS_SCOPES = ("auto", "tenancy", "compartment", "off")
 
-    fss_client = oci.file_storage.FileStorageClient(config)
-    monitoring_client = oci.monitoring.MonitoringClient(config)
-    
-    namespace = "oci_os"
-    fss_results = []
+COLUMNS = ['compartment_name', 'display_name', 'size_gb', 'size_source', 'status']
+CATEGORICAL = ('compartment_name', 'size_source', 'status')
 
-    def get_fs_usage(fs_id, compartment_id):
-        """Consulta el tamaño utilizado en el servicio de Monitoring."""
-        try:
-            query = f"UsedBytes[1m].mean().by(resourceId).where(resourceId='{fs_id}')"
-            metric_data = monitoring_client.summarize_metrics_data(
-                compartment_id=compartment_id,
-                summarize_metrics_data_details=oci.monitoring.models.SummarizeMetricsDataDetails(
-                    namespace=namespace,
-                    query=query
-                )
-            ).data
+def get_file_systems(config, compartments, clients=None, runner=None, snapshot=None,
+                     metrics=None, metrics_scope="auto", sink=None):
+    """
+    Obtiene File Systems y su tamaño utilizado (UsedBytes de Monitoring).
+
+    Las métricas se piden agrupadas por resourceId: una consulta para todo el
+    tenancy (antes de listar) o una por compartimento con file systems, nunca
+    una por file system. Si un file system no tiene datos se usa metered_bytes.
+    Cada compartimento es una unidad: su lote sale en cuanto termina.
+    """
+    import oci
+    print("\n🚀 Iniciando obtención de File Storage (FSS) con métricas agrupadas...")
 
-            if metric_data and metric_data[0].aggregated_datapoints:
-                # Obtenemos el último punto de datos
-                used_bytes = metric_data[0].aggregated_datapoints[-1].value
-                return round(used_bytes / (1024 ** 3), 2)
-            return 0.0
-        except:
-            return "N/A"
+    clients = clients or ClientRegistry(config)
+    runner = runner or CompartmentRunner(max_workers=10)
+    fss_client = clients.get('file_storage')
+    if metrics_scope != "off":
+        metrics = metrics or MetricsEngine(clients.get('monitoring'))
+    sheet = Sheet(COLUMNS, CATEGORICAL, sink=sink)
 
-    def process_compartment(compartment):
-        comp_data = []
+    def list_compartment(compartment):
         try:
             # Listar todos los FS del compartimento (Regional + Zonal)
-            file_systems = oci.pagination.list_call_get_all_results(
+            return oci.pagination.list_call_get_all_results(
                 fss_client.list_file_systems,
                 compartment_id=compartment.id,
                 availability_domain=None
             ).data
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            if "Authorization failed" in str(e) or getattr(e, 'status', None) == 404:
+                return []
+            print(f" ⚠️ Error en compartimento {compartment.name}: {e}")
+            # None = listado fallido: el compartimento queda pendiente para `--resume`
+            return None
 
+    def compartment_usage(compartment_id):
+        try:
+            return metrics.latest_by_resource(METRIC_NAMESPACE, METRIC_NAME, compartment_id)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            print(f" ⚠️ Error consultando métricas de {compartment_id}: {e}")
+            return {}
 
-            for fs in file_systems:
-                # if fs.lifecycle_state != "ACTIVE":
-                #     continue
-
-                # Consultar uso (esta es la parte lenta que ahora corre en hilos)
-                size_gb = round(fs.metered_bytes / (1024 ** 3), 1)
+    # Uso a nivel tenancy: una sola consulta (subárbol) antes de recorrer los compartimentos
+    usage = {}
+    scope = metrics_scope
+    if scope == "auto":
+        scope = "tenancy" if len(compartments) > 1 else "compartment"
+    if scope == "tenancy" and compartments:
+        try:
+            usage = metrics.latest_by_resource(
+                METRIC_NAMESPACE, METRIC_NAME, config["tenancy"], in_subtree=True
+            )
+        except Exception as e:
+            # Sin permisos a nivel tenancy: una consulta por compartimento con file systems
+            print(f" ⚠️ Métricas a nivel tenancy no disponibles ({e}); consultando por compartimento.")
+            scope = "compartment"
+    with_usage = []
 
-                comp_data.append({
-                    'compartment_name': compartment.name,
-                    'display_name': fs.display_name,
-                    'size_gb': size_gb,
-                    'status': fs.lifecycle_state
-                })
-        except Exception:
-            pass
-        return comp_data
+    def process_compartment(compartment):
+        file_systems = list_compartment(compartment)
+        if file_systems is None:
+            return None
+        comp_usage = usage
+        if scope == "compartment" and file_systems:
+            comp_usage = compartment_usage(compartment.id)
+        comp_fss_data = sheet.buffer()
+        for fs in file_systems:
+            # if fs.lifecycle_state != "ACTIVE":
+            #     continue
+            used_bytes = comp_usage.get(fs.id)
+            if used_bytes is not None:
+                with_usage.append(fs.id)
+            row = {
+                'compartment_name': compartment.name,
+                'display_name': fs.display_name,
+                'size_gb': round((fs.metered_bytes if used_bytes is None else used_bytes) / (1024 ** 3), 1),
+                'size_source': 'metered_bytes' if used_bytes is None else METRIC_NAME,
+                'status': fs.lifecycle_state
+            }
+            comp_fss_data.append(row)
+            if snapshot:
+                snapshot.record('file_storage', fs.id, fingerprint(row), row)
+        return comp_fss_data
 
-    # Ejecución paralela por compartimento
-    # Usamos max_workers=10 para manejar múltiples llamadas a Monitoring simultáneas
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        results = list(executor.map(process_compartment, compartments))
+    # Un lote por compartimento: al vencer el tiempo se conserva lo ya recolectado
+    results = runner.map(sheet.unit(process_compartment), compartments)
 
-    # Aplanar la lista de resultados
-    fss_results = [item for sublist in results for item in sublist]
-    
-    columns = ['compartment_name', 'display_name', 'size_gb', 'status']
-    df = pd.DataFrame(fss_results) if fss_results else pd.DataFrame(columns=columns)
-    
-    print(f" ✅ File Systems: {len(fss_results)} procesados.")
-    return df
\ No newline at end of file
+    df = sheet.frame(results)
+    print(f" ✅ File Systems: {sheet.row_count} procesados ({len(with_usage)} con UsedBytes).")
+    return df
@@ -5,16 +5,25 @@ Autor: Daniel de Jesús Cervantes Velázquez
 Equipo: Automatización OCI
 Licencia: MIT
 """
-import oci
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+from utils.clients import ClientRegistry
+from utils.runner import CompartmentRunner
+from utils.snapshot import fingerprint
+from utils.records import Sheet
+from utils.budget import BudgetExceeded
 
-def get_load_balancers(config, compartments):
+COLUMNS = ['compartment_name', 'name', 'shape', 'ip_addresses', 'status']
+CATEGORICAL = ('compartment_name', 'shape', 'status')
+
+def get_load_balancers(config, compartments, clients=None, runner=None, snapshot=None, sink=None):
+    import oci
     print("\n🚀 Iniciando obtención de Load Balancers (Modo Paralelo)...")
-    lb_client = oci.load_balancer.LoadBalancerClient(config)
+    clients = clients or ClientRegistry(config)
+    runner = runner or CompartmentRunner(max_workers=10)
+    lb_client = clients.get('load_balancer')
+    sheet = Sheet(COLUMNS, CATEGORICAL, sink=sink)
 
     def process_compartment(compartment):
-        comp_lb_data = []
+        comp_lb_data = sheet.buffer()
         try:
             # Listar LBs del compartimento
             lbs = oci.pagination.list_call_get_all_results(
@@ -33,7 +42,10 @@ def get_load_balancers(config, compartments):
                         details = lb_client.get_load_balancer(lb.id).data
                         if details.shape_details:
                             shape = f"flex ({details.shape_details.minimum_bandwidth_in_mbps}-{details.shape_details.maximum_bandwidth_in_mbps} Mbps)"
-                    except: pass
+                    except BudgetExceeded:
+                        raise
+                    except Exception as e:
+                        print(f"  ⚠️ Error obteniendo shape flex de {lb.display_name}: {e}")
 
                 # Procesar IPs
                 ips = []
@@ -41,20 +53,27 @@ def get_load_balancers(config, compartments):
                     tipo = "Pública" if ip_obj.is_public else "Privada"
                     ips.append(f"{ip_obj.ip_address} ({tipo})")
 
-                comp_lb_data.append({
+                row = {
                     'compartment_name': compartment.name,
                     'name': lb.display_name,
                     'shape': shape,
                     'ip_addresses': ", ".join(ips) if ips else "N/A",
                     'status': lb.lifecycle_state
-                })
-        except Exception:
-            pass # Errores de permisos comunes en LBs se ignoran silenciosamente
+                }
+                comp_lb_data.append(row)
+                if snapshot:
+                    snapshot.record('load_balancers', lb.id, fingerprint(row), row)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            # Errores de permisos comunes en LBs se ignoran silenciosamente
+            if "Authorization failed" not in str(e) and getattr(e, 'status', None) != 404:
+                print(f" ⚠️ Error en compartimento {compartment.name}: {e}")
+                return None
         return comp_lb_data
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        results = list(executor.map(process_compartment, compartments))
+    results = runner.map(sheet.unit(process_compartment), compartments)
 
-    flat_results = [item for sublist in results for item in sublist]
-    print(f" ✅ Load Balancers: {len(flat_results)} encontrados.")
-    return pd.DataFrame(flat_results) if flat_results else pd.DataFrame(columns=['compartment_name', 'name', 'shape', 'ip_addresses', 'status'])
\ No newline at end of file
+    df = sheet.frame(results)
+    print(f" ✅ Load Balancers: {sheet.row_count} encontrados.")
+    return df
\ No newline at end of file
@@ -5,16 +5,25 @@ Autor: Daniel de Jesús Cervantes Velázquez
 Equipo: Automatización OCI
 Licencia: MIT
 """
-import oci
-import pandas as pd
-from concurrent.futures import ThreadPoolExecutor
+from utils.clients import ClientRegistry
+from utils.runner import CompartmentRunner
+from utils.snapshot import fingerprint
+from utils.records import Sheet
+from utils.budget import BudgetExceeded
 
-def get_oic_instances(config, compartments):
+COLUMNS = ['compartment_name', 'name', 'instance_url', 'message_packs', 'licensing', 'status']
+CATEGORICAL = ('compartment_name', 'licensing', 'status')
+
+def get_oic_instances(config, compartments, clients=None, runner=None, snapshot=None, sink=None):
+    import oci
     print("\n🚀 Iniciando obtención de Oracle Integration (OIC)...")
-    oic_client = oci.integration.IntegrationInstanceClient(config)
+    clients = clients or ClientRegistry(config)
+    runner = runner or CompartmentRunner(max_workers=10)
+    oic_client = clients.get('integration')
+    sheet = Sheet(COLUMNS, CATEGORICAL, sink=sink)
 
     def process_compartment(compartment):
-        comp_oic_data = []
+        comp_oic_data = sheet.buffer()
         try:
             instances = oci.pagination.list_call_get_all_results(
                 oic_client.list_integration_instances, compartment_id=compartment.id
@@ -24,21 +33,28 @@ def get_oic_instances(config, compartments):
                 if oic.lifecycle_state in ["DELETED", "DELETING"]:
                     continue
 
-                comp_oic_data.append({
+                row = {
                     'compartment_name': compartment.name,
                     'name': oic.display_name,
                     'instance_url': oic.instance_url or "N/A",
                     'message_packs': oic.message_packs,
                     'licensing': "BYOL" if oic.is_byol else "License Included",
                     'status': oic.lifecycle_state
-                })
-        except Exception:
-            pass
+                }
+                comp_oic_data.append(row)
+                if snapshot:
+                    snapshot.record('oic_instances', oic.id, fingerprint(row), row)
+        except BudgetExceeded:
+            raise
+        except Exception as e:
+            # Sin permisos sobre el compartimento: unidad vacía; otro error la deja pendiente
+            if "Authorization failed" not in str(e) and getattr(e, 'status', None) != 404:
+                print(f" ⚠️ Error en compartimento {compartment.name}: {e}")
+                return None
         return comp_oic_data
 
-    with ThreadPoolExecutor(max_workers=10) as executor:
-        results = list(executor.map(process_compartment, compartments))
+    results = runner.map(sheet.unit(process_compartment), compartments)
 
-    flat_results = [item for sublist in results for item in sublist]
-    print(f" ✅ OIC: {len(flat_results)} instancias encontradas.")
-    return pd.DataFrame(flat_results) if flat_results else pd.DataFrame(columns=['compartment_name', 'name', 'instance_url', 'message_packs', 'licensing'])
\ No newline at end of file
+    df = sheet.frame(results)
+    print(f" ✅ OIC: {sheet.row_count} instancias encontradas.")
+    return df
\ No newline at end of file
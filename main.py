@@ -5,26 +5,47 @@ Autor: Daniel de Jesús Cervantes Velázquez
 Equipo: Automatización OCI
 Licencia: MIT
 """
-import oci
-import pandas as pd
 import os
+import time
+import threading
+import argparse
+import importlib
 import configparser
 from datetime import datetime
+from functools import partial
+from contextlib import nullcontext
 from concurrent.futures import ThreadPoolExecutor
 
-# --- IMPORTACIONES CORREGIDAS ---
-# Ahora importamos desde el paquete 'core'
-from core import compute, dbsystem, buckets, oic_instances, load_balancers, file_storage
-from utils.mailer import send_email
+# Los colectores de 'core' (y con ellos el SDK de OCI y pandas) se importan
+# solo para los servicios seleccionados: ver SERVICES y build_tasks
+from core.discovery import discover, FakeSearchClient
+from utils.settings import load_settings
+from utils.clients import DEFAULT_POOL_SIZE, ClientRegistry, SERVICES as CLIENT_SERVICES
+from utils.throttle import AdaptiveRateLimiter
+from utils.runner import CompartmentRunner, region_budget
+from utils.scheduler import GlobalScheduler, CostModel
+from utils.snapshot import SnapshotStore, DELTA_COLUMNS
+from utils.report_writer import ReportWriter
+from utils.pipeline import BatchPipeline
+from utils.instrumentation import CallRecorder
+from utils.detail_cache import DetailCache
+from utils.compartments import CompartmentCache, list_compartments
+from utils.checkpoint import CheckpointJournal
+from utils.budget import BudgetExceeded, BudgetedRunner, RunBudget, UnitProgress, parse_service_budgets
 
-def handle_email_delivery(file_path, inventory_results):
+def handle_email_delivery(paths, inventory_results, config, config_path="config.ini"):
     """Envía el correo con el body adaptado para operadores y el resumen de hallazgos."""
-    if not os.path.exists("config.ini"):
+    if not os.path.exists(config_path):
         print("⚠️ No se encontró config.ini, saltando envío.")
         return
+    from utils.mailer import (
+        DEFAULT_MAX_MESSAGE_MB, LocalOffload, ObjectStorageOffload, SmtpSession,
+        decrypt_credentials, deliver_report, parse_recipient_groups
+    )
 
     cp = configparser.ConfigParser()
-    cp.read("config.ini", encoding='utf-8')
+    cp.read(config_path, encoding='utf-8')
+    smtp = cp['SMTP']
     
     # Generar lista de servicios incluidos dinámicamente
     servicios_incluidos = ", ".join(inventory_results.keys())
@@ -41,88 +62,515 @@ Saludos cordiales,
 Equipo de Automatización OCI"""
 
     try:
-        puerto = int(cp['SMTP']['port'])
-        send_email(
-            smtp_host=cp['SMTP']['host'],
-            smtp_port=puerto,
-            smtp_user=cp['SMTP']['user'],
-            smtp_password=cp['SMTP']['password'],
-            sender=cp['SMTP']['sender'],
-            recipients=[cp['SMTP']['receiver']],
+        # Credenciales vacías = servidor SMTP local/de pruebas sin autenticación
+        user = password = None
+        if smtp.get('user'):
+            user, password = decrypt_credentials(smtp['user'], smtp['password'])
+        session = SmtpSession(smtp['host'], smtp.getint('port'), user, password,
+                              starttls=smtp.getboolean('starttls', fallback=True))
+
+        # Si el reporte no cabe ni comprimido, se publica en un bucket con enlace PAR
+        offload = None
+        if smtp.get('offload_local_dir'):
+            offload = LocalOffload(smtp['offload_local_dir'], smtp.getint('par_hours', fallback=72))
+        elif smtp.get('offload_bucket'):
+            # Cliente propio (sin el limitador) para que el SDK rebobine el archivo si reintenta
+            import oci
+            offload = ObjectStorageOffload(
+                oci.object_storage.ObjectStorageClient(config),
+                smtp['offload_bucket'],
+                namespace=smtp.get('offload_namespace') or None,
+                prefix=smtp.get('offload_prefix', fallback='reportes/'),
+                par_hours=smtp.getint('par_hours', fallback=72)
+            )
+
+        deliver_report(
+            session,
+            sender=smtp['sender'],
+            recipient_groups=parse_recipient_groups(smtp['receiver']),
             subject=f"Inventario Unificado OCI - {datetime.now().strftime('%d/%m/%Y')}",
             body=body_text,
-            attachment_path=file_path
+            paths=paths,
+            max_message_mb=smtp.getfloat('max_message_mb', fallback=DEFAULT_MAX_MESSAGE_MB),
+            compress=smtp.getboolean('compress', fallback=True),
+            offload=offload
         )
         print("📧 Proceso de notificación finalizado exitosamente.")
     except Exception as e:
         print(f"⚠️ Error al enviar el correo: {e}")
 
-def main():
+def list_regions(identity_client, tenancy_id, settings):
+    """Regiones suscritas del tenancy (o las indicadas en [INVENTORY] regions)."""
+    if settings['regions'].strip():
+        return [r.strip() for r in settings['regions'].split(',') if r.strip()]
+    subscriptions = identity_client.list_region_subscriptions(tenancy_id).data
+    return [s.region_name for s in subscriptions if s.status == "READY"]
+
+# Servicios disponibles: clave -> (módulo de core, colector, pestaña del reporte)
+SERVICES = {
+    'compute': ('core.compute', 'get_compute_instances', "Compute"),
+    'dbsystem': ('core.dbsystem', 'get_db_systems', "Base de Datos"),
+    'buckets': ('core.buckets', 'get_buckets', "Buckets"),
+    'oic_instances': ('core.oic_instances', 'get_oic_instances', "OIC"),
+    'load_balancers': ('core.load_balancers', 'get_load_balancers', "LoadBalancers"),
+    'file_storage': ('core.file_storage', 'get_file_systems', "FileStorage"),
+}
+
+# Parámetros de cada colector tomados de [INVENTORY]
+SERVICE_OPTIONS = {
+    'buckets': lambda settings: dict(
+        sizing_mode=settings['bucket_sizing'],
+        shard_objects=settings.getint('bucket_shard_objects'),
+        shard_workers=settings.getint('bucket_shard_workers')
+    ),
+    'file_storage': lambda settings: dict(metrics_scope=settings['fss_metrics_scope']),
+}
+
+def parse_services(value):
+    """'compute, buckets' -> ['compute', 'buckets']; vacío o 'all' = todos, en el orden de SERVICES."""
+    names = [s.strip() for s in value.split(',') if s.strip()]
+    if not names or names == ['all']:
+        return list(SERVICES)
+    unknown = [s for s in names if s not in SERVICES]
+    if unknown:
+        raise ValueError(f"Servicios desconocidos: {', '.join(unknown)} (disponibles: {', '.join(SERVICES)})")
+    return list(dict.fromkeys(names))
+
+def build_tasks(settings):
+    """Servicios a recolectar: (clave del servicio, colector, pestaña del reporte)."""
+    tasks = []
+    for service in parse_services(settings['services']):
+        module_name, func_name, sheet = SERVICES[service]
+        func = getattr(importlib.import_module(module_name), func_name)
+        options = SERVICE_OPTIONS.get(service)
+        tasks.append((service, partial(func, **options(settings)) if options else func, sheet))
+    return tasks
+
+def connection_pool_sizes(settings):
+    """
+    Conexiones por servicio del SDK según la concurrencia real del runtime:
+    un hilo por worker (10 por colector en threads, `async_max_in_flight` o
+    `scheduler_workers`) y, en buckets exactos, cada bucket grande lista con
+    `bucket_shard_workers` hilos más.
+    """
+    runtime = settings['runtime']
+    if runtime == 'async':
+        workers = settings.getint('async_max_in_flight')
+        bucket_units = min(workers, settings.getint('async_service_concurrency'))
+    elif runtime == 'scheduler':
+        workers = bucket_units = settings.getint('scheduler_workers')
+    else:
+        workers = bucket_units = DEFAULT_POOL_SIZE
+    sizes = {service: workers for service in CLIENT_SERVICES}
+    shards = settings.getint('bucket_shard_workers') if settings['bucket_sizing'] == 'exact' else 1
+    sizes['object_storage'] = max(workers, bucket_units * shards)
+    return sizes
+
+def search_client_for(clients, settings, region):
+    """Cliente de Resource Search de la región (o el de prueba si hay discovery_source)."""
+    if settings['discovery_source']:
+        return FakeSearchClient.from_file(settings['discovery_source'])
+    return clients.get('resource_search', region)
+
+def skip_empty_compartments(cache, clients, settings, regions, tasks, task_compartments):
+    """Aplica la caché negativa; con empty_confirm una búsqueda en bloque reactiva los que ya tienen recursos."""
+    for region in regions:
+        skipped = {}
+        for service, _, _ in tasks:
+            key = f"{region}/{service}"
+            visit, skipped[service] = cache.select(key, task_compartments[(region, service)])
+            task_compartments[(region, service)] = visit
+        pending = [service for service, comps in skipped.items() if comps]
+        if pending and settings.getboolean('empty_confirm'):
+            found = discover(search_client_for(clients, settings, region), pending)
+            for service in pending:
+                confirmed = found.compartments_for(service, skipped[service])
+                cache.confirm(f"{region}/{service}", [c.id for c in confirmed])
+                task_compartments[(region, service)] += confirmed
+                skipped[service] = [c for c in skipped[service] if c not in confirmed]
+        total = sum(len(comps) for comps in skipped.values())
+        if total:
+            print(f"⏭️ {region}: {total} visitas omitidas a compartimentos vacíos en ejecuciones recientes")
+
+def run_collector(func, config, compartments, recorder=None, span_name=None, **kwargs):
+    """Ejecuta un colector; con recorder queda como tramo 'service' en la línea de tiempo."""
+    with recorder.span(span_name, 'service') if recorder else nullcontext():
+        return func(config, compartments, **kwargs)
+
+def run_inventory(config, clients, settings, tasks, reports_dir="reports", send_report=True, resume=False):
+    """
+    Ejecuta el inventario completo con los clientes recibidos y devuelve las rutas generadas.
+
+    Con `resume`, continúa la ejecución interrumpida registrada en la bitácora
+    (setting `checkpoint`): reescribe lo ya recolectado y solo consulta lo pendiente.
+    """
     start_time = datetime.now()
 
     # 1. Preparar carpeta de reportes
-    reports_dir = "reports"
     if not os.path.exists(reports_dir):
         os.makedirs(reports_dir)
 
-    # 2. Configuración OCI
+    # 2. Compartimentos y regiones del tenancy
     try:
-        config = oci.config.from_file("~/.oci/config", "DEFAULT")
         tenancy_id = config["tenancy"]
-        identity_client = oci.identity.IdentityClient(config)
+        identity_client = clients.get('identity')
 
         print("🔍 Listando compartimentos...")
-        compartments = oci.pagination.list_call_get_all_results(
-            identity_client.list_compartments,
-            compartment_id=tenancy_id,
-            compartment_id_in_subtree=True,
-            lifecycle_state="ACTIVE"
-        ).data
-        compartments.append(oci.identity.models.Compartment(id=tenancy_id, name="root"))
+        cache = None
+        if settings.getboolean('compartment_cache'):
+            cache = CompartmentCache(
+                settings['compartment_cache_path'],
+                ttl_hours=settings.getfloat('compartment_ttl_hours'),
+                skip_after=settings.getint('empty_skip_after'),
+                recheck_hours=settings.getfloat('empty_recheck_hours')
+            )
+            compartments = cache.compartments(identity_client, tenancy_id)
+        else:
+            compartments = list_compartments(identity_client, tenancy_id)
+
+        regions = list_regions(identity_client, tenancy_id, settings)
+        print(f"🌎 Regiones: {', '.join(regions)}")
     except Exception as e:
         print(f"❌ Error de autenticación OCI: {e}")
-        return
+        return []
 
     # 3. Procesamiento paralelo de módulos (usando los módulos de core)
-    tasks = [
-        # (compute.get_compute_instances, "Compute"),
-        # (dbsystem.get_db_systems, "Base de Datos"),
-        # (buckets.get_buckets, "Buckets"),
-        # (oic_instances.get_oic_instances, "OIC"),
-        # (load_balancers.get_load_balancers, "LoadBalancers"),
-        (file_storage.get_file_systems, "FileStorage")
-    ]
-
-    inventory_results = {}
-    print(f"⚙️ Procesando {len(tasks)} servicios en paralelo...")
-    
-    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
-        # Submit de tareas
-        future_to_sheet = {executor.submit(func, config, compartments): sheet for func, sheet in tasks}
-        
-        for future in future_to_sheet:
-            sheet_name = future_to_sheet[future]
+    # 3.1 Descubrimiento opcional: una búsqueda por tipo de recurso (Resource Search es regional)
+    task_compartments = {
+        (region, service): compartments for region in regions for service, _, _ in tasks
+    }
+    if settings.getboolean('discovery'):
+        for region in regions:
+            found = discover(search_client_for(clients, settings, region), [service for service, _, _ in tasks])
+            for service, _, _ in tasks:
+                task_compartments[(region, service)] = found.compartments_for(service, compartments)
+    elif cache and settings.getint('empty_skip_after') > 0:
+        # Sin descubrimiento: omitir compartimentos que vienen vacíos ejecución tras ejecución
+        skip_empty_compartments(cache, clients, settings, regions, tasks, task_compartments)
+
+    # 3.2 Bitácora de avance; al reanudar el reporte conserva la fecha de la ejecución original
+    journal = None
+    if settings.getboolean('checkpoint'):
+        journal = CheckpointJournal(
+            settings['checkpoint_path'], resume=resume,
+            cursor_pages=settings.getint('checkpoint_cursor_pages')
+        )
+
+    # 3.3 Salida en streaming: cada resultado se escribe al llegar y se libera
+    timestamp = (journal.started if journal else start_time).strftime("%Y-%m-%d")
+    base_path = os.path.join(reports_dir, f"inventario_oci_{timestamp}")
+    formats = [f.strip() for f in settings['output_formats'].split(',') if f.strip()]
+    writer = ReportWriter(base_path, formats)
+    for _, _, sheet in tasks:
+        writer.open_sheet(sheet)
+
+    # 3.4 Todas las regiones en paralelo; cada región con su propio presupuesto de concurrencia
+    snapshot = SnapshotStore(settings['snapshot_path']) if settings.getboolean('snapshot') else None
+    failed_services = set()
+    budgets = {region: region_budget(settings.getint('region_concurrency')) for region in regions}
+    recorder = getattr(clients, 'recorder', None)
+    runtime = None
+    if settings['runtime'] == 'async':
+        from utils.async_runtime import AsyncRuntime
+        runtime = AsyncRuntime(
+            max_in_flight=settings.getint('async_max_in_flight'),
+            service_concurrency=settings.getint('async_service_concurrency'),
+            region_concurrency=settings.getint('region_concurrency')
+        )
+    elif settings['runtime'] == 'scheduler':
+        runtime = GlobalScheduler(
+            max_workers=settings.getint('scheduler_workers'),
+            costs=CostModel(settings['unit_costs_path'])
+        )
+
+    # Plazo global y por servicio: vencido, las unidades pendientes se omiten y
+    # la pestaña queda marcada como parcial con lo ya recolectado
+    run_budget = RunBudget(
+        settings.getfloat('deadline_minutes'), parse_service_budgets(settings['service_budget_minutes'])
+    )
+    progress = {(region, service): UnitProgress() for region in regions for service, _, _ in tasks}
+    rows_so_far = {key: 0 for key in progress}
+    status = {key: 'completo' for key in progress}
+
+    def make_runner(region, service):
+        if runtime:
+            runner = runtime.runner(service, region, name=f"{region}/{service}", recorder=recorder)
+        else:
+            runner = CompartmentRunner(budget=budgets[region], name=f"{region}/{service}", recorder=recorder)
+        return BudgetedRunner(runner, run_budget.deadline(service), progress[(region, service)])
+
+    def log_progress():
+        parts = [
+            f"{region}/{service} {p.done}/{p.total} unidades, {rows_so_far[(region, service)]} filas"
+            for (region, service), p in progress.items() if p.total or rows_so_far[(region, service)]
+        ]
+        elapsed = datetime.now() - start_time
+        print(f"⏳ [{str(elapsed).split('.')[0]}] " + (" | ".join(parts) or "listando recursos..."))
+
+    print(f"⚙️ Procesando {len(tasks)} servicios en {len(regions)} regiones en paralelo ({settings['runtime']})...")
+
+    # Cada colector entrega un lote por compartimento/bucket terminado a una cola
+    # acotada; este hilo es el único escritor y vuelca cada lote al llegar
+    pipeline = BatchPipeline(maxsize=settings.getint('stream_queue_size'))
+    names_with_rows = {}
+    resumed_services = set()
+
+    def write_batch(region, service, sheet_name, columns, rows):
+        rows = list(rows)
+        rows_so_far[(region, service)] += len(rows)
+        if 'compartment_name' in columns:
+            position = columns.index('compartment_name')
+            names_with_rows.setdefault((region, service), set()).update(row[position] for row in rows)
+        writer.write_rows(sheet_name, ([region, *row] for row in rows), ['region', *columns])
+
+    with ThreadPoolExecutor(max_workers=len(tasks) * len(regions), thread_name_prefix="servicios") as executor:
+        # Submit de tareas (al reanudar, primero se reescribe lo registrado en la bitácora)
+        producers = 0
+        for region in regions:
+            for service, func, sheet in tasks:
+                key = (region, service, sheet)
+                sink = pipeline.sink(key)
+                if journal:
+                    journal_key = f"{region}/{service}"
+                    columns, rows = journal.replay(journal_key)
+                    if rows or journal_key in journal.services:
+                        resumed_services.add(service)
+                    if columns:
+                        write_batch(region, service, sheet, columns, rows)
+                    if journal_key in journal.services:
+                        continue
+                    sink = journal.sink(journal_key, sink)
+                future = executor.submit(
+                    run_collector, func, config, task_compartments[(region, service)],
+                    recorder=recorder, span_name=f"{region}/{sheet}",
+                    clients=clients.for_region(region),
+                    runner=make_runner(region, service),
+                    snapshot=snapshot,
+                    sink=sink
+                )
+                future.add_done_callback(partial(pipeline.finish, key))
+                producers += 1
+
+        progress_interval = settings.getfloat('progress_interval_seconds')
+        next_progress = time.monotonic() + progress_interval
+        for kind, key, payload in pipeline.events(producers, timeout=progress_interval or None):
+            if progress_interval and time.monotonic() >= next_progress:
+                log_progress()
+                next_progress = time.monotonic() + progress_interval
+            if kind == 'idle':
+                continue
+            region, service, sheet_name = key
+            if kind == 'batch':
+                write_batch(region, service, sheet_name, payload.sheet.columns, payload.rows())
+                continue
             try:
-                inventory_results[sheet_name] = future.result()
+                # En streaming el DataFrame devuelto solo trae columnas (encabezado de pestañas vacías)
+                df = payload.result()
+            except BudgetExceeded:
+                p = progress[(region, service)]
+                print(f"⌛ {sheet_name} ({region}): tiempo agotado, pestaña parcial "
+                      f"({p.done}/{p.total} unidades, {rows_so_far[(region, service)]} filas)")
+                status[(region, service)] = 'parcial'
+                failed_services.add(service)
+                continue
             except Exception as e:
-                print(f"⚠️ Error obteniendo datos de {sheet_name}: {e}")
-                inventory_results[sheet_name] = pd.DataFrame()
+                print(f"⚠️ Error obteniendo datos de {sheet_name} ({region}): {e}")
+                status[(region, service)] = 'error'
+                failed_services.add(service)
+                continue
+            failed = df.attrs.get('failed_units', 0)
+            if failed:
+                # Unidades con error: quedan pendientes en la bitácora y no cuentan como vacías
+                print(f"⚠️ {sheet_name} ({region}): {failed} unidades con error, pestaña parcial")
+                status[(region, service)] = 'parcial'
+                failed_services.add(service)
+            elif cache and 'compartment_name' in df:
+                cache.update(f"{region}/{service}", task_compartments[(region, service)],
+                             names_with_rows.get((region, service), set()) | set(df['compartment_name']))
+            if journal and not failed:
+                journal.service_done(f"{region}/{service}", df.columns)
+            df.insert(0, 'region', region)
+            writer.write_frame(sheet_name, df)
+
+    if runtime:
+        runtime.close()
+
+    # 3.5 Estado de cada pestaña (completa / parcial por tiempo / error)
+    if run_budget.enabled or any(s != 'completo' for s in status.values()):
+        state_columns = ['region', 'service', 'sheet', 'status', 'units_done', 'units_total', 'rows']
+        writer.write_rows("Estado", [
+            [region, service, sheet, status[(region, service)], progress[(region, service)].done,
+             progress[(region, service)].total, rows_so_far[(region, service)]]
+            for region in regions for service, _, sheet in tasks
+        ], state_columns)
+
+    # 3.6 Delta contra el snapshot anterior y persistencia del snapshot actual. Los
+    #     servicios reanudados no pasan por los colectores completos: conservan su
+    #     snapshot anterior y no reportan bajas
+    if snapshot:
+        complete_services = {service for service, _, _ in tasks} - failed_services - resumed_services
+        if settings.getboolean('delta_sheet'):
+            delta = snapshot.delta(complete_services)
+            writer.write_rows("Cambios", [[r[c] for c in DELTA_COLUMNS] for r in delta], DELTA_COLUMNS)
+        snapshot.save(complete_services)
+        print(f"🗂️ Snapshot actualizado: {settings['snapshot_path']}")
 
-    # 4. Generar y guardar Excel
-    timestamp = start_time.strftime("%Y-%m-%d")
-    filename = f"inventario_oci_{timestamp}.xlsx"
-    file_path = os.path.join(reports_dir, filename)
+    if cache:
+        cache.save()
+    clients.details.save()
 
-    with pd.ExcelWriter(file_path, engine='openpyxl') as writer:
-        for sheet, df in inventory_results.items():
-            df.to_excel(writer, index=False, sheet_name=sheet)
+    # 4. Cerrar los archivos de salida (xlsx / csv / parquet)
+    output_paths = writer.close()
+    for path in output_paths:
+        print(f"💾 Reporte generado: {path}")
+    if journal:
+        # Ejecución completa: la próxima empieza desde cero. Si quedaron pestañas
+        # parciales o con error, la bitácora se conserva para completarlas
+        complete = all(state == 'completo' for state in status.values())
+        journal.close(remove=complete)
+        if not complete:
+            print("↩️ Quedaron servicios incompletos: `python main.py --resume` completa lo pendiente.")
 
-    print(f"💾 Reporte generado: {file_path}")
+    # 4.1 Métricas por llamada: resumen JSON, textfile de Prometheus y línea de tiempo
+    if recorder:
+        for path in recorder.export(reports_dir, f"inventario_oci_{timestamp}"):
+            print(f"📈 Métricas generadas: {path}")
 
-    # 5. Envío de correo
-    handle_email_delivery(file_path, inventory_results)
+    # 5. Envío de correo: el Excel si se generó, si no las carpetas csv/parquet
+    #    (comprimido o publicado en Object Storage si excede el límite del SMTP)
+    if send_report:
+        if "xlsx" in formats:
+            deliverables = [f"{base_path}.xlsx"]
+        else:
+            deliverables = [f"{base_path}_{fmt}" for fmt in formats]
+        handle_email_delivery(deliverables, writer.row_counts, config)
 
     print(f"⏱️ Tiempo total de ejecución: {datetime.now() - start_time}")
+    return output_paths
+
+def run_daemon(config, clients, settings, tasks):
+    """Modo servicio: refresco continuo en memoria y API HTTP/JSON local (Excel = exportación)."""
+    from utils.daemon import InventoryDaemon, make_api_server
+    from utils.events import EventFileFeed
+
+    try:
+        regions = list_regions(clients.get('identity'), config["tenancy"], settings)
+    except Exception as e:
+        print(f"❌ Error de autenticación OCI: {e}")
+        return
+
+    daemon = InventoryDaemon(
+        config, clients, tasks, regions,
+        intervals=parse_service_budgets(settings['daemon_service_minutes']),
+        default_minutes=settings.getfloat('daemon_refresh_minutes'),
+        region_concurrency=settings.getint('region_concurrency'),
+        feeds=[EventFileFeed(settings['events_source'])] if settings['events_source'] else None,
+        events_poll_seconds=settings.getfloat('events_poll_seconds')
+    )
+    server = make_api_server(daemon, settings['daemon_host'], settings.getint('daemon_port'))
+    threading.Thread(target=server.serve_forever, name="api", daemon=True).start()
+    print(f"🌐 API en http://{settings['daemon_host']}:{settings.getint('daemon_port')} "
+          f"(/health, /lookup?q=, /resources, POST /events, POST /export)")
+    try:
+        daemon.run_forever()
+    except KeyboardInterrupt:
+        print("🛑 Deteniendo el servicio...")
+    finally:
+        server.shutdown()
+        daemon.stop()
+        clients.details.save()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Inventario unificado de OCI")
+    parser.add_argument(
+        "--services", metavar="LISTA",
+        help=f"servicios separados por coma o 'all' (disponibles: {', '.join(SERVICES)})"
+    )
+    parser.add_argument(
+        "--regions", metavar="LISTA",
+        help="regiones separadas por coma (por defecto todas las suscritas)"
+    )
+    parser.add_argument(
+        "--formats", metavar="LISTA",
+        help="formatos de salida separados por coma: xlsx, csv, parquet"
+    )
+    parser.add_argument(
+        "--list-services", action="store_true",
+        help="muestra los servicios disponibles y termina"
+    )
+    parser.add_argument(
+        "--resume", action="store_true",
+        help="continúa la ejecución interrumpida registrada en la bitácora de avance"
+    )
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="modo servicio: refresca cada servicio en su intervalo y atiende consultas HTTP/JSON"
+    )
+    args = parser.parse_args(argv)
+    if args.services:
+        try:
+            parse_services(args.services)
+        except ValueError as e:
+            parser.error(str(e))
+    return args
+
+def apply_args(settings, args):
+    """La línea de comandos tiene prioridad sobre [INVENTORY] del config.ini."""
+    for option, key in (('services', 'services'), ('regions', 'regions'), ('formats', 'output_formats')):
+        value = getattr(args, option)
+        if value is not None:
+            settings[key] = value
+    return settings
+
+def main():
+    args = parse_args()
+    if args.list_services:
+        for service, (_, _, sheet) in SERVICES.items():
+            print(f"{service:<16} {sheet}")
+        return
+    settings = apply_args(load_settings(), args)
+    try:
+        tasks = build_tasks(settings)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return
+
+    # Configuración OCI
+    import oci
+    try:
+        config = oci.config.from_file("~/.oci/config", "DEFAULT")
+    except Exception as e:
+        print(f"❌ Error de autenticación OCI: {e}")
+        return
+
+    # Registro compartido: un cliente por (región, servicio) y una sesión HTTP por endpoint
+    # rate_limit <= 0: sin limitador (el SDK conserva su propia estrategia de reintentos)
+    limiter = None
+    if settings.getfloat('rate_limit') > 0:
+        limiter = AdaptiveRateLimiter(
+            rate=settings.getfloat('rate_limit'),
+            max_rate=settings.getfloat('rate_limit_max'),
+            max_retries=settings.getint('max_retries')
+        )
+    recorder = CallRecorder() if settings.getboolean('metrics') else None
+    details = None
+    if settings.getboolean('detail_cache'):
+        details = DetailCache(settings['detail_cache_path'], max_entries=settings.getint('detail_cache_max_entries'))
+    # En modo servicio los listados de IPs por subnet vencen con el refresco más frecuente
+    ip_ttl = None
+    if args.daemon:
+        intervals = parse_service_budgets(settings['daemon_service_minutes'])
+        ip_ttl = min([settings.getfloat('daemon_refresh_minutes'), *intervals.values()]) * 60
+    clients = ClientRegistry(
+        config, pool_sizes=connection_pool_sizes(settings),
+        limiter=limiter, recorder=recorder, details=details, ip_ttl=ip_ttl
+    )
+
+    if args.daemon:
+        run_daemon(config, clients, settings, tasks)
+        return
+
+    run_inventory(config, clients, settings, tasks, resume=args.resume)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
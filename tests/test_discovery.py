@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import unittest
+from types import SimpleNamespace
+
+from core.discovery import PAGE_SIZE, FakeSearchClient, discover
+
+def resource(resource_type, n, compartment, state='ACTIVE'):
+    return {'resourceType': resource_type, 'identifier': f"ocid1.{resource_type.lower()}.oc1..{n}",
+            'compartmentId': compartment, 'lifecycleState': state}
+
+class DiscoverTest(unittest.TestCase):
+
+    def setUp(self):
+        resources = [resource('Instance', i, f"comp-{i % 3}") for i in range(PAGE_SIZE + 5)]
+        resources += [
+            resource('Instance', 'gone', 'comp-9', state='TERMINATED'),
+            resource('DbSystem', 1, 'comp-1'),
+            resource('Bucket', 1, 'comp-2', state='DELETED'),
+        ]
+        self.client = FakeSearchClient(resources)
+
+    def test_groups_active_resources_by_compartment(self):
+        found = discover(self.client, ['compute', 'dbsystem', 'buckets']).found
+        self.assertEqual(set(found['compute']), {'comp-0', 'comp-1', 'comp-2'})
+        self.assertEqual(sum(len(ids) for ids in found['compute'].values()), PAGE_SIZE + 5)
+        self.assertEqual(found['dbsystem'], {'comp-1': ["ocid1.dbsystem.oc1..1"]})
+        # Solo recursos inactivos: el servicio se descubrió pero no tiene compartimentos
+        self.assertEqual(found['buckets'], {})
+
+    def test_one_query_per_page_and_type(self):
+        discover(self.client, ['compute', 'dbsystem'])
+        # Instance ocupa dos páginas; DbSystem una
+        self.assertEqual(self.client.calls, 3)
+
+    def test_compartments_for(self):
+        discovery = discover(self.client, ['dbsystem', 'buckets'])
+        compartments = [SimpleNamespace(id=f"comp-{i}") for i in range(4)]
+        self.assertEqual([c.id for c in discovery.compartments_for('dbsystem', compartments)], ['comp-1'])
+        self.assertEqual(discovery.compartments_for('buckets', compartments), [])
+        # Servicio sin descubrimiento (p. ej. la búsqueda falló): se recorren todos
+        self.assertEqual(discovery.compartments_for('compute', compartments), compartments)
+
+    def test_failed_search_keeps_service_undiscovered(self):
+        class Broken:
+            def search_resources(self, *args, **kwargs):
+                raise RuntimeError("sin permisos")
+        self.assertEqual(discover(Broken(), ['compute']).found, {})
+
+if __name__ == '__main__':
+    unittest.main()
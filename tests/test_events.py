@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import time
+import unittest
+
+from utils.daemon import InventoryDaemon
+from utils.events import parse_event, plan_changes
+from utils.inventory_store import InventoryStore
+
+REGION = "us-ashburn-1"
+NAMESPACE = "example_namespace"
+
+# Evento real de OCI Events (Object Storage - Delete Bucket)
+DELETE_BUCKET_EVENT = {
+    "eventType": "com.oraclecloud.objectstorage.deletebucket",
+    "cloudEventsVersion": "0.1",
+    "eventTypeVersion": "2.0",
+    "source": "ObjectStorage",
+    "eventTime": "2026-10-18T21:19:24.000Z",
+    "contentType": "application/json",
+    "data": {
+        "compartmentId": "ocid1.compartment.oc1..aaaaexample",
+        "compartmentName": "example_compartment",
+        "resourceName": "bucket-2",
+        "resourceId": f"/n/{NAMESPACE}/b/bucket-2/",
+        "availabilityDomain": "all",
+        "additionalDetails": {
+            "bucketName": "bucket-2",
+            "publicAccessType": "NoPublicAccess",
+            "namespace": NAMESPACE,
+            "eTag": "f8ffb6e9-f3ba-4c4a-8d5e-2bd1a1c5c2b7",
+        },
+    },
+    "eventID": "04fba5d2-a6a1-4d29-8b0a-9c3a5f8e1a10",
+    "extensions": {"compartmentId": "ocid1.compartment.oc1..aaaaexample"},
+}
+
+def bucket_store():
+    store = InventoryStore()
+    session = store.refresh(REGION, 'buckets')
+    for i in range(4):
+        row = {'compartment_name': 'example_compartment', 'bucket_name': f"bucket-{i}"}
+        session.record('buckets', f"{REGION}/{NAMESPACE}/bucket-{i}", f"m{i}", row)
+    session.commit()
+    return store
+
+def daemon_for(store):
+    daemon = InventoryDaemon({'tenancy': "ocid1.tenancy.oc1..example"}, clients=None,
+                             tasks=[('buckets', lambda *a, **k: None, 'Buckets')],
+                             regions=[REGION], intervals={}, store=store)
+    # Árbol de compartimentos ya listado: las bajas no consultan la API
+    daemon._compartments = (time.monotonic(), [])
+    return daemon
+
+class BucketDeleteEventTest(unittest.TestCase):
+
+    def tearDown(self):
+        if hasattr(self, 'daemon'):
+            self.daemon.stop()
+
+    def test_parse_uses_bucket_name(self):
+        event = parse_event(DELETE_BUCKET_EVENT, [REGION])
+        self.assertEqual(event.action, 'delete')
+        self.assertEqual(event.name, 'bucket-2')
+        refresh, deletes = plan_changes([event])
+        self.assertEqual(deletes, {(REGION, 'buckets'): {'bucket-2'}})
+        self.assertEqual(refresh, {})
+
+    def test_resource_id_without_details(self):
+        record = dict(DELETE_BUCKET_EVENT, data={
+            'compartmentId': "ocid1.compartment.oc1..aaaaexample",
+            'resourceId': f"/n/{NAMESPACE}/b/bucket-3",
+        })
+        self.assertEqual(parse_event(record, [REGION]).name, 'bucket-3')
+
+    def test_delete_event_removes_bucket_from_store(self):
+        store = bucket_store()
+        self.daemon = daemon_for(store)
+        self.assertEqual(self.daemon.apply_events([DELETE_BUCKET_EVENT]), 1)
+        keys = sorted(r['ocid'] for r in store.search(service='buckets'))
+        self.assertEqual(len(keys), 3)
+        self.assertNotIn(f"{REGION}/{NAMESPACE}/bucket-2", keys)
+
+if __name__ == '__main__':
+    unittest.main()
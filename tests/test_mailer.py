@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import smtplib
+import socketserver
+import threading
+import unittest
+from email import message_from_bytes
+
+from utils.mailer import SmtpSession, build_message, deliver_report
+
+class _SmtpHandler(socketserver.StreamRequestHandler):
+    """Servidor SMTP mínimo: EHLO, AUTH PLAIN, MAIL/RCPT/DATA y QUIT."""
+
+    def reply(self, line):
+        self.wfile.write(f"{line}\r\n".encode())
+
+    def handle(self):
+        server = self.server
+        with server.lock:
+            server.connections += 1
+        self.reply("220 stub ESMTP")
+        try:
+            for raw in self.rfile:
+                command = raw.decode().strip()
+                verb = command.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    self.reply("250-stub")
+                    self.reply("250 AUTH PLAIN")
+                elif verb == "AUTH":
+                    self.reply("235 ok" if server.accept_login else "535 credenciales inválidas")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    self.reply("250 ok")
+                elif verb == "DATA":
+                    self.reply("354 adelante")
+                    lines = []
+                    for data in self.rfile:
+                        if data == b".\r\n":
+                            break
+                        lines.append(data)
+                    server.messages.append(message_from_bytes(b"".join(lines)))
+                    self.reply("250 encolado")
+                elif verb == "QUIT":
+                    self.reply("221 adiós")
+                    break
+                else:
+                    self.reply("502 no implementado")
+        finally:
+            with server.lock:
+                server.closed += 1
+
+class SmtpSessionTest(unittest.TestCase):
+
+    def setUp(self):
+        self.server = socketserver.ThreadingTCPServer(("127.0.0.1", 0), _SmtpHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.connections = 0
+        self.server.closed = 0
+        self.server.messages = []
+        self.server.accept_login = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.port = self.server.server_address[1]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def session(self):
+        return SmtpSession("127.0.0.1", self.port, "usuario", "secreto", starttls=False, timeout=5)
+
+    def wait_closed(self, expected):
+        for _ in range(100):
+            with self.server.lock:
+                if self.server.closed >= expected:
+                    return
+            threading.Event().wait(0.02)
+        self.fail(f"el servidor vio {self.server.closed} conexiones cerradas, se esperaban {expected}")
+
+    def test_send_over_session(self):
+        msg = build_message("inventario@x", ["a@x"], "Inventario", "cuerpo")
+        with self.session() as session:
+            session.send(msg)
+        self.assertEqual(len(self.server.messages), 1)
+        self.assertEqual(self.server.messages[0]["Subject"], "Inventario")
+        self.wait_closed(1)
+
+    def test_deliver_report_reuses_connection(self):
+        deliver_report(self.session(), "inventario@x", [["a@x", "b@x"], ["c@y"]],
+                       "Inventario", "cuerpo", paths=[])
+        self.assertEqual([m["To"] for m in self.server.messages], ["a@x, b@x", "c@y"])
+        self.assertEqual(self.server.connections, 1)
+
+    def test_failed_login_closes_socket(self):
+        self.server.accept_login = False
+        session = self.session()
+        with self.assertRaises(smtplib.SMTPAuthenticationError):
+            session.__enter__()
+        # El socket del cliente se cierra aunque __exit__ nunca corra
+        self.assertIsNone(session.smtp.sock)
+        self.wait_closed(1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from utils.runner import _label
+
+class AsyncRuntime:
+    """
+    Motor de recolección sobre un único event loop de asyncio.
+
+    Cada unidad de trabajo (compartimento, bucket...) es una corrutina que
+    espera su turno en semáforos de asyncio por servicio y por región, sin
+    ocupar un hilo mientras espera. El SDK de OCI es síncrono, así que la
+    llamada en sí se ejecuta en un único pool compartido de `max_in_flight`
+    hilos: el número de hilos ya no crece con servicios × 10 workers, y un
+    servicio lento aprovecha los hilos que deja libres uno rápido.
+    """
+
+    def __init__(self, max_in_flight=64, service_concurrency=16, region_concurrency=None):
+        self.service_concurrency = service_concurrency
+        self.region_concurrency = region_concurrency
+        self.executor = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="sdk")
+        self.loop = asyncio.new_event_loop()
+        self._semaphores = {}
+        self._thread = threading.Thread(target=self.loop.run_forever, name="asyncio-runtime", daemon=True)
+        self._thread.start()
+
+    def runner(self, service, region=None, name=None, recorder=None):
+        """Reemplazo de CompartmentRunner para un colector: misma interfaz map(func, items)."""
+        return AsyncCompartmentRunner(self, service, region, name, recorder)
+
+    def semaphore(self, key, limit):
+        # Solo se llama desde el hilo del event loop: no necesita candado
+        if key not in self._semaphores:
+            self._semaphores[key] = asyncio.Semaphore(limit)
+        return self._semaphores[key]
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+        self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class AsyncCompartmentRunner:
+    """Unidades de un colector como corrutinas en el event loop del AsyncRuntime."""
+
+    def __init__(self, runtime, service, region=None, name=None, recorder=None):
+        self.runtime = runtime
+        self.service = service
+        self.region = region
+        self.name = name or service
+        self.recorder = recorder
+
+    def map(self, func, items):
+        """Equivalente a executor.map: devuelve los resultados en el orden de entrada."""
+        items = list(items)
+        if not items:
+            return []
+        future = asyncio.run_coroutine_threadsafe(self._gather(func, items), self.runtime.loop)
+        return future.result()
+
+    async def _gather(self, func, items):
+        # Como el runner de hilos: todas las unidades terminan antes de propagar
+        # el primer error (en orden de entrada), ninguna queda usando el pool
+        results = await asyncio.gather(*(self._unit(func, item) for item in items), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+        return results
+
+    async def _unit(self, func, item):
+        runtime = self.runtime
+        service_slot = runtime.semaphore(('service', self.region, self.service), runtime.service_concurrency)
+        region_slot = (
+            runtime.semaphore(('region', self.region), runtime.region_concurrency)
+            if runtime.region_concurrency else nullcontext()
+        )
+        async with service_slot:
+            async with region_slot:
+                return await runtime.loop.run_in_executor(runtime.executor, self._run, func, item)
+
+    def _run(self, func, item):
+        span = self.recorder.span(_label(item), 'unit', runner=self.name) if self.recorder else nullcontext()
+        with span:
+            return func(item)
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import threading
+import time
+
+class BudgetExceeded(Exception):
+    """Se agotó el tiempo del servicio o de la ejecución: lo recolectado queda como parcial."""
+
+class Deadline:
+    """Límite de tiempo (reloj monotónico); sin `expires_at` nunca vence."""
+
+    def __init__(self, expires_at=None):
+        self.expires_at = expires_at
+
+    def expired(self):
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def check(self):
+        if self.expired():
+            raise BudgetExceeded("Tiempo agotado")
+
+# Plazo de la unidad que corre en el hilo actual (lo fija BudgetedRunner)
+_unit = threading.local()
+
+def check_deadline():
+    """
+    Dentro de una unidad de un BudgetedRunner: BudgetExceeded si su plazo ya
+    venció. Lo llaman los clientes antes de cada llamada a la API, así que
+    una unidad en curso se corta en su siguiente llamada y queda pendiente.
+    """
+    deadline = getattr(_unit, 'deadline', None)
+    if deadline is not None and deadline.expired():
+        _unit.cut = True
+        raise BudgetExceeded("Tiempo agotado durante la unidad")
+
+def unit_cut():
+    """True si la unidad actual se cortó por tiempo (aunque el colector haya atrapado el error)."""
+    return getattr(_unit, 'cut', False)
+
+def parse_service_budgets(value):
+    """'buckets=120, compute=30' -> {'buckets': 120.0, 'compute': 30.0} (minutos)."""
+    budgets = {}
+    for part in value.split(','):
+        if '=' in part:
+            service, minutes = part.split('=', 1)
+            budgets[service.strip()] = float(minutes)
+    return budgets
+
+class RunBudget:
+    """
+    Límite global de la ejecución y presupuestos por servicio, ambos en
+    minutos desde el inicio (los servicios corren en paralelo). 0 = sin límite.
+    """
+
+    def __init__(self, deadline_minutes=0, service_minutes=None):
+        self.start = time.monotonic()
+        self.deadline_minutes = deadline_minutes
+        self.service_minutes = service_minutes or {}
+
+    @property
+    def enabled(self):
+        return bool(self.deadline_minutes or self.service_minutes)
+
+    def deadline(self, service):
+        limits = [m for m in (self.deadline_minutes, self.service_minutes.get(service)) if m]
+        return Deadline(self.start + min(limits) * 60 if limits else None)
+
+class UnitProgress:
+    """Unidades (compartimentos, buckets...) de un colector: total, terminadas y omitidas por tiempo."""
+
+    def __init__(self):
+        self.total = 0
+        self.done = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+
+    def add(self, count):
+        with self._lock:
+            self.total += count
+
+    def finish(self, skipped=False):
+        with self._lock:
+            if skipped:
+                self.skipped += 1
+            else:
+                self.done += 1
+
+_SKIPPED = object()
+
+class BudgetedRunner:
+    """
+    Envuelve cualquier runner (threads, async, scheduler): cuenta el avance y,
+    vencido el plazo, las unidades pendientes no se ejecutan y el colector
+    termina con BudgetExceeded. Las unidades en curso se cortan en su
+    siguiente llamada a la API (`check_deadline`) y los recorridos largos que
+    revisan `runner.deadline` en su página actual, así que el plazo se excede
+    como mucho en una llamada en curso. Una unidad cortada no se entrega ni se
+    registra en la bitácora; las ya entregadas al escritor se conservan.
+    """
+
+    def __init__(self, runner, deadline, progress):
+        self.runner = runner
+        self.deadline = deadline
+        self.progress = progress
+
+    def map(self, func, items):
+        """
+        Como runner.map; si alguna unidad se omitió o se cortó por tiempo, al
+        terminar todas lanza BudgetExceeded (ninguna queda corriendo después).
+        """
+        items = list(items)
+        self.progress.add(len(items))
+
+        def guarded(item):
+            if self.deadline.expired():
+                self.progress.finish(skipped=True)
+                return _SKIPPED
+            previous = getattr(_unit, 'deadline', None), getattr(_unit, 'cut', False)
+            _unit.deadline, _unit.cut = self.deadline, False
+            try:
+                result = func(item)
+                if _unit.cut:
+                    raise BudgetExceeded("Tiempo agotado durante la unidad")
+            except BudgetExceeded:
+                self.progress.finish(skipped=True)
+                return _SKIPPED
+            except Exception:
+                self.progress.finish()
+                raise
+            finally:
+                _unit.deadline, _unit.cut = previous
+            self.progress.finish()
+            return result
+
+        results = self.runner.map(guarded, items)
+        if any(r is _SKIPPED for r in results):
+            raise BudgetExceeded("Tiempo agotado: unidades sin procesar")
+        return results
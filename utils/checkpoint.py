@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import json
+import os
+import threading
+from datetime import datetime
+
+# Páginas de list_objects (1000 objetos c/u) entre cada cursor guardado de un bucket
+DEFAULT_CURSOR_PAGES = 20
+
+def unit_key(item):
+    """Identificador estable de una unidad: OCID del compartimento o nombre del bucket."""
+    if isinstance(item, tuple) and item:
+        return unit_key(item[0])
+    return getattr(item, 'id', None) or getattr(item, 'name', None) or str(item)
+
+class CheckpointJournal:
+    """
+    Bitácora JSONL (solo se agregan líneas) del avance de una ejecución.
+
+    Registra cada unidad terminada (servicio y región, compartimento o
+    bucket) con sus filas, los servicios completos y el cursor
+    `next_start_with` de los recorridos largos de buckets. Con `resume`, la
+    ejecución siguiente vuelve a escribir lo ya registrado y solo consulta lo
+    que faltaba; un bucket a medio recorrer continúa desde su último cursor.
+
+    Una línea incompleta al final (proceso interrumpido a mitad de escritura)
+    se ignora. Al terminar bien la ejecución la bitácora se elimina.
+    """
+
+    def __init__(self, path, resume=False, cursor_pages=DEFAULT_CURSOR_PAGES):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self.cursor_pages = cursor_pages
+        self.started = None
+        self.columns = {}     # servicio -> columnas de la pestaña
+        self.units = {}       # servicio -> {unidad: filas} pendientes de reescribir
+        self.completed = {}   # servicio -> unidades terminadas
+        self.services = set()
+        self.cursors = {}     # (servicio, bucket) -> (next_start_with, objetos, bytes)
+        self._lock = threading.Lock()
+
+        if resume and os.path.exists(path):
+            self._load()
+            print(f"↩️ Reanudando ejecución del {self.started:%d/%m/%Y %H:%M}: "
+                  f"{sum(len(u) for u in self.units.values())} unidades y {len(self.services)} servicios ya registrados")
+        elif resume:
+            print("↩️ No hay ejecución interrumpida que reanudar; se inicia desde cero.")
+
+        self._file = open(path, 'a' if self.started else 'w', encoding='utf-8')
+        if self.started is None:
+            self.started = datetime.now()
+            self._write({'t': 'run', 'started': self.started.isoformat(timespec='seconds')})
+
+    def _load(self):
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+                kind, key = record['t'], record.get('key')
+                if kind == 'run':
+                    self.started = datetime.fromisoformat(record['started'])
+                elif kind == 'unit':
+                    self.columns[key] = record['columns']
+                    self.units.setdefault(key, {})[record['unit']] = record['rows']
+                    self.completed.setdefault(key, set()).add(record['unit'])
+                    self.cursors.pop((key, record['unit']), None)
+                elif kind == 'cursor':
+                    self.cursors[(key, record['unit'])] = (record['start'], record['objects'], record['bytes'])
+                elif kind == 'service':
+                    self.columns[key] = record['columns']
+                    self.services.add(key)
+
+    def _write(self, record):
+        line = json.dumps(record, default=str)
+        with self._lock:
+            self._file.write(line + "\n")
+            self._file.flush()
+
+    def sink(self, key, sink):
+        """Sink de un colector que además registra cada unidad terminada."""
+        return CheckpointSink(self, key, sink)
+
+    def replay(self, key):
+        """(columnas, filas) de las unidades ya registradas del servicio; se liberan al entregarlas."""
+        units = self.units.pop(key, {})
+        rows = [row for unit_rows in units.values() for row in unit_rows]
+        return self.columns.get(key), rows
+
+    def service_done(self, key, columns):
+        self.services.add(key)
+        self._write({'t': 'service', 'key': key, 'columns': list(columns)})
+
+    def close(self, remove=False):
+        with self._lock:
+            self._file.close()
+        if remove and os.path.exists(self.path):
+            os.remove(self.path)
+
+class CheckpointSink:
+    """
+    Sink de `Sheet` con bitácora: `Sheet.unit` omite las unidades ya
+    registradas y registra las nuevas al terminar.
+    """
+
+    def __init__(self, journal, key, sink):
+        self.journal = journal
+        self.key = key
+        self._sink = sink
+        self._done = journal.completed.setdefault(key, set())
+
+    def __call__(self, buffer):
+        self._sink(buffer)
+
+    def done(self, item):
+        return unit_key(item) in self._done
+
+    def commit(self, item, buffer):
+        unit = unit_key(item)
+        self.journal._write({
+            't': 'unit', 'key': self.key, 'unit': unit,
+            'columns': buffer.sheet.columns, 'rows': [list(row) for row in buffer.rows()]
+        })
+        with self.journal._lock:
+            self._done.add(unit)
+
+    def cursor(self, unit):
+        """(next_start_with, objetos, bytes) guardado del recorrido de un bucket, o None."""
+        return self.journal.cursors.get((self.key, unit))
+
+    def save_cursor(self, unit, start, objects, total_bytes):
+        self.journal._write({
+            't': 'cursor', 'key': self.key, 'unit': unit,
+            'start': start, 'objects': objects, 'bytes': total_bytes
+        })
+
+    @property
+    def cursor_pages(self):
+        return self.journal.cursor_pages
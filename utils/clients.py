@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import importlib
+import threading
+from urllib.parse import urlparse
+from utils.throttle import ThrottledClient
+from utils.detail_cache import DetailCache
+
+# Servicio lógico -> (módulo del SDK, clase del cliente).
+# Los módulos se importan solo cuando se pide el cliente por primera vez.
+SERVICES = {
+    'identity': ('oci.identity', 'IdentityClient'),
+    'compute': ('oci.core', 'ComputeClient'),
+    'network': ('oci.core', 'VirtualNetworkClient'),
+    'blockstorage': ('oci.core', 'BlockstorageClient'),
+    'database': ('oci.database', 'DatabaseClient'),
+    'object_storage': ('oci.object_storage', 'ObjectStorageClient'),
+    'integration': ('oci.integration', 'IntegrationInstanceClient'),
+    'load_balancer': ('oci.load_balancer', 'LoadBalancerClient'),
+    'file_storage': ('oci.file_storage', 'FileStorageClient'),
+    'monitoring': ('oci.monitoring', 'MonitoringClient'),
+    'resource_search': ('oci.resource_search', 'ResourceSearchClient'),
+}
+
+# Endpoint (primer segmento del host) de cada servicio, según la plantilla del
+# SDK: los servicios con el mismo endpoint comparten sesión y pool de conexiones
+ENDPOINTS = {
+    'identity': 'identity',
+    'compute': 'iaas',
+    'network': 'iaas',
+    'blockstorage': 'iaas',
+    'load_balancer': 'iaas',
+    'database': 'database',
+    'object_storage': 'objectstorage',
+    'integration': 'integration',
+    'file_storage': 'filestorage',
+    'monitoring': 'telemetry',
+    'resource_search': 'query',
+}
+
+# Igual al max_workers de los ThreadPoolExecutor de cada colector en core/
+DEFAULT_POOL_SIZE = 10
+
+class ClientRegistry:
+    """
+    Registro central de clientes OCI.
+
+    - Los clientes se crean de forma perezosa por (región, servicio) y se
+      reutilizan entre todos los colectores.
+    - Los servicios que comparten endpoint (p. ej. compute, network y
+      blockstorage en iaas.<region>) comparten una sola sesión HTTP, por lo
+      que las conexiones keep-alive y los handshakes TLS se reutilizan.
+    - El pool de conexiones de cada endpoint se dimensiona de antemano con la
+      suma de los workers de los servicios que lo usan (ENDPOINTS) y se monta
+      una sola vez, con el adaptador del SDK: los clientes creados después
+      reutilizan las conexiones ya abiertas.
+    - Con un AdaptiveRateLimiter, todas las llamadas pasan por el límite de su
+      endpoint y los 429/5xx se reintentan ahí (se desactiva el retry del SDK).
+    - Con un CallRecorder, cada intento de llamada queda instrumentado.
+    - `details` es la caché de detalles (imágenes, volúmenes...) que comparten
+      todos los colectores; por defecto solo vive en memoria.
+    - `ip_ttl` (segundos) vence los listados de IPs por subnet; sin él duran
+      toda la ejecución (en modo servicio se vuelven a listar).
+    """
+
+    def __init__(self, config, pool_sizes=None, default_pool_size=DEFAULT_POOL_SIZE, limiter=None, recorder=None,
+                 details=None, ip_ttl=None):
+        self.config = config
+        self.ip_ttl = ip_ttl
+        self.limiter = limiter
+        self.recorder = recorder
+        self.details = details or DetailCache()
+        self.pool_sizes = pool_sizes or {}
+        self.default_pool_size = default_pool_size
+        self._clients = {}
+        self._resolvers = {}
+        self._sessions = {}   # (region, endpoint) -> session
+        self._lock = threading.Lock()
+
+    def get(self, service, region=None):
+        """Devuelve el cliente del servicio para la región (por defecto la del config)."""
+        region = region or self.config.get('region')
+        key = (region, service)
+        with self._lock:
+            if key not in self._clients:
+                self._clients[key] = self._create(service, region)
+            return self._clients[key]
+
+    def ip_resolver(self, region=None):
+        """Índice de IPs privadas de la región, compartido por todos los colectores."""
+        from utils.ip_resolver import PrivateIpResolver
+        region = region or self.config.get('region')
+        network_client = self.get('network', region)
+        with self._lock:
+            if region not in self._resolvers:
+                self._resolvers[region] = PrivateIpResolver(network_client, self.details, ttl=self.ip_ttl)
+            return self._resolvers[region]
+
+    def for_region(self, region):
+        """Vista del registro fijada a una región, con la misma interfaz get(service)."""
+        return RegionClients(self, region)
+
+    def _create(self, service, region):
+        if service not in SERVICES:
+            raise ValueError(f"Servicio OCI desconocido: {service}")
+        module_name, class_name = SERVICES[service]
+        client_class = getattr(importlib.import_module(module_name), class_name)
+
+        config = dict(self.config, region=region) if region else self.config
+        kwargs = {}
+        if self.limiter:
+            # Los reintentos (429/5xx, 409 transitorios, timeouts y errores de conexión)
+            # los hace el limitador, con backoff y sin duplicar los del SDK
+            from oci.retry import NoneRetryStrategy
+            kwargs['retry_strategy'] = NoneRetryStrategy()
+        client = client_class(config, **kwargs)
+        host = self._share_session(client, region, service)
+        # Siempre con proxy: además del limitador y la instrumentación corta las unidades vencidas
+        return ThrottledClient(client, self.limiter, host, self.recorder, service, region)
+
+    def endpoint_pool_size(self, service):
+        """Conexiones del endpoint del servicio: suma de los workers de todos los servicios que lo comparten."""
+        endpoint = ENDPOINTS.get(service, service)
+        return sum(self.pool_sizes.get(name, self.default_pool_size)
+                   for name in SERVICES if ENDPOINTS.get(name, name) == endpoint)
+
+    def _share_session(self, client, region, service):
+        """Asigna al cliente la sesión HTTP de su endpoint (la primera se monta con el pool completo)."""
+        base_client = client.base_client
+        host = urlparse(base_client.endpoint).netloc
+        # Por endpoint y no por host literal: el SDK deja la plantilla {dualStack?...}
+        # sin resolver en unos clientes (compute) y no en otros (load_balancer)
+        key = (region, ENDPOINTS.get(service, host))
+        session = self._sessions.get(key)
+        if session is None:
+            session = self._sessions[key] = base_client.session
+            _mount_pool(session, self.endpoint_pool_size(service))
+        base_client.session = session
+        return host
+
+class RegionClients:
+    """Clientes de una sola región; es lo que recibe cada colector en modo multi-región."""
+
+    def __init__(self, registry, region):
+        self.registry = registry
+        self.region = region
+        self.recorder = registry.recorder
+        self.details = registry.details
+
+    def get(self, service, region=None):
+        return self.registry.get(service, region or self.region)
+
+    def ip_resolver(self, region=None):
+        return self.registry.ip_resolver(region or self.region)
+
+    def for_region(self, region):
+        return self.registry.for_region(region)
+
+def _mount_pool(session, pool_size):
+    """Vuelve a montar el adaptador HTTPS de la sesión (el OCIHTTPAdapter del SDK) con pool_maxsize."""
+    adapter_class = type(session.get_adapter("https://"))
+    session.mount("https://", adapter_class(pool_connections=1, pool_maxsize=pool_size))
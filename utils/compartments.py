@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import json
+import os
+import time
+
+def list_compartments(identity_client, tenancy_id):
+    """Compartimentos activos del tenancy (todo el árbol) más el compartimento raíz."""
+    import oci
+    compartments = oci.pagination.list_call_get_all_results(
+        identity_client.list_compartments,
+        compartment_id=tenancy_id,
+        compartment_id_in_subtree=True,
+        lifecycle_state="ACTIVE"
+    ).data
+    compartments.append(oci.identity.models.Compartment(id=tenancy_id, name="root"))
+    return compartments
+
+class CompartmentCache:
+    """
+    Árbol de compartimentos en disco (JSON) con TTL y caché negativa por servicio.
+
+    - El árbol se reutiliza mientras tenga menos de `ttl_hours`; después se
+      vuelve a listar con list_compartments.
+    - Por cada (región, servicio) se guarda cuántas ejecuciones seguidas un
+      compartimento vino vacío. Tras `skip_after` ejecuciones vacías deja de
+      visitarse en cada corrida y solo se revisa cada `recheck_hours`
+      (o antes, si una búsqueda en bloque confirma que ya tiene recursos).
+    """
+
+    def __init__(self, path, ttl_hours=24, skip_after=3, recheck_hours=168):
+        self.cache_path = path
+        self.ttl = ttl_hours * 3600
+        self.skip_after = skip_after
+        self.recheck = recheck_hours * 3600
+        self.tree = None
+        self.empty = {}
+        if os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    data = json.load(f)
+                self.tree = data.get('tree')
+                self.empty = data.get('empty', {})
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Caché de compartimentos ilegible ({e}); se reconstruye.")
+
+    def compartments(self, identity_client, tenancy_id):
+        """Lista de compartimentos (objetos Compartment del SDK), desde caché si está vigente."""
+        tree = self.tree
+        if tree and tree.get('tenancy') == tenancy_id and time.time() - tree.get('fetched_at', 0) < self.ttl:
+            age = int((time.time() - tree['fetched_at']) / 60)
+            print(f"🗃️ Árbol de compartimentos desde caché ({len(tree['compartments'])}, {age} min)")
+            import oci
+            compartments = [
+                oci.identity.models.Compartment(
+                    id=c['id'], name=c['name'], compartment_id=c['parent'], lifecycle_state=c['state']
+                )
+                for c in tree['compartments']
+            ]
+        else:
+            compartments = list_compartments(identity_client, tenancy_id)
+            self.tree = {
+                'tenancy': tenancy_id,
+                'fetched_at': time.time(),
+                'compartments': [
+                    {'id': c.id, 'name': c.name, 'parent': c.compartment_id, 'state': c.lifecycle_state}
+                    for c in compartments
+                ],
+            }
+            # Compartimentos que ya no existen salen de la caché negativa
+            ids = {c.id for c in compartments}
+            for key, entries in self.empty.items():
+                self.empty[key] = {cid: e for cid, e in entries.items() if cid in ids}
+        return compartments
+
+    def select(self, key, compartments):
+        """Separa los compartimentos a visitar de los omitidos por estar vacíos recientemente."""
+        entries = self.empty.get(key, {})
+        now = time.time()
+        visit, skipped = [], []
+        for c in compartments:
+            entry = entries.get(c.id)
+            if entry and entry['streak'] >= self.skip_after and now - entry['checked'] < self.recheck:
+                skipped.append(c)
+            else:
+                visit.append(c)
+        return visit, skipped
+
+    def confirm(self, key, compartment_ids):
+        """Una búsqueda en bloque encontró recursos: se vuelven a visitar en esta ejecución."""
+        entries = self.empty.get(key, {})
+        for cid in compartment_ids:
+            entries.pop(cid, None)
+
+    def update(self, key, visited, names_with_rows):
+        """
+        Actualiza la racha de vacíos con lo recolectado. Se compara por nombre
+        (las filas solo traen compartment_name): ante nombres repetidos un
+        compartimento se considera con recursos, que es el caso conservador.
+        """
+        entries = self.empty.setdefault(key, {})
+        now = time.time()
+        for c in visited:
+            if c.name in names_with_rows:
+                entries.pop(c.id, None)
+            else:
+                entry = entries.setdefault(c.id, {'streak': 0, 'checked': now})
+                entry['streak'] += 1
+                entry['checked'] = now
+
+    def save(self):
+        directory = os.path.dirname(self.cache_path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'tree': self.tree, 'empty': self.empty}, f)
+        os.replace(tmp_path, self.cache_path)
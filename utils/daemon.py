@@ -0,0 +1,283 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from utils.budget import BudgetExceeded
+from utils.compartments import list_compartments
+from utils.events import StubEventFeed, parse_event, plan_changes
+from utils.inventory_store import InventoryStore
+from utils.report_writer import ReportWriter
+from utils.runner import CompartmentRunner, region_budget
+
+class InventoryDaemon:
+    """
+    Modo servicio: los mismos colectores de core/ refrescan cada servicio en
+    su propio intervalo y alimentan un InventoryStore en memoria. Los clientes
+    (y sus sesiones HTTP), las cachés de detalles y el índice de IPs quedan
+    calientes entre refrescos; el reporte Excel/CSV es una exportación del
+    store, no un recorrido completo del tenancy.
+
+    Entre refrescos completos, los eventos de OCI Events / Audit (de `feeds` o
+    de POST /events) actualizan solo los compartimentos y recursos afectados.
+    """
+
+    def __init__(self, config, clients, tasks, regions, intervals, default_minutes=60,
+                 region_concurrency=30, reports_dir="reports", store=None, feeds=None,
+                 events_poll_seconds=30):
+        self.config = config
+        self.clients = clients
+        self.tasks = tasks
+        self.regions = regions
+        self.intervals = {service: intervals.get(service, default_minutes) for service, _, _ in tasks}
+        self.reports_dir = reports_dir
+        self.store = store or InventoryStore()
+        self.budgets = {region: region_budget(region_concurrency) for region in regions}
+        self._due = {service: 0.0 for service, _, _ in tasks}
+        self._running = set()
+        self._compartments = (0.0, None)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._executor = ThreadPoolExecutor(max_workers=len(tasks) * len(regions), thread_name_prefix="refresco")
+        # Las actualizaciones por eventos no esperan detrás de los refrescos completos largos
+        self._updates = ThreadPoolExecutor(max_workers=max(4, len(regions)), thread_name_prefix="eventos")
+        self.events = StubEventFeed()
+        self.feeds = [self.events, *(feeds or [])]
+        self.events_poll_seconds = events_poll_seconds
+
+    def compartments(self, force=False):
+        """Árbol de compartimentos, vuelto a listar como máximo con el intervalo más corto."""
+        with self._lock:
+            listed_at, compartments = self._compartments
+            if force or compartments is None or time.monotonic() - listed_at > min(self.intervals.values()) * 60:
+                compartments = list_compartments(self.clients.get('identity'), self.config["tenancy"])
+                self._compartments = (time.monotonic(), compartments)
+            return compartments
+
+    def refresh(self, region, service, func, compartments=None):
+        """
+        Refresco completo de (región, servicio), o solo de `compartments`: en
+        ese caso los recursos vistos se agregan/actualizan y el resto del
+        servicio queda como estaba.
+        """
+        start = time.monotonic()
+        session = self.store.refresh(region, service)
+        try:
+            df = func(
+                self.config, compartments or self.compartments(),
+                clients=self.clients.for_region(region),
+                runner=CompartmentRunner(budget=self.budgets[region], name=f"{region}/{service}"),
+                snapshot=session,
+                sink=lambda buffer: None
+            )
+            failed = df.attrs.get('failed_units', 0) if df is not None else 0
+            if failed:
+                # Compartimentos con error: lo ya guardado de ellos no se da de baja
+                session.commit(complete=False)
+                print(f"⚠️ {service} ({region}): {failed} unidades con error, refresco parcial")
+            elif compartments:
+                state = self.store.refreshed.get((region, service), {})
+                session.commit(complete=False, status=state.get('status', 'parcial'))
+                print(f"⚡ {service} ({region}): {len(session.records)} recursos actualizados en "
+                      f"{len(compartments)} compartimentos ({time.monotonic() - start:.1f} s)")
+            else:
+                session.commit(complete=True)
+                print(f"🔁 {service} ({region}): {len(session.records)} recursos en {time.monotonic() - start:.1f} s")
+        except BudgetExceeded:
+            session.commit(complete=False)
+        except Exception as e:
+            session.commit(complete=False)
+            print(f"⚠️ Error refrescando {service} ({region}): {e}")
+        finally:
+            if not compartments:
+                with self._lock:
+                    self._running.discard((region, service))
+
+    def apply_events(self, records):
+        """
+        Actualización incremental: las bajas se aplican directo en el store y
+        las altas/cambios vuelven a pasar por el colector del servicio solo los
+        compartimentos afectados. Devuelve cuántos eventos del inventario se aplicaron.
+        """
+        events = [e for e in (parse_event(r, self.regions) for r in records) if e]
+        if not events:
+            return 0
+        refresh, deletes = plan_changes(events)
+        funcs = {service: func for service, func, _ in self.tasks}
+        by_id = {c.id: c for c in self.compartments()}
+        if any(cid not in by_id for ids in refresh.values() for cid in ids):
+            # Compartimento creado después del último listado
+            by_id = {c.id: c for c in self.compartments(force=True)}
+
+        futures = []
+        for (region, service), ids in refresh.items():
+            compartments = [by_id[cid] for cid in ids if cid in by_id]
+            if service in funcs and compartments:
+                futures.append(self._updates.submit(self.refresh, region, service, funcs[service], compartments))
+        for future in futures:
+            future.result()
+
+        # Las bajas van al final: un listado puede traer aún el recurso en TERMINATING
+        removed = 0
+        for (region, service), resources in deletes.items():
+            if service == 'buckets':
+                # Clave región/namespace/nombre: el evento trae el nombre del bucket
+                removed += self.store.remove(region, service, lambda key: key.rsplit('/', 1)[-1] in resources)
+            else:
+                removed += self.store.remove(region, service, lambda ocid: ocid in resources)
+        print(f"📨 {len(events)} eventos: {sum(len(ids) for ids in refresh.values())} compartimentos "
+              f"actualizados, {removed} recursos dados de baja")
+        return len(events)
+
+    def poll_events(self):
+        records = []
+        for feed in self.feeds:
+            try:
+                records.extend(feed.poll())
+            except Exception as e:
+                print(f"⚠️ Error leyendo eventos: {e}")
+        if records:
+            try:
+                self.apply_events(records)
+            except Exception as e:
+                print(f"⚠️ Error aplicando eventos: {e}")
+
+    def push_events(self, records):
+        """Encola eventos recibidos por la API y despierta el ciclo."""
+        self.events.push(records)
+        self._wake.set()
+
+    def trigger(self, service=None):
+        """Adelanta el refresco de un servicio (o de todos)."""
+        with self._lock:
+            for name in self._due:
+                if service in (None, name):
+                    self._due[name] = 0.0
+        self._wake.set()
+        return service is None or service in self._due
+
+    def run_forever(self):
+        print(f"🛰️ Modo servicio: {len(self.tasks)} servicios en {len(self.regions)} regiones "
+              f"(intervalos en minutos: {self.intervals})")
+        while not self._stop.is_set():
+            now = time.monotonic()
+            with self._lock:
+                for service, func, _ in self.tasks:
+                    if self._due[service] > now:
+                        continue
+                    self._due[service] = now + self.intervals[service] * 60
+                    for region in self.regions:
+                        if (region, service) not in self._running:
+                            self._running.add((region, service))
+                            self._executor.submit(self.refresh, region, service, func)
+                wait = max(0.0, min(self._due.values()) - time.monotonic())
+            self._wake.wait(timeout=min(wait, self.events_poll_seconds) if self.events_poll_seconds else wait)
+            self._wake.clear()
+            self.poll_events()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+        self._executor.shutdown(wait=True)
+        self._updates.shutdown(wait=True)
+
+    def export(self, formats=("xlsx",)):
+        """Reporte del contenido actual del store en los formatos pedidos; devuelve las rutas."""
+        if not os.path.exists(self.reports_dir):
+            os.makedirs(self.reports_dir)
+        base_path = os.path.join(self.reports_dir, f"inventario_oci_{datetime.now():%Y-%m-%d_%H%M%S}")
+        writer = ReportWriter(base_path, list(formats))
+        self.store.export(writer, [(service, sheet) for service, _, sheet in self.tasks])
+        return writer.close()
+
+def make_api_server(daemon, host="127.0.0.1", port=8765):
+    """
+    API HTTP/JSON local sobre el store del daemon:
+
+      GET  /health                      estado de cada servicio y región
+      GET  /lookup?q=<ocid|ip|nombre>   coincidencia exacta en los índices
+      GET  /resources?service=&region=&compartment=&name=&ip=&limit=
+      GET  /resources/<ocid>
+      POST /refresh?service=<servicio>  adelanta el refresco (todos si se omite)
+      POST /export?formats=xlsx,csv     genera el reporte desde memoria
+      POST /events                      eventos de OCI Events / Audit (JSON o JSONL)
+    """
+    store = daemon.store
+
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False, default=str).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _route(self):
+            url = urlparse(self.path)
+            params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+            return url.path.rstrip('/') or '/', params
+
+        def do_GET(self):
+            path, params = self._route()
+            if path == '/health':
+                return self._reply(200, store.status())
+            if path == '/lookup':
+                if not params.get('q'):
+                    return self._reply(400, {'error': "Falta el parámetro q"})
+                return self._reply(200, store.lookup(params['q']))
+            if path == '/resources':
+                try:
+                    limit = int(params.pop('limit', 500))
+                except ValueError:
+                    return self._reply(400, {'error': "El parámetro limit debe ser un entero"})
+                filters = {k: params.get(k) for k in ('service', 'region', 'compartment', 'name', 'ip')}
+                return self._reply(200, store.search(limit=limit, **filters))
+            if path.startswith('/resources/'):
+                resource = store.get(path.split('/', 2)[2])
+                return self._reply(200, resource) if resource else self._reply(404, {'error': "OCID no encontrado"})
+            return self._reply(404, {'error': f"Ruta desconocida: {path}"})
+
+        def do_POST(self):
+            path, params = self._route()
+            if path == '/refresh':
+                if not daemon.trigger(params.get('service')):
+                    return self._reply(404, {'error': f"Servicio desconocido: {params['service']}"})
+                return self._reply(202, {'refresh': params.get('service', 'all')})
+            if path == '/events':
+                body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+                try:
+                    try:
+                        records = json.loads(body)
+                    except ValueError:
+                        records = [json.loads(line) for line in body.splitlines() if line.strip()]
+                except ValueError as e:
+                    return self._reply(400, {'error': f"JSON inválido: {e}"})
+                records = records if isinstance(records, list) else [records]
+                daemon.push_events(records)
+                return self._reply(202, {'queued': len(records)})
+            if path == '/export':
+                formats = [f.strip() for f in params.get('formats', 'xlsx').split(',') if f.strip()]
+                try:
+                    return self._reply(200, {'paths': daemon.export(formats)})
+                except ValueError as e:
+                    return self._reply(400, {'error': str(e)})
+            return self._reply(404, {'error': f"Ruta desconocida: {path}"})
+
+        def log_message(self, format, *args):
+            # Sin una línea de log por consulta
+            pass
+
+    return ThreadingHTTPServer((host, port), Handler)
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from utils.budget import BudgetExceeded
+
+# Vigencia en segundos por tipo de detalle. Las imágenes de plataforma no
+# cambian; tamaños de volúmenes y datos de red sí pueden cambiar.
+DEFAULT_TTLS = {
+    'image': 30 * 24 * 3600,
+    'volume': 6 * 3600,
+    'boot_volume': 6 * 3600,
+    'vnic': 3600,
+    'private_ip': 3600,
+    'subnet': 3600,
+}
+
+_NO_FALLBACK = object()
+
+class _InFlight:
+    __slots__ = ('done', 'value', 'error')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+class DetailCache:
+    """
+    Caché de detalles de recursos (get_image, get_volume, ...) compartida por
+    todos los colectores y persistida en disco entre ejecuciones.
+
+    - Thread-safe; si varios hilos piden el mismo OCID a la vez solo uno hace
+      la llamada y el resto espera su resultado (single-flight).
+    - Vigencia por tipo (`ttls`) y expulsión LRU al superar `max_entries`.
+    - Los valores deben ser serializables en JSON (tuplas, números, textos).
+    """
+
+    def __init__(self, path=None, max_entries=50000, ttls=None):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttls = dict(DEFAULT_TTLS, **(ttls or {}))
+        self._entries = OrderedDict()   # (tipo, ocid) -> (expira, valor)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    now = time.time()
+                    for kind, ocid, expires, value in json.load(f):
+                        if expires > now:
+                            self._entries[(kind, ocid)] = (expires, value)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Caché de detalles ilegible ({e}); se reconstruye.")
+
+    def get(self, kind, ocid, fetch, fallback=_NO_FALLBACK, fallback_ttl=3600):
+        """
+        Valor de (tipo, OCID); en un fallo de caché llama a `fetch()` una sola
+        vez y lo guarda. Si `fetch()` lanza una excepción y hay `fallback`, se
+        devuelve y se guarda solo `fallback_ttl` segundos (p. ej. imágenes
+        eliminadas o sin permisos), para no repetir la llamada en cada recurso.
+        """
+        key = (kind, ocid)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            call = self._inflight.get(key)
+            owner = call is None
+            if owner:
+                call = self._inflight[key] = _InFlight()
+                self.misses += 1
+
+        if not owner:
+            call.done.wait()
+            if isinstance(call.error, BudgetExceeded):
+                # Se cortó la unidad de otro hilo, no esta: se vuelve a consultar
+                return self.get(kind, ocid, fetch, fallback, fallback_ttl)
+            if call.error:
+                raise call.error
+            return call.value
+
+        try:
+            call.value = fetch()
+        except Exception as e:
+            # Un corte por tiempo no es un recurso inaccesible: no se guarda el fallback
+            if fallback is _NO_FALLBACK or isinstance(e, BudgetExceeded):
+                call.error = e
+                raise
+            call.value = fallback
+            self.put(kind, ocid, fallback, ttl=fallback_ttl)
+        else:
+            self.put(kind, ocid, call.value)
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+        return call.value
+
+    def put(self, kind, ocid, value, ttl=None):
+        key = (kind, ocid)
+        with self._lock:
+            self._entries[key] = (time.time() + (ttl or self.ttls.get(kind, 3600)), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def save(self):
+        """Escribe en disco las entradas vigentes (temporal + renombrado)."""
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        now = time.time()
+        with self._lock:
+            rows = [[kind, ocid, expires, value]
+                    for (kind, ocid), (expires, value) in self._entries.items() if expires > now]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f)
+        os.replace(tmp_path, self.path)
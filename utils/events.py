@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+
+# Segmento del eventType (OCI Events / Audit) -> servicio del inventario
+EVENT_SERVICES = {
+    'computeapi': 'compute',
+    'databaseservice': 'dbsystem',
+    'database': 'dbsystem',
+    'objectstorage': 'buckets',
+    'loadbalancer': 'load_balancers',
+    'loadbalancerapi': 'load_balancers',
+    'integration': 'oic_instances',
+    'filestorage': 'file_storage',
+}
+
+# Tipo de OCID del recurso principal de cada servicio: solo su baja lo elimina
+# del inventario (la baja de un VNIC o un volumen solo actualiza la instancia)
+RESOURCE_TYPES = {
+    'compute': 'instance',
+    'dbsystem': 'dbsystem',
+    'load_balancers': 'loadbalancer',
+    'oic_instances': 'integrationinstance',
+    'file_storage': 'filesystem',
+}
+
+DELETE_WORDS = ('terminate', 'delete')
+
+ChangeEvent = namedtuple('ChangeEvent', 'time region service action resource_id name compartment_id')
+
+def _region_of(resource_id, regions):
+    """Región a partir del OCID (ocid1.<tipo>.<realm>.<región>.<id>), con nombre o clave corta."""
+    parts = (resource_id or "").split('.')
+    if len(parts) < 5 or not parts[3]:
+        return None
+    region = parts[3]
+    if region in regions:
+        return region
+    try:
+        import oci
+        region = oci.regions.REGIONS_SHORT_NAMES.get(region.lower(), region)
+    except (ImportError, AttributeError):
+        pass
+    return region if region in regions else None
+
+def _bucket_name(data):
+    """Nombre del bucket del evento: additionalDetails, resourceId /n/<ns>/b/<nombre>[/o/...] o resourceName."""
+    name = (data.get('additionalDetails') or {}).get('bucketName')
+    if name:
+        return name
+    parts = str(data.get('resourceId') or "").split('/')
+    if len(parts) > 4 and parts[1] == 'n' and parts[3] == 'b':
+        return parts[4]
+    return data.get('resourceName')
+
+def parse_event(record, regions):
+    """
+    Normaliza un registro de OCI Events o de Audit a ChangeEvent; None si no
+    corresponde a un servicio del inventario o no se puede ubicar.
+    """
+    event_type = str(record.get('eventType', '')).lower()
+    parts = event_type.split('.')
+    if len(parts) < 4 or parts[1] != 'oraclecloud':
+        return None
+    service = EVENT_SERVICES.get(parts[2])
+    if not service:
+        return None
+    data = record.get('data') or {}
+    resource_id = data.get('resourceId')
+    # Los buckets se identifican por nombre en el inventario (región/namespace/nombre)
+    name = _bucket_name(data) if service == 'buckets' else data.get('resourceName')
+    compartment_id = data.get('compartmentId')
+
+    region = record.get('region') or data.get('region') or _region_of(resource_id, regions)
+    if not region and len(regions) == 1:
+        region = regions[0]
+    if region not in regions:
+        return None
+
+    operation = ".".join(parts[3:])
+    action = 'update'
+    if any(word in operation for word in DELETE_WORDS):
+        if service == 'buckets':
+            action = 'delete' if 'bucket' in operation else 'update'
+        else:
+            kind = RESOURCE_TYPES.get(service)
+            action = 'delete' if resource_id and resource_id.split('.')[1:2] == [kind] else 'update'
+    elif 'launch' in operation or 'create' in operation:
+        action = 'create'
+    return ChangeEvent(record.get('eventTime', ''), region, service, action, resource_id, name, compartment_id)
+
+def plan_changes(events):
+    """
+    Agrupa los eventos: el último evento de cada recurso decide. Devuelve
+    ({(región, servicio): {compartment_id}} a refrescar, {(región, servicio): {recurso}} a eliminar);
+    el recurso es el OCID, o el nombre en el caso de los buckets.
+    """
+    final = {}
+    for event in sorted(events, key=lambda e: e.time or ""):
+        resource = event.name if event.service == 'buckets' else event.resource_id or event.name
+        final[(event.region, event.service, resource)] = event
+    refresh, deletes = {}, {}
+    for (region, service, resource), event in final.items():
+        if event.action == 'delete':
+            deletes.setdefault((region, service), set()).add(resource)
+        elif event.compartment_id:
+            refresh.setdefault((region, service), set()).add(event.compartment_id)
+    return refresh, deletes
+
+class EventFileFeed:
+    """
+    Eventos desde un archivo local JSONL (un evento por línea), p. ej. lo
+    que escribe una función o un conector que recibe OCI Events / Audit.
+    Se lee de forma incremental desde el último offset; si el archivo se
+    trunca o rota, vuelve a empezar.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+
+    def poll(self):
+        if not os.path.exists(self.path):
+            return []
+        if os.path.getsize(self.path) < self.offset:
+            self.offset = 0
+        records = []
+        with open(self.path, encoding='utf-8') as f:
+            f.seek(self.offset)
+            while True:
+                line = f.readline()
+                if not line.endswith("\n"):
+                    break  # línea incompleta: se lee en el siguiente sondeo
+                self.offset = f.tell()
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    if line.strip():
+                        print(f"⚠️ Evento ilegible en {self.path}: {line[:80]}")
+        return records
+
+class StubEventFeed:
+    """Cola en memoria de eventos (p. ej. los recibidos por POST /events de la API)."""
+
+    def __init__(self):
+        self._records = []
+        self._lock = threading.Lock()
+
+    def push(self, records):
+        with self._lock:
+            self._records.extend(records)
+
+    def poll(self):
+        with self._lock:
+            records, self._records = self._records, []
+        return records
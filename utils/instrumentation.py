@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+QUANTILES = (0.5, 0.95, 0.99)
+
+def _compartment_of(args, kwargs):
+    """compartment_id de la llamada (por nombre o como OCID posicional, p. ej. list_buckets)."""
+    if kwargs.get('compartment_id'):
+        return kwargs['compartment_id']
+    for value in args:
+        if isinstance(value, str) and value.startswith(("ocid1.compartment.", "ocid1.tenancy.")):
+            return value
+    return None
+
+def percentile(sorted_values, q):
+    """Percentil por rango más cercano sobre una lista ya ordenada."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+class CallRecorder:
+    """
+    Registro de cada intento de llamada al SDK y de los tramos de trabajo
+    (servicio, compartimento) para exportar métricas y la línea de tiempo.
+
+    Cada llamada guarda: servicio, método, región, compartimento, hilo,
+    latencia, estado HTTP, número de intento y si es una página de continuación.
+    """
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.wall_start = time.time()
+        self.calls = []
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def observer(self, service, method, region, args, kwargs):
+        """Callback para AdaptiveRateLimiter.call_observed / call_once."""
+        compartment = _compartment_of(args, kwargs)
+        continuation = bool(kwargs.get('page') or kwargs.get('start'))
+
+        def observe(attempt, status, start, end):
+            thread = threading.current_thread()
+            event = {
+                'service': service, 'method': method, 'region': region, 'compartment': compartment,
+                'thread': thread.name, 'tid': thread.ident, 'start': start - self.t0,
+                'latency': end - start, 'status': status, 'attempt': attempt, 'continuation': continuation,
+            }
+            with self._lock:
+                self.calls.append(event)
+        return observe
+
+    @contextmanager
+    def span(self, name, category, **args):
+        """Tramo de trabajo (colector completo o unidad por compartimento) para la línea de tiempo."""
+        thread = threading.current_thread()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            end = time.perf_counter()
+            with self._lock:
+                self.spans.append({
+                    'name': name, 'cat': category, 'thread': thread.name, 'tid': thread.ident,
+                    'start': start - self.t0, 'duration': end - start, 'args': args,
+                })
+
+    def summary(self):
+        """Métricas por servicio: llamadas, páginas, reintentos, errores y p50/p95/p99."""
+        with self._lock:
+            calls = list(self.calls)
+        services = {}
+        for c in calls:
+            s = services.setdefault(c['service'], {
+                'calls': 0, 'pages': 0, 'retries': 0, 'errors': 0, 'status': {}, 'methods': {},
+                'compartments': set(), 'latencies': [],
+            })
+            s['calls'] += 1
+            s['pages'] += 1 if c['continuation'] else 0
+            s['retries'] += 1 if c['attempt'] > 0 else 0
+            s['errors'] += 0 if c['status'] == 200 else 1
+            s['status'][str(c['status'])] = s['status'].get(str(c['status']), 0) + 1
+            s['methods'][c['method']] = s['methods'].get(c['method'], 0) + 1
+            if c['compartment']:
+                s['compartments'].add(c['compartment'])
+            s['latencies'].append(c['latency'])
+
+        result = {}
+        for name, s in sorted(services.items()):
+            latencies = sorted(s.pop('latencies'))
+            s['compartments'] = len(s['compartments'])
+            s['latency_total_s'] = round(sum(latencies), 4)
+            for q in QUANTILES:
+                s[f"p{int(q * 100)}_s"] = round(percentile(latencies, q), 4)
+            result[name] = s
+        return {
+            'run_started': self.wall_start,
+            'run_duration_s': round(time.perf_counter() - self.t0, 3),
+            'total_calls': len(calls),
+            'services': result,
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.summary(), f, indent=2)
+        return path
+
+    def write_prometheus(self, path):
+        """Formato textfile de node_exporter (se escribe a un temporal y se renombra)."""
+        summary = self.summary()
+        lines = [
+            "# HELP oci_inventory_api_calls_total Intentos de llamada a la API de OCI por servicio y estado.",
+            "# TYPE oci_inventory_api_calls_total counter",
+        ]
+        for service, s in summary['services'].items():
+            for status, count in sorted(s['status'].items()):
+                lines.append(f'oci_inventory_api_calls_total{{service="{service}",status="{status}"}} {count}')
+        lines += [
+            "# HELP oci_inventory_api_retries_total Reintentos por servicio.",
+            "# TYPE oci_inventory_api_retries_total counter",
+        ]
+        for service, s in summary['services'].items():
+            lines.append(f'oci_inventory_api_retries_total{{service="{service}"}} {s["retries"]}')
+        lines += [
+            "# HELP oci_inventory_api_latency_seconds Latencia por intento de llamada.",
+            "# TYPE oci_inventory_api_latency_seconds summary",
+        ]
+        for service, s in summary['services'].items():
+            for q in QUANTILES:
+                lines.append(
+                    f'oci_inventory_api_latency_seconds{{service="{service}",quantile="{q}"}} {s[f"p{int(q * 100)}_s"]}'
+                )
+            lines.append(f'oci_inventory_api_latency_seconds_sum{{service="{service}"}} {s["latency_total_s"]}')
+            lines.append(f'oci_inventory_api_latency_seconds_count{{service="{service}"}} {s["calls"]}')
+        lines += [
+            "# HELP oci_inventory_run_duration_seconds Duración de la ejecución del inventario.",
+            "# TYPE oci_inventory_run_duration_seconds gauge",
+            f"oci_inventory_run_duration_seconds {summary['run_duration_s']}",
+            "# HELP oci_inventory_run_timestamp_seconds Inicio de la última ejecución.",
+            "# TYPE oci_inventory_run_timestamp_seconds gauge",
+            f"oci_inventory_run_timestamp_seconds {int(summary['run_started'])}",
+        ]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, path)
+        return path
+
+    def write_chrome_trace(self, path):
+        """Línea de tiempo en formato Chrome Trace (abrir en chrome://tracing o Perfetto)."""
+        with self._lock:
+            calls, spans = list(self.calls), list(self.spans)
+        events, threads = [], {}
+        for s in spans:
+            threads[s['tid']] = s['thread']
+            events.append({
+                'name': s['name'], 'cat': s['cat'], 'ph': 'X', 'pid': 1, 'tid': s['tid'],
+                'ts': round(s['start'] * 1e6), 'dur': round(s['duration'] * 1e6), 'args': s['args'],
+            })
+        for c in calls:
+            threads[c['tid']] = c['thread']
+            events.append({
+                'name': f"{c['service']}.{c['method']}", 'cat': 'api', 'ph': 'X', 'pid': 1, 'tid': c['tid'],
+                'ts': round(c['start'] * 1e6), 'dur': round(c['latency'] * 1e6),
+                'args': {'status': c['status'], 'attempt': c['attempt'], 'region': c['region'],
+                         'compartment': c['compartment'], 'continuation': c['continuation']},
+            })
+        for tid, name in threads.items():
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 1, 'tid': tid, 'args': {'name': name}})
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, f)
+        return path
+
+    def export(self, directory, prefix):
+        """Escribe el resumen JSON, el textfile de Prometheus y la traza; devuelve las rutas."""
+        return [
+            self.write_json(os.path.join(directory, f"{prefix}_metrics.json")),
+            self.write_prometheus(os.path.join(directory, f"{prefix}.prom")),
+            self.write_chrome_trace(os.path.join(directory, f"{prefix}_trace.json")),
+        ]
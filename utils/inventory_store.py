@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import re
+import threading
+from datetime import datetime
+
+from utils.snapshot import NAME_FIELDS
+
+IP_PATTERN = re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b')
+
+class InventoryStore:
+    """
+    Inventario en memoria indexado por OCID, nombre, IP y compartimento.
+
+    Los colectores lo alimentan con la misma interfaz del SnapshotStore
+    (`cached` / `record`) a través de `refresh(region, service)`: cada
+    refresco exitoso reemplaza los recursos de ese servicio y región, y un
+    refresco parcial o fallido solo agrega/actualiza (nada se da de baja).
+    Las bajas puntuales (eventos de terminación) usan `remove`.
+    Las consultas leen índices inmutables que se reemplazan en bloque, así que
+    no esperan a los refrescos en curso.
+    """
+
+    def __init__(self):
+        self._resources = {}      # (región, servicio, ocid) -> dict del recurso
+        self._columns = {}        # servicio -> columnas en orden de aparición
+        self._indexes = _build_indexes({})
+        self.refreshed = {}       # (región, servicio) -> {'at', 'status', 'count'}
+        self._lock = threading.RLock()
+
+    def refresh(self, region, service):
+        """Sesión de refresco: se pasa como `snapshot=` al colector y se cierra con commit()."""
+        return StoreRefresh(self, region, service)
+
+    def cached(self, region, service, ocid, marker):
+        resource = self._resources.get((region, service, ocid))
+        if resource and resource['marker'] == marker:
+            return resource['details']
+        return None
+
+    def _apply(self, region, service, records, replace, status):
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            if replace:
+                for key in [k for k, r in self._resources.items()
+                            if r['service'] == service and r['region'] == region and k[1:] not in records]:
+                    del self._resources[key]
+            columns = self._columns.setdefault(service, [])
+            for (svc, ocid), (marker, details, row) in records.items():
+                columns.extend(c for c in row if c not in columns)
+                self._resources[(region, svc, ocid)] = {
+                    'region': region, 'service': svc, 'ocid': ocid, 'marker': marker,
+                    'details': details, 'row': row, 'refreshed_at': now,
+                }
+            self._indexes = _build_indexes(self._resources)
+            count = sum(1 for r in self._resources.values() if r['service'] == service and r['region'] == region)
+            self.refreshed[(region, service)] = {'at': now, 'status': status, 'count': count}
+
+    def remove(self, region, service, match):
+        """Da de baja los recursos de (región, servicio) cuyo OCID cumple `match`; devuelve cuántos."""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            keys = [k for k, r in self._resources.items()
+                    if r['service'] == service and r['region'] == region and match(r['ocid'])]
+            for key in keys:
+                del self._resources[key]
+            if keys:
+                self._indexes = _build_indexes(self._resources)
+                count = sum(1 for r in self._resources.values() if r['service'] == service and r['region'] == region)
+                state = self.refreshed.setdefault((region, service), {'status': 'parcial'})
+                state.update(at=now, count=count)
+        return len(keys)
+
+    def get(self, ocid):
+        found = [self._resources.get(k) for k in self._indexes['ocid'].get(ocid, ())]
+        return next((_public(r) for r in found if r), None)
+
+    def lookup(self, query):
+        """Recursos cuyo OCID, IP, nombre o compartimento coincide exactamente con `query`."""
+        indexes = self._indexes
+        value = query.strip()
+        keys = []
+        for index in ('ocid', 'ip', 'name', 'compartment'):
+            keys.extend(indexes[index].get(value if index in ('ocid', 'ip') else value.lower(), ()))
+        # Un recurso puede coincidir por más de un índice; la lectura no toma el lock
+        found = [self._resources.get(k) for k in dict.fromkeys(keys)]
+        return [_public(r) for r in found if r]
+
+    def search(self, service=None, region=None, compartment=None, name=None, ip=None, limit=500):
+        """Filtro combinado; `name` y `compartment` aceptan coincidencia parcial."""
+        results = []
+        with self._lock:
+            resources = list(self._resources.values())
+        for r in resources:
+            row = r['row']
+            if service and r['service'] != service:
+                continue
+            if region and r['region'] != region:
+                continue
+            if compartment and compartment.lower() not in str(row.get('compartment_name', '')).lower():
+                continue
+            if name and name.lower() not in _name(row).lower():
+                continue
+            if ip and ip not in _ips(row):
+                continue
+            results.append(_public(r))
+            if len(results) >= limit:
+                break
+        return results
+
+    def status(self):
+        with self._lock:
+            return {
+                'resources': len(self._resources),
+                'services': {f"{region}/{service}": dict(state) for (region, service), state in self.refreshed.items()},
+            }
+
+    def export(self, writer, sheets):
+        """Escribe el inventario en un ReportWriter; `sheets` = [(servicio, pestaña)]."""
+        with self._lock:
+            resources = list(self._resources.values())
+            columns = {service: list(cols) for service, cols in self._columns.items()}
+        for service, sheet in sheets:
+            writer.open_sheet(sheet)
+            service_columns = columns.get(service, [])
+            rows = sorted(
+                (r for r in resources if r['service'] == service),
+                key=lambda r: (r['region'], str(r['row'].get('compartment_name', '')), _name(r['row']))
+            )
+            writer.write_rows(
+                sheet,
+                ([r['region'], *(r['row'].get(c) for c in service_columns)] for r in rows),
+                ['region', *service_columns] if service_columns else None
+            )
+
+class StoreRefresh:
+    """Recursos vistos en un refresco de (región, servicio); interfaz de SnapshotStore para los colectores."""
+
+    def __init__(self, store, region, service):
+        self.store = store
+        self.region = region
+        self.service = service
+        self.records = {}
+        self._lock = threading.Lock()
+
+    def cached(self, service, ocid, marker):
+        return self.store.cached(self.region, service, ocid, marker)
+
+    def record(self, service, ocid, marker, row, details=None):
+        with self._lock:
+            self.records[(service, ocid)] = (marker, details, dict(row))
+
+    def commit(self, complete=True, status=None):
+        """complete=True reemplaza el servicio en la región; False solo agrega/actualiza."""
+        self.store._apply(self.region, self.service, self.records, complete,
+                          status or ('completo' if complete else 'parcial'))
+
+def _name(row):
+    return str(next((row[f] for f in NAME_FIELDS if f in row), ""))
+
+def _ips(row):
+    return {ip for value in row.values() if isinstance(value, str) for ip in IP_PATTERN.findall(value)}
+
+def _build_indexes(resources):
+    indexes = {'ocid': {}, 'name': {}, 'ip': {}, 'compartment': {}}
+    for key, r in resources.items():
+        row = r['row']
+        indexes['ocid'].setdefault(r['ocid'], []).append(key)
+        name = _name(row)
+        if name:
+            indexes['name'].setdefault(name.lower(), []).append(key)
+        compartment = row.get('compartment_name')
+        if compartment:
+            indexes['compartment'].setdefault(str(compartment).lower(), []).append(key)
+        for ip in _ips(row):
+            indexes['ip'].setdefault(ip, []).append(key)
+    return indexes
+
+def _public(resource):
+    return {k: resource[k] for k in ('region', 'service', 'ocid', 'refreshed_at', 'row')}
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import threading
+import time
+
+from utils.budget import BudgetExceeded
+
+class PrivateIpResolver:
+    """
+    Índice OCID de IP privada -> (dirección, display_name) de una región.
+
+    En lugar de un get_private_ip por OCID, se lista cada subnet una sola vez
+    con list_private_ips y se indexan todas sus IPs. Lo comparten todos los
+    colectores de la región (compute, DB Systems...), así que una subnet
+    usada por instancias y bases de datos se lista una sola vez por ejecución.
+    Con `ttl` (segundos, modo servicio) una subnet se vuelve a listar al vencer.
+    """
+
+    def __init__(self, network_client, details=None, ttl=None):
+        self.network_client = network_client
+        self.details = details
+        self.ttl = ttl
+        self._subnets = {}     # subnet_id -> [PrivateIp]
+        self._listed = {}      # subnet_id -> momento del listado
+        self._index = {}       # private_ip_id -> PrivateIp
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def subnet_ips(self, subnet_id):
+        """IPs privadas de la subnet, listadas una sola vez aunque la pidan varios hilos."""
+        with self._lock:
+            if self._fresh(subnet_id):
+                return self._subnets[subnet_id]
+            subnet_lock = self._locks.setdefault(subnet_id, threading.Lock())
+
+        with subnet_lock:
+            with self._lock:
+                if self._fresh(subnet_id):
+                    return self._subnets[subnet_id]
+            import oci
+            try:
+                ips = oci.pagination.list_call_get_all_results(
+                    self.network_client.list_private_ips, subnet_id=subnet_id
+                ).data
+            except BudgetExceeded:
+                # Sin guardar la subnet como vacía: otra unidad la vuelve a listar
+                raise
+            except Exception as e:
+                print(f"  ⚠️ Error listando IPs de subnet {subnet_id}: {e}")
+                ips = []
+            with self._lock:
+                self._subnets[subnet_id] = ips
+                self._listed[subnet_id] = time.monotonic()
+                for ip in ips:
+                    self._index[ip.id] = ip
+            return ips
+
+    def _fresh(self, subnet_id):
+        if subnet_id not in self._subnets:
+            return False
+        return self.ttl is None or time.monotonic() - self._listed[subnet_id] < self.ttl
+
+    def prefetch(self, subnet_ids):
+        """
+        Lista en bloque las subnets aún no indexadas. Se llama dentro de la
+        unidad de cada compartimento: el paralelismo viene de las unidades y
+        una subnet compartida se lista una sola vez (ver subnet_ips).
+        """
+        for subnet_id in sorted({s for s in subnet_ids if s and not self._fresh(s)}):
+            self.subnet_ips(subnet_id)
+
+    def lookup(self, ip_id):
+        """(dirección, display_name) de la IP; si no está indexada se consulta individualmente."""
+        ip = self._index.get(ip_id)
+        if ip is not None:
+            return ip.ip_address, ip.display_name
+
+        def fetch():
+            data = self.network_client.get_private_ip(ip_id).data
+            return [data.ip_address, data.display_name]
+        try:
+            found = self.details.get('private_ip', ip_id, fetch) if self.details else fetch()
+        except Exception:
+            return None
+        return tuple(found)
+
+    def format(self, ip_ids):
+        """Texto "10.0.0.5 (nombre), ..." para columnas de reporte; "N/A" si no hay IPs."""
+        found = [self.lookup(ip_id) for ip_id in ip_ids or []]
+        ips = [f"{address} ({name})" for address, name in filter(None, found)]
+        return ", ".join(ips) if ips else "N/A"
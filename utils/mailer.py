@@ -8,26 +8,21 @@ Licencia: MIT
 import smtplib
 import mimetypes
 import os
+import shutil
+import zipfile
+from datetime import datetime, timedelta, timezone
 from email.message import EmailMessage
 from typing import List, Optional
-from cryptography.fernet import Fernet
 
-def send_email(
-    smtp_host: str,
-    smtp_port: int,
-    smtp_user: str,      # Viene encriptado del config.ini
-    smtp_password: str,  # Viene encriptado del config.ini
-    sender: str,
-    recipients: List[str],
-    subject: str,
-    body: str,
-    attachment_path: Optional[str] = None,
-) -> None:
-    """Envía un correo electrónico desencriptando las credenciales al vuelo."""
-    
-    # 1. Proceso de Desencriptación
+# Límite por defecto de OCI Email Delivery para el mensaje completo
+DEFAULT_MAX_MESSAGE_MB = 2
+# Margen para encabezados y cuerpo del mensaje
+MESSAGE_OVERHEAD = 64 * 1024
+
+def decrypt_credentials(smtp_user, smtp_password, key_path=".key"):
+    """Desencripta usuario y contraseña SMTP del config.ini con la llave local."""
+    from cryptography.fernet import Fernet
     try:
-        key_path = ".key"
         if not os.path.exists(key_path):
             raise FileNotFoundError(f"Error: No se encontró el archivo {key_path}")
 
@@ -38,42 +33,205 @@ def send_email(
         # Desencriptamos los valores que vienen del config.ini
         real_user = cipher.decrypt(smtp_user.encode()).decode()
         real_password = cipher.decrypt(smtp_password.encode()).decode()
+        return real_user, real_password
     except Exception as e:
         print(f"❌ Error crítico de seguridad: {e}")
         raise
 
-    # 2. Configuración del mensaje
+def encoded_size(raw_bytes):
+    """Tamaño de un adjunto en base64 (4/3 más saltos de línea cada 76 caracteres)."""
+    encoded = (raw_bytes + 2) // 3 * 4
+    return encoded + encoded // 76 * 2
+
+def compress_report(paths, archive_path):
+    """Comprime los archivos (o carpetas csv/parquet) del reporte en un ZIP, en streaming."""
+    with zipfile.ZipFile(archive_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        for path in paths:
+            if os.path.isdir(path):
+                for name in sorted(os.listdir(path)):
+                    zf.write(os.path.join(path, name), arcname=f"{os.path.basename(path)}/{name}")
+            elif os.path.exists(path):
+                zf.write(path, arcname=os.path.basename(path))
+    return archive_path
+
+class SmtpSession:
+    """
+    Conexión SMTP reutilizable: un solo handshake TLS y login para enviar
+    varios mensajes (p. ej. un correo por grupo de destinatarios).
+    """
+
+    def __init__(self, host, port, user=None, password=None, starttls=True, timeout=60):
+        self.host = host
+        self.port = int(port)
+        self.user = user
+        self.password = password
+        self.starttls = starttls
+        self.timeout = timeout
+        self.smtp = None
+
+    def __enter__(self):
+        # Usamos rutas explícitas para evitar errores en sesiones CRON
+        self.smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            self.smtp.ehlo()
+            if self.starttls:
+                self.smtp.starttls()  # Requerido para puerto 587
+                self.smtp.ehlo()
+            if self.user:
+                self.smtp.login(self.user, self.password)
+        except BaseException:
+            # __exit__ no corre si __enter__ falla (p. ej. contraseña incorrecta)
+            self.smtp.close()
+            raise
+        return self
+
+    def send(self, msg):
+        self.smtp.send_message(msg)
+
+    def __exit__(self, *exc):
+        try:
+            self.smtp.quit()
+        except smtplib.SMTPException:
+            self.smtp.close()
+
+class ObjectStorageOffload:
+    """Sube el reporte a un bucket y devuelve un enlace pre-autenticado (PAR) de solo lectura."""
+
+    def __init__(self, os_client, bucket, namespace=None, prefix="reportes/", par_hours=72):
+        self.client = os_client
+        self.bucket = bucket
+        self.namespace = namespace
+        self.prefix = prefix
+        self.par_hours = par_hours
+
+    def publish(self, path):
+        import oci
+        namespace = self.namespace or self.client.get_namespace().data
+        object_name = f"{self.prefix}{os.path.basename(path)}"
+        with open(path, "rb") as f:
+            # El archivo se envía por partes desde disco, sin cargarlo en memoria
+            self.client.put_object(namespace, self.bucket, object_name, f,
+                                   content_length=os.path.getsize(path))
+        expires = datetime.now(timezone.utc) + timedelta(hours=self.par_hours)
+        par = self.client.create_preauthenticated_request(
+            namespace, self.bucket,
+            oci.object_storage.models.CreatePreauthenticatedRequestDetails(
+                name=f"inventario-{datetime.now():%Y%m%d%H%M%S}",
+                object_name=object_name,
+                access_type="ObjectRead",
+                time_expires=expires
+            )
+        ).data
+        full_path = getattr(par, 'full_path', None)
+        if full_path:
+            return full_path, expires
+        endpoint = self.client.base_client.endpoint.rstrip("/")
+        return f"{endpoint}{par.access_uri}", expires
+
+class LocalOffload:
+    """Backend de prueba: copia el archivo a una carpeta local y devuelve un enlace file://."""
+
+    def __init__(self, directory, par_hours=72):
+        self.directory = directory
+        self.par_hours = par_hours
+
+    def publish(self, path):
+        os.makedirs(self.directory, exist_ok=True)
+        target = os.path.join(self.directory, os.path.basename(path))
+        shutil.copyfile(path, target)
+        expires = datetime.now(timezone.utc) + timedelta(hours=self.par_hours)
+        return f"file://{os.path.abspath(target)}", expires
+
+def prepare_delivery(paths, max_message_mb=DEFAULT_MAX_MESSAGE_MB, compress=True, offload=None):
+    """
+    Decide cómo entregar el reporte sin exceder el límite del servidor SMTP.
+
+    Devuelve (adjunto o None, texto extra para el cuerpo). Orden: adjunto
+    original, ZIP comprimido, y si aún no cabe, subida con `offload` y enlace.
+    """
+    limit = max_message_mb * 1024 * 1024 - MESSAGE_OVERHEAD
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths:
+        return None, ""
+
+    if len(paths) == 1 and os.path.isfile(paths[0]) and encoded_size(os.path.getsize(paths[0])) <= limit:
+        return paths[0], ""
+
+    candidate = paths[0]
+    if compress or len(paths) > 1 or os.path.isdir(paths[0]):
+        base = os.path.splitext(paths[0])[0] if os.path.isfile(paths[0]) else paths[0].rstrip("/")
+        candidate = compress_report(paths, f"{base}.zip")
+        size = os.path.getsize(candidate)
+        print(f"🗜️ Reporte comprimido: {candidate} ({size / 1024 ** 2:.1f} MB)")
+        if encoded_size(size) <= limit:
+            return candidate, ""
+
+    if offload is None:
+        raise ValueError(
+            f"El reporte excede el límite de {max_message_mb} MB y no hay bucket configurado para publicarlo"
+        )
+    url, expires = offload.publish(candidate)
+    print(f"☁️ Reporte publicado para descarga (enlace válido hasta {expires:%d/%m/%Y %H:%M} UTC)")
+    note = (
+        f"\n\nEl reporte supera el tamaño permitido para adjuntos. Descárguelo desde el siguiente enlace "
+        f"(válido hasta el {expires:%d/%m/%Y %H:%M} UTC):\n{url}"
+    )
+    return None, note
+
+def build_message(sender, recipients, subject, body, attachment_path=None):
+    """Arma el EmailMessage; el adjunto se lee solo aquí, ya dentro del límite de tamaño."""
     msg = EmailMessage()
     msg["From"] = sender
     msg["To"] = ", ".join(recipients)
     msg["Subject"] = subject
     msg.set_content(body)
 
-    # 3. Adjuntar el archivo Excel si existe
     if attachment_path and os.path.exists(attachment_path):
         with open(attachment_path, "rb") as f:
             file_data = f.read()
-            ctype, encoding = mimetypes.guess_type(attachment_path)
-            maintype, subtype = (ctype or "application/octet-stream").split("/", 1)
-            msg.add_attachment(
-                file_data,
-                maintype=maintype,
-                subtype=subtype,
-                filename=os.path.basename(attachment_path)
-            )
+        ctype, encoding = mimetypes.guess_type(attachment_path)
+        maintype, subtype = (ctype or "application/octet-stream").split("/", 1)
+        msg.add_attachment(
+            file_data,
+            maintype=maintype,
+            subtype=subtype,
+            filename=os.path.basename(attachment_path)
+        )
+    return msg
 
-    # 4. Conexión SMTP Segura
-    try:
-        # Usamos rutas explícitas para evitar errores en sesiones CRON
-        with smtplib.SMTP(smtp_host, int(smtp_port)) as smtp:
-            smtp.ehlo()
-            smtp.starttls()  # Requerido para puerto 587
-            smtp.ehlo()
+def deliver_report(session, sender, recipient_groups, subject, body, paths,
+                   max_message_mb=DEFAULT_MAX_MESSAGE_MB, compress=True, offload=None):
+    """Prepara el reporte una sola vez y lo envía a cada grupo de destinatarios por la misma conexión."""
+    attachment, note = prepare_delivery(paths, max_message_mb, compress, offload)
+    with session:
+        for recipients in recipient_groups:
+            session.send(build_message(sender, recipients, subject, body + note, attachment))
+            print(f"📧 Reporte enviado a: {', '.join(recipients)}")
 
-            smtp.login(real_user, real_password)
-            smtp.send_message(msg)
+def parse_recipient_groups(value):
+    """'a@x, b@x; c@y' -> [['a@x', 'b@x'], ['c@y']] (grupos separados por ';')."""
+    groups = [[r.strip() for r in group.split(",") if r.strip()] for group in value.split(";")]
+    return [g for g in groups if g]
 
+def send_email(
+    smtp_host: str,
+    smtp_port: int,
+    smtp_user: str,      # Viene encriptado del config.ini
+    smtp_password: str,  # Viene encriptado del config.ini
+    sender: str,
+    recipients: List[str],
+    subject: str,
+    body: str,
+    attachment_path: Optional[str] = None,
+) -> None:
+    """Envía un correo electrónico desencriptando las credenciales al vuelo."""
+    real_user, real_password = decrypt_credentials(smtp_user, smtp_password)
+    msg = build_message(sender, recipients, subject, body, attachment_path)
+
+    try:
+        with SmtpSession(smtp_host, smtp_port, real_user, real_password) as session:
+            session.send(msg)
         print("📧 Reporte enviado exitosamente con credenciales protegidas.")
     except Exception as e:
         print(f"❌ Error en la conexión SMTP: {e}")
-        raise
\ No newline at end of file
+        raise
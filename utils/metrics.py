@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import threading
+from datetime import datetime, timedelta, timezone
+
+class MetricsEngine:
+    """
+    Consultas agrupadas a OCI Monitoring: una llamada a summarize_metrics_data
+    por alcance (compartimento, o tenancy con compartment_id_in_subtree) en
+    lugar de una por recurso, devolviendo {resourceId: último valor}.
+
+    Los resultados se guardan en memoria por ventana de tiempo: la ventana se
+    alinea a `interval_minutes`, así que dos colectores (o dos ejecuciones en
+    el mismo proceso) que consultan el mismo alcance dentro de la misma ventana
+    reutilizan la respuesta. Consultas concurrentes a la misma clave esperan a
+    la primera en lugar de repetirla.
+    """
+
+    def __init__(self, monitoring_client, interval_minutes=5, window_minutes=60):
+        self.client = monitoring_client
+        self.interval = interval_minutes
+        self.window = window_minutes
+        self._cache = {}
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def window_bounds(self, now=None):
+        """Ventana [inicio, fin) alineada al intervalo de agregación."""
+        now = now or datetime.now(timezone.utc)
+        end = now.replace(second=0, microsecond=0)
+        end -= timedelta(minutes=end.minute % self.interval)
+        return end - timedelta(minutes=self.window), end
+
+    def latest_by_resource(self, namespace, metric, compartment_id, in_subtree=False, statistic="mean"):
+        """Último punto de `metric` para cada resourceId del alcance."""
+        start, end = self.window_bounds()
+        key = (namespace, metric, statistic, compartment_id, in_subtree, start, end)
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+            key_lock = self._locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                if key in self._cache:
+                    return self._cache[key]
+            import oci
+            query = f"{metric}[{self.interval}m].{statistic}().by(resourceId)"
+            series = self.client.summarize_metrics_data(
+                compartment_id=compartment_id,
+                compartment_id_in_subtree=in_subtree,
+                summarize_metrics_data_details=oci.monitoring.models.SummarizeMetricsDataDetails(
+                    namespace=namespace,
+                    query=query,
+                    start_time=start,
+                    end_time=end,
+                    resolution=f"{self.interval}m"
+                )
+            ).data
+            values = {}
+            for s in series or []:
+                resource_id = (s.dimensions or {}).get('resourceId')
+                if resource_id and s.aggregated_datapoints:
+                    values[resource_id] = s.aggregated_datapoints[-1].value
+            with self._lock:
+                self._cache[key] = values
+                self._locks.pop(key, None)
+                # Solo se conserva la ventana vigente
+                for old in [k for k in self._cache if k[5] != start]:
+                    del self._cache[old]
+            return values
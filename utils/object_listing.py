@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Páginas que recorre un rango antes de intentar ceder su mitad superior a un worker libre
+SPLIT_PAGES = 5
+# Sondeos (list_objects con limit=1) por intento de división
+MAX_PROBES = 16
+
+_ASCII_CEILING = chr(0x7F)
+_MAX_CEILING = chr(0x10FFFF)
+
+class _Stopped(Exception):
+    """Otro rango falló: este se detiene sin tocar su cursor."""
+
+def key_midpoint(low, high):
+    """
+    Nombre de objeto entre `low` y `high` (low < medio < high), o None si no
+    hay uno razonable. Las claves se tratan como números en base 128 (ASCII)
+    o en base Unicode; el orden de Python por código coincide con el orden
+    por bytes UTF-8 de Object Storage.
+    """
+    base = 128 if all(ord(c) < 128 for c in low + high) else 0x110000
+    width = max(len(low), len(high)) + 1
+
+    def as_int(key):
+        value = 0
+        for i in range(width):
+            value = value * base + (ord(key[i]) if i < len(key) else 0)
+        return value
+
+    middle = (as_int(low) + as_int(high)) // 2
+    digits = []
+    for _ in range(width):
+        middle, digit = divmod(middle, base)
+        digits.append(digit)
+    key = "".join(chr(d) for d in reversed(digits)).rstrip("\x00")
+    if any(0xD800 <= ord(c) <= 0xDFFF for c in key) or not low < key < high:
+        return None
+    return key
+
+def _split_bound(cursor, high):
+    """Con un cursor ASCII, el fin se recorta a su parte ASCII para calcular el medio en base 128."""
+    if cursor >= _ASCII_CEILING:
+        return high
+    for i, c in enumerate(high):
+        if ord(c) >= 0x7F:
+            return high[:i] + _ASCII_CEILING
+    return high
+
+class ShardedListing:
+    """
+    Recorrido exacto de un bucket en rangos de claves [inicio, fin) listados en
+    paralelo con list_objects(start, end).
+
+    Empieza con los rangos recibidos (uno solo, o los guardados en la bitácora)
+    y el tamaño de los rangos se adapta a cómo están distribuidas las claves:
+    cada `split_pages` páginas, si hay workers libres, un rango acota su fin
+    real, toma el punto medio entre su cursor y ese fin, lo sondea con
+    limit=1 y cede la mitad superior a partir de la primera clave encontrada. Las mitades vacías
+    se descartan acortando el rango, así que los tramos densos se siguen
+    dividiendo y los dispersos terminan en una llamada. Los conteos y tamaños
+    de todos los rangos se suman en un solo resultado.
+
+    Si un rango falla, los demás se detienen antes de su siguiente página (o
+    sondeo), los que aún no empezaron se cancelan y el error se propaga.
+    """
+
+    def __init__(self, list_page, ranges=None, workers=8, split_pages=SPLIT_PAGES,
+                 on_progress=None, progress_pages=None, deadline=None):
+        self.list_page = list_page          # (start, end, limit) -> datos de ListObjects
+        self.initial = [list(r) for r in (ranges or [[None, None]])]
+        self.workers = max(1, workers)
+        self.split_pages = split_pages
+        self.on_progress = on_progress
+        self.progress_pages = progress_pages
+        self.deadline = deadline            # Deadline: al vencer, cada rango se detiene en su página actual
+        self.objects = 0
+        self.bytes = 0
+        self.shards = 0
+        self._ranges = {}                   # id -> [cursor, fin] de los rangos pendientes
+        self._ids = itertools.count()
+        self._active = 0
+        self._pages = 0
+        self._futures = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def run(self, objects=0, total_bytes=0):
+        """Recorre todos los rangos y devuelve (objetos, bytes) sumando los totales previos."""
+        self.objects, self.bytes = objects, total_bytes
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="rangos") as pool:
+            self._pool = pool
+            with self._lock:
+                for start, end in self.initial:
+                    self._submit(start, end)
+            try:
+                while True:
+                    with self._lock:
+                        if not self._futures:
+                            break
+                        future = self._futures.pop()
+                    future.result()
+            except BaseException:
+                self._stop.set()
+                pool.shutdown(wait=True, cancel_futures=True)
+                raise
+        return self.objects, self.bytes
+
+    def _submit(self, start, end):
+        """Registra y lanza un rango; se llama con el lock tomado."""
+        shard = next(self._ids)
+        self._ranges[shard] = [start, end]
+        self._active += 1
+        self.shards += 1
+        self._futures.append(self._pool.submit(self._scan, shard))
+
+    def _scan(self, shard):
+        try:
+            pages = 0
+            while True:
+                if self._stop.is_set():
+                    return
+                if self.deadline:
+                    self.deadline.check()
+                with self._lock:
+                    start, end = self._ranges[shard]
+                res = self.list_page(start, end, 1000)
+                count = len(res.objects)
+                size = sum(obj.size or 0 for obj in res.objects)
+                pages += 1
+                with self._lock:
+                    self.objects += count
+                    self.bytes += size
+                    if res.next_start_with:
+                        self._ranges[shard][0] = res.next_start_with
+                    else:
+                        del self._ranges[shard]
+                    self._pages += 1
+                    report = self.on_progress and self.progress_pages and self._pages % self.progress_pages == 0
+                    state = self._state() if report else None
+                if state:
+                    self.on_progress(*state)
+                if not res.next_start_with:
+                    return
+                if pages % self.split_pages == 0 and self._active < self.workers:
+                    self._split(shard)
+        except _Stopped:
+            return
+        except BaseException:
+            # El bucket ya falló: el resto de los rangos no sigue listando
+            self._stop.set()
+            raise
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def _split(self, shard):
+        """Cede la mitad superior del rango a un nuevo worker; acorta el rango si esa mitad está vacía."""
+        self._tighten(shard)
+        for _ in range(MAX_PROBES):
+            with self._lock:
+                cursor, end = self._ranges[shard]
+            middle = key_midpoint(cursor, _split_bound(cursor, end or _MAX_CEILING))
+            if middle is None:
+                return
+            found = self._first_key(middle, end)
+            if found is None:
+                # Sin claves en [medio, fin): el rango termina antes
+                with self._lock:
+                    self._ranges[shard][1] = middle
+                continue
+            with self._lock:
+                # Ambos lados cambian juntos para que el progreso guardado no pierda claves
+                self._ranges[shard][1] = found
+                self._submit(found, end)
+            return
+
+    def _tighten(self, shard):
+        """
+        Acorta el fin del rango al sucesor del prefijo más largo del cursor sin
+        claves después (búsqueda binaria sobre la longitud del prefijo). Con
+        claves como 'logs/2024/...' el punto medio cae dentro de los datos y no
+        en el espacio vacío hasta el fin del rango.
+        """
+        with self._lock:
+            cursor, end = self._ranges[shard]
+
+        def after(size):
+            prefix = cursor[:size]
+            return prefix[:-1] + chr(ord(prefix[-1]) + 1) if ord(prefix[-1]) < 0x10FFFF else None
+
+        def empty(size):
+            bound = after(size)
+            return bound is None or (end is not None and bound >= end) or self._first_key(bound, end) is None
+
+        low, high = 0, len(cursor)
+        while low < high:
+            size = (low + high + 1) // 2
+            if empty(size):
+                low = size
+            else:
+                high = size - 1
+        bound = after(low) if low else None
+        if bound and (end is None or bound < end):
+            with self._lock:
+                self._ranges[shard][1] = bound
+
+    def _first_key(self, start, end):
+        if self._stop.is_set():
+            raise _Stopped()
+        found = self.list_page(start, end, 1).objects
+        return found[0].name if found else None
+
+    def _state(self):
+        """(rangos pendientes, objetos, bytes) consistentes entre sí; se llama con el lock tomado."""
+        return [list(r) for r in self._ranges.values()], self.objects, self.bytes
@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import threading
+from collections import deque
+
+# Lotes pendientes de escribir antes de que los colectores tengan que esperar
+DEFAULT_QUEUE_SIZE = 64
+
+class BatchPipeline:
+    """
+    Cola acotada entre los colectores (productores) y el escritor del reporte
+    (un único consumidor).
+
+    Cada colector recibe `sink(key)` y entrega un ColumnBuffer por unidad de
+    trabajo terminada; al finalizar, `finish(key, future)` marca su cierre.
+    Si el escritor se atrasa, el sink bloquea a los colectores: la memoria
+    queda acotada a `maxsize` lotes en vuelo. Los cierres van por un canal
+    aparte que nunca bloquea: `finish` puede correr en el mismo hilo del
+    consumidor (si el Future ya terminó al registrar el callback).
+    """
+
+    def __init__(self, maxsize=DEFAULT_QUEUE_SIZE):
+        self.maxsize = maxsize
+        self._batches = deque()
+        self._done = deque()
+        self._cond = threading.Condition()
+
+    def sink(self, key):
+        def put(buffer):
+            with self._cond:
+                while self.maxsize > 0 and len(self._batches) >= self.maxsize:
+                    self._cond.wait()
+                self._batches.append(('batch', key, buffer))
+                self._cond.notify_all()
+        return put
+
+    def finish(self, key, future):
+        """Callback de Future.add_done_callback: el colector terminó (bien o con error)."""
+        with self._cond:
+            self._done.append(('done', key, future))
+            self._cond.notify_all()
+
+    def _next(self, timeout):
+        """Siguiente evento; un cierre solo sale cuando ya no quedan lotes (los de su colector llegaron antes)."""
+        with self._cond:
+            while not self._batches and not self._done:
+                if not self._cond.wait(timeout):
+                    return None
+            if self._batches:
+                item = self._batches.popleft()
+                self._cond.notify_all()
+                return item
+            return self._done.popleft()
+
+    def events(self, producers, timeout=None):
+        """
+        Genera (tipo, clave, carga) hasta recibir el cierre de `producers`
+        colectores. Con `timeout`, si no llega nada en ese lapso se genera
+        ('idle', None, None) para que el consumidor pueda reportar avance.
+        """
+        pending = producers
+        while pending:
+            item = self._next(timeout)
+            if item is None:
+                yield 'idle', None, None
+                continue
+            kind, key, payload = item
+            if kind == 'done':
+                pending -= 1
+            yield kind, key, payload
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import threading
+from array import array
+
+from utils.budget import BudgetExceeded, unit_cut
+from utils.checkpoint import CheckpointSink
+
+class Sheet:
+    """
+    Esquema de una pestaña del reporte y constructor columnar de su DataFrame.
+
+    Cada unidad de trabajo (compartimento, bucket...) llena su propio
+    ColumnBuffer y el DataFrame se arma una sola vez concatenando columnas,
+    sin listas de diccionarios intermedias. Las columnas categóricas (nombre de
+    compartimento, estado, shape...) se guardan como códigos enteros contra un
+    diccionario compartido por todos los buffers de la pestaña y se entregan
+    como `pd.Categorical`.
+
+    Con `sink`, cada buffer se entrega a `sink(buffer)` en cuanto su unidad
+    termina (modo streaming) y el DataFrame final queda vacío. Si el sink es
+    un CheckpointSink, las unidades ya registradas en la bitácora se omiten y
+    cada unidad nueva se registra al terminar (ver `--resume`).
+
+    Una unidad que devuelve None falló: no se registra en la bitácora (queda
+    pendiente para la reanudación) y se cuenta en `failed_units`, que el
+    DataFrame final lleva en `df.attrs['failed_units']`.
+    """
+
+    def __init__(self, columns, categorical=(), sink=None):
+        self.columns = list(columns)
+        self.categorical = set(categorical)
+        self.sink = sink
+        self.checkpoint = sink if isinstance(sink, CheckpointSink) else None
+        # Filas producidas (entregadas al sink o incluidas en el DataFrame)
+        self.row_count = 0
+        self.failed_units = 0
+        self._categories = {column: {} for column in self.categorical}
+        self._lock = threading.Lock()
+
+    def buffer(self):
+        return ColumnBuffer(self)
+
+    def unit(self, func):
+        """Envuelve una unidad de trabajo: en modo streaming su buffer sale al terminar."""
+        if not self.sink:
+            return func
+        checkpoint = self.checkpoint
+
+        def streamed(item):
+            if checkpoint and checkpoint.done(item):
+                return None
+            buffer = func(item)
+            if unit_cut():
+                # Cortada por tiempo: lo parcial no se entrega y la unidad queda pendiente
+                raise BudgetExceeded("Tiempo agotado durante la unidad")
+            if buffer is None:
+                # La unidad falló: queda pendiente para la reanudación
+                self.fail()
+                return None
+            if buffer:
+                self._emit(buffer)
+            if checkpoint:
+                checkpoint.commit(item, buffer)
+            return None
+        return streamed
+
+    def fail(self):
+        """Registra una unidad fallida (p. ej. un listado previo que no se pudo hacer)."""
+        with self._lock:
+            self.failed_units += 1
+
+    def _emit(self, buffer):
+        with self._lock:
+            self.row_count += len(buffer)
+        self.sink(buffer)
+
+    def categories(self, column):
+        with self._lock:
+            return list(self._categories[column])
+
+    def code(self, column, value):
+        """Código entero del valor en la columna categórica (-1 = vacío)."""
+        if value is None:
+            return -1
+        categories = self._categories[column]
+        code = categories.get(value)
+        if code is None:
+            with self._lock:
+                code = categories.setdefault(value, len(categories))
+        return code
+
+    def frame(self, buffers):
+        """DataFrame de la pestaña a partir de los buffers, en el orden recibido."""
+        # pandas se importa al armar el primer DataFrame, no al arrancar
+        import pandas as pd
+        if not self.sink:
+            self.failed_units += sum(1 for b in buffers if b is None)
+        buffers = [b for b in buffers if b is not None]
+        if self.sink:
+            # Lo que no salió por unit() se entrega ahora; el DataFrame solo lleva columnas
+            checkpoint = self.checkpoint
+            for i, b in enumerate(buffers):
+                unit = f"frame-{i}"
+                if checkpoint and checkpoint.done(unit):
+                    continue
+                if b:
+                    self._emit(b)
+                # Con unidades fallidas estos buffers pueden estar incompletos: quedan pendientes
+                if checkpoint and not self.failed_units:
+                    checkpoint.commit(unit, b)
+            buffers = []
+        else:
+            self.row_count += sum(len(b) for b in buffers)
+        data = {}
+        for column in self.columns:
+            if column in self.categorical:
+                codes = array('i')
+                for b in buffers:
+                    codes.extend(b.data[column])
+                data[column] = pd.Categorical.from_codes(codes, categories=list(self._categories[column]))
+            else:
+                values = []
+                for b in buffers:
+                    values.extend(b.data[column])
+                data[column] = values
+        df = pd.DataFrame(data, columns=self.columns)
+        df.attrs['failed_units'] = self.failed_units
+        return df
+
+class ColumnBuffer:
+    """Filas de una unidad de trabajo guardadas por columna."""
+
+    __slots__ = ('sheet', 'data', 'length')
+
+    def __init__(self, sheet):
+        self.sheet = sheet
+        self.data = {
+            column: array('i') if column in sheet.categorical else []
+            for column in sheet.columns
+        }
+        self.length = 0
+
+    def append(self, row):
+        """Agrega una fila (dict); las columnas ausentes quedan vacías."""
+        sheet = self.sheet
+        for column in sheet.columns:
+            value = row.get(column)
+            if column in sheet.categorical:
+                self.data[column].append(sheet.code(column, value))
+            else:
+                self.data[column].append(value)
+        self.length += 1
+
+    def __len__(self):
+        return self.length
+
+    def column(self, name):
+        """Valores de una columna (las categóricas ya decodificadas)."""
+        if name not in self.sheet.categorical:
+            return list(self.data[name])
+        categories = self.sheet.categories(name)
+        return [categories[code] if code >= 0 else None for code in self.data[name]]
+
+    def rows(self):
+        """Filas como tuplas en el orden de las columnas del esquema."""
+        return zip(*(self.column(name) for name in self.sheet.columns))
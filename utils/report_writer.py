@@ -0,0 +1,270 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import csv
+import math
+import numbers
+import os
+import re
+import threading
+
+OUTPUT_FORMATS = ("xlsx", "csv", "parquet")
+
+# Filas acumuladas antes de escribir un row group de Parquet
+PARQUET_BATCH_ROWS = 10000
+
+def _clean(value):
+    """NaN de pandas -> celda vacía."""
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+def _file_name(sheet):
+    return re.sub(r'[^\w\-]+', '_', sheet).strip('_')
+
+class ExcelStreamWriter:
+    """Excel en modo write_only: cada fila se vuelca a disco al agregarla."""
+
+    def __init__(self, path):
+        from openpyxl import Workbook
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheets = {}
+
+    def open_sheet(self, sheet):
+        if sheet not in self.sheets:
+            self.sheets[sheet] = self.workbook.create_sheet(title=sheet[:31])
+
+    def write_header(self, sheet, columns):
+        self.open_sheet(sheet)
+        self.sheets[sheet].append(list(columns))
+
+    def write_rows(self, sheet, rows):
+        ws = self.sheets[sheet]
+        for row in rows:
+            ws.append([_clean(v) for v in row])
+
+    def close(self):
+        self.workbook.save(self.path)
+        return [self.path]
+
+class CsvWriter:
+    """Un archivo CSV por pestaña dentro de `directory`."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.files = {}
+
+    def open_sheet(self, sheet):
+        pass
+
+    def write_header(self, sheet, columns):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{_file_name(sheet)}.csv")
+        handle = open(path, 'w', newline='', encoding='utf-8')
+        self.files[sheet] = (handle, csv.writer(handle), path)
+        self.files[sheet][1].writerow(columns)
+
+    def write_rows(self, sheet, rows):
+        writer = self.files[sheet][1]
+        for row in rows:
+            writer.writerow(["" if _clean(v) is None else v for v in row])
+
+    def close(self):
+        paths = []
+        for handle, _, path in self.files.values():
+            handle.close()
+            paths.append(path)
+        return paths
+
+class ParquetWriter:
+    """
+    Un archivo Parquet por pestaña, escrito por row groups de PARQUET_BATCH_ROWS.
+
+    El tipo de cada columna se infiere del primer lote (numérica si todos sus
+    valores lo son, texto en otro caso). Si un lote posterior no cabe en ese
+    tipo sin perder datos (texto como "N/A" en una columna numérica, decimales
+    en una entera), la columna se amplía (entera -> decimal, cualquier otro
+    caso -> texto) y los row groups ya escritos se reescriben uno a uno con el
+    nuevo esquema: ningún valor se convierte en nulo ni se trunca.
+    """
+
+    def __init__(self, directory):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ImportError("El formato parquet requiere pyarrow (pip install pyarrow)")
+        self.directory = directory
+        self.sheets = {}
+
+    def open_sheet(self, sheet):
+        pass
+
+    def write_header(self, sheet, columns):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{_file_name(sheet)}.parquet")
+        self.sheets[sheet] = {'columns': list(columns), 'path': path, 'schema': None, 'writer': None, 'buffer': []}
+
+    def write_rows(self, sheet, rows):
+        state = self.sheets[sheet]
+        for row in rows:
+            state['buffer'].append([_clean(v) for v in row])
+            if len(state['buffer']) >= PARQUET_BATCH_ROWS:
+                self._flush(state)
+
+    def _flush(self, state):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not state['buffer'] and state['writer'] is not None:
+            return
+        values = list(zip(*state['buffer'])) or [[] for _ in state['columns']]
+        if state['schema'] is None:
+            state['schema'] = pa.schema([
+                (name, _arrow_type(col)) for name, col in zip(state['columns'], values)
+            ])
+            state['writer'] = pq.ParquetWriter(state['path'], state['schema'])
+        else:
+            widened = pa.schema([
+                (field.name, _widen(field.type, col)) for field, col in zip(state['schema'], values)
+            ])
+            if not widened.equals(state['schema']):
+                self._rewrite(state, widened)
+        arrays = [
+            pa.array([_coerce(v, field.type) for v in col], type=field.type)
+            for field, col in zip(state['schema'], values)
+        ]
+        state['writer'].write_table(pa.Table.from_arrays(arrays, schema=state['schema']))
+        state['buffer'] = []
+
+    def _rewrite(self, state, schema):
+        """Reescribe lo ya escrito de la pestaña con el esquema ampliado, un row group a la vez."""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        state['writer'].close()
+        tmp_path = f"{state['path']}.tmp"
+        writer = pq.ParquetWriter(tmp_path, schema)
+        source = pq.ParquetFile(state['path'])
+        for i in range(source.num_row_groups):
+            group = source.read_row_group(i)
+            arrays = [
+                pa.array([_coerce(v, field.type) for v in group.column(field.name).to_pylist()], type=field.type)
+                for field in schema
+            ]
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+        source.close()
+        os.replace(tmp_path, state['path'])
+        state['schema'], state['writer'] = schema, writer
+
+    def close(self):
+        paths = []
+        for state in self.sheets.values():
+            self._flush(state)
+            state['writer'].close()
+            paths.append(state['path'])
+        return paths
+
+def _arrow_type(values):
+    import pyarrow as pa
+    present = [v for v in values if v is not None]
+    if present and all(isinstance(v, bool) for v in present):
+        return pa.bool_()
+    if present and all(isinstance(v, numbers.Integral) and not isinstance(v, bool) for v in present):
+        return pa.int64()
+    if present and all(isinstance(v, numbers.Real) and not isinstance(v, bool) for v in present):
+        return pa.float64()
+    return pa.string()
+
+def _widen(current, values):
+    """Tipo que conserva sin pérdida los valores ya escritos (`current`) y los nuevos."""
+    import pyarrow as pa
+    if all(v is None for v in values) or pa.types.is_string(current):
+        return current
+    incoming = _arrow_type(values)
+    if incoming == current:
+        return current
+    if {str(current), str(incoming)} == {'int64', 'double'}:
+        return pa.float64()
+    return pa.string()
+
+def _coerce(value, arrow_type):
+    import pyarrow as pa
+    if value is None:
+        return None
+    if pa.types.is_string(arrow_type):
+        return str(value)
+    if not isinstance(value, numbers.Real):
+        return None
+    if pa.types.is_boolean(arrow_type):
+        return bool(value)
+    if pa.types.is_integer(arrow_type):
+        return int(value)
+    return float(value)
+
+class ReportWriter:
+    """
+    Escritor en streaming hacia uno o varios formatos (xlsx, csv, parquet).
+
+    Las filas se escriben a medida que llegan y no se conservan en memoria;
+    el encabezado de cada pestaña se toma del primer lote con columnas.
+    """
+
+    def __init__(self, base_path, formats=("xlsx",)):
+        unknown = set(formats) - set(OUTPUT_FORMATS)
+        if unknown:
+            raise ValueError(f"Formatos de salida no soportados: {', '.join(sorted(unknown))}")
+        self.writers = []
+        if "xlsx" in formats:
+            self.writers.append(ExcelStreamWriter(f"{base_path}.xlsx"))
+        if "csv" in formats:
+            self.writers.append(CsvWriter(f"{base_path}_csv"))
+        if "parquet" in formats:
+            self.writers.append(ParquetWriter(f"{base_path}_parquet"))
+        self.columns = {}
+        self.row_counts = {}
+        self._lock = threading.Lock()
+
+    def open_sheet(self, sheet):
+        """Reserva la pestaña para que el orden del libro no dependa de qué servicio termina primero."""
+        with self._lock:
+            self.row_counts.setdefault(sheet, 0)
+            for writer in self.writers:
+                writer.open_sheet(sheet)
+
+    def write_rows(self, sheet, rows, columns):
+        """Agrega un lote de filas (secuencias en el orden de `columns`) a la pestaña."""
+        with self._lock:
+            self.row_counts.setdefault(sheet, 0)
+            if sheet not in self.columns:
+                if not columns:
+                    return
+                self.columns[sheet] = list(columns)
+                for writer in self.writers:
+                    writer.open_sheet(sheet)
+                    writer.write_header(sheet, self.columns[sheet])
+            elif list(columns) != self.columns[sheet]:
+                # Reordenar al encabezado ya escrito
+                index = {c: i for i, c in enumerate(columns)}
+                rows = ([row[index[c]] if c in index else None for c in self.columns[sheet]] for row in rows)
+            rows = list(rows)
+            for writer in self.writers:
+                writer.write_rows(sheet, rows)
+            self.row_counts[sheet] += len(rows)
+
+    def write_frame(self, sheet, df):
+        self.write_rows(sheet, df.itertuples(index=False, name=None), list(df.columns))
+
+    def close(self):
+        """Cierra todos los formatos y devuelve las rutas generadas."""
+        with self._lock:
+            paths = []
+            for writer in self.writers:
+                if isinstance(writer, ExcelStreamWriter):
+                    # Pestañas reservadas que nunca recibieron columnas quedan vacías
+                    for sheet in self.row_counts:
+                        writer.open_sheet(sheet)
+                paths.extend(writer.close())
+            return paths
@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import threading
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+
+class CompartmentRunner:
+    """
+    Ejecuta en paralelo el trabajo por compartimento de un colector.
+
+    Reemplaza al `ThreadPoolExecutor(max_workers=10)` de cada módulo de core
+    y permite compartir un presupuesto de concurrencia (semáforo) entre todos
+    los colectores de una misma región. Con un recorder, cada unidad de
+    trabajo queda como un tramo en la línea de tiempo de la ejecución.
+    """
+
+    def __init__(self, max_workers=10, budget=None, name=None, recorder=None):
+        self.max_workers = max_workers
+        self.budget = budget
+        self.name = name or "compartimentos"
+        self.recorder = recorder
+
+    def map(self, func, items):
+        """Equivalente a executor.map: devuelve los resultados en el orden de entrada."""
+        items = list(items)
+        if not items:
+            return []
+
+        def run(item):
+            with self.budget or nullcontext():
+                span = self.recorder.span(_label(item), 'unit', runner=self.name) if self.recorder else nullcontext()
+                with span:
+                    return func(item)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=self.name) as executor:
+            return list(executor.map(run, items))
+
+def _label(item):
+    """Nombre legible de la unidad: compartimento, o (bucket, compartimento) en buckets."""
+    if isinstance(item, tuple) and item:
+        return _label(item[0])
+    return getattr(item, 'name', None) or str(item)[:60]
+
+def region_budget(limit):
+    """Semáforo compartido por los colectores de una región."""
+    return threading.BoundedSemaphore(limit)
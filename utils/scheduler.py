@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import heapq
+import itertools
+import json
+import os
+import statistics
+import threading
+import time
+from concurrent.futures import Future, wait
+from contextlib import nullcontext
+
+from utils.checkpoint import unit_key
+from utils.runner import _label
+
+# Peso de la última medición en el costo estimado (media móvil exponencial)
+COST_ALPHA = 0.5
+# Costo supuesto (segundos) de una unidad de un servicio sin historial
+DEFAULT_COST = 1.0
+
+class CostModel:
+    """
+    Costo en segundos de cada unidad (servicio, región/OCID del compartimento
+    o nombre del bucket) medido en ejecuciones anteriores y guardado en JSON.
+    Una unidad nueva toma la mediana de su tabla.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.costs = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path, encoding='utf-8') as f:
+                    self.costs = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"⚠️ Costos de unidades ilegibles ({e}); se empieza sin historial.")
+        self._medians = {
+            service: statistics.median(units.values()) for service, units in self.costs.items() if units
+        }
+
+    def estimate(self, service, key):
+        units = self.costs.get(service, {})
+        if key in units:
+            return units[key]
+        return self._medians.get(service, DEFAULT_COST)
+
+    def observe(self, service, key, seconds):
+        with self._lock:
+            units = self.costs.setdefault(service, {})
+            previous = units.get(key)
+            units[key] = seconds if previous is None else COST_ALPHA * seconds + (1 - COST_ALPHA) * previous
+
+    def save(self):
+        if not self.path:
+            return
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock, open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.costs, f)
+        os.replace(tmp_path, self.path)
+
+class GlobalScheduler:
+    """
+    Un único pool de workers para todas las unidades de todos los servicios y
+    regiones, con una cola de prioridad ordenada por costo estimado (las más
+    largas primero).
+
+    Los colectores siguen llamando a runner.map(func, items); cada item entra
+    a la cola global. Un worker libre toma la unidad más cara pendiente sin
+    importar de qué servicio sea, así que al final de la ejecución no queda
+    un pool ocioso mientras otro arrastra un compartimento o bucket enorme.
+    """
+
+    def __init__(self, max_workers=64, costs=None):
+        self.max_workers = max_workers
+        self.costs = costs or CostModel()
+        self._heap = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._workers = []
+
+    def runner(self, service, region=None, name=None, recorder=None):
+        """Reemplazo de CompartmentRunner para un colector: misma interfaz map(func, items)."""
+        return ScheduledRunner(self, service, region, name, recorder)
+
+    def submit(self, service, key, func, item, span=None):
+        future = Future()
+        cost = self.costs.estimate(service, key)
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("El planificador ya está cerrado")
+            heapq.heappush(self._heap, (-cost, next(self._seq), service, key, func, item, span, future))
+            if len(self._workers) < self.max_workers:
+                self._start_worker()
+            self._cond.notify()
+        return future
+
+    def _start_worker(self):
+        worker = threading.Thread(
+            target=self._work, name=f"planificador_{len(self._workers)}", daemon=True
+        )
+        self._workers.append(worker)
+        worker.start()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return
+                _, _, service, key, func, item, span, future = heapq.heappop(self._heap)
+            if not future.set_running_or_notify_cancel():
+                continue
+            start = time.perf_counter()
+            try:
+                with span or nullcontext():
+                    result = func(item)
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+            self.costs.observe(service, key, time.perf_counter() - start)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        for worker in self._workers:
+            worker.join()
+        self.costs.save()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+class ScheduledRunner:
+    """Unidades de un colector encoladas en el GlobalScheduler."""
+
+    def __init__(self, scheduler, service, region=None, name=None, recorder=None):
+        self.scheduler = scheduler
+        self.service = service
+        self.region = region
+        self.name = name or service
+        self.recorder = recorder
+
+    def map(self, func, items):
+        """Equivalente a executor.map: devuelve los resultados en el orden de entrada."""
+        futures = []
+        for item in items:
+            span = self.recorder.span(_label(item), 'unit', runner=self.name) if self.recorder else None
+            # Por OCID (o nombre del bucket): compartimentos homónimos no comparten costo
+            key = f"{self.region}/{unit_key(item)}" if self.region else unit_key(item)
+            futures.append(self.scheduler.submit(self.service, key, func, item, span))
+        # Como el runner de hilos: se esperan todas las unidades antes de propagar un error
+        wait(futures)
+        return [f.result() for f in futures]
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import configparser
+import os
+
+# Valores por defecto de la sección [INVENTORY] del config.ini.
+# La sección es opcional: si no existe se usan estos valores.
+DEFAULTS = {
+    # Servicios a inventariar separados por coma (compute, dbsystem, buckets,
+    # oic_instances, load_balancers, file_storage); all = todos. Se puede
+    # sobrescribir con `python main.py --services ...`
+    'services': 'all',
+    # fast  -> estadísticas aproximadas del bucket (una llamada por bucket)
+    # exact -> recorre list_objects sumando tamaños (lento en buckets grandes)
+    'bucket_sizing': 'fast',
+    # exact: buckets con al menos N objetos se recorren en rangos de claves
+    # en paralelo (hasta `bucket_shard_workers` hilos por bucket)
+    'bucket_shard_objects': '200000',
+    'bucket_shard_workers': '8',
+    # Descubrimiento previo con Resource Search: solo se visitan los
+    # compartimentos que contienen recursos de cada servicio
+    'discovery': 'false',
+    # JSON con recursos de prueba (FakeSearchClient); vacío = API real
+    'discovery_source': '',
+    # Límite adaptativo compartido por endpoint: no limita hasta el primer 429;
+    # luego arranca en la mitad del tráfico medido (o en rate_limit si aún no
+    # hay medición) y nunca pasa de rate_limit_max. 0 = sin limitador (reintentos del SDK)
+    'rate_limit': '20',
+    'rate_limit_max': '100',
+    'max_retries': '6',
+    # Regiones a inventariar separadas por coma; vacío = todas las suscritas
+    'regions': '',
+    # Unidades de trabajo (compartimentos) simultáneas por región, sumando todos los servicios
+    'region_concurrency': '30',
+    # Snapshot SQLite por OCID: reutiliza detalles de recursos sin cambios
+    # y permite agregar la pestaña de cambios (altas/bajas/modificaciones)
+    'snapshot': 'false',
+    'snapshot_path': 'reports/inventory_snapshot.db',
+    'delta_sheet': 'true',
+    # Uso real de File Storage (UsedBytes de Monitoring) agrupado por resourceId:
+    # auto | tenancy (una consulta con subárbol) | compartment | off (metered_bytes)
+    'fss_metrics_scope': 'auto',
+    # Lotes (uno por compartimento/bucket) en cola hacia el escritor del reporte;
+    # si se llena, los colectores esperan y la memoria queda acotada
+    'stream_queue_size': '64',
+    # Límite de la ejecución completa y presupuestos por servicio, en minutos
+    # (0 / vacío = sin límite), p. ej. service_budget_minutes = buckets=120, compute=30.
+    # Al vencer se omite lo pendiente, las unidades en curso se cortan en su siguiente
+    # llamada a la API (el exceso es como mucho una llamada con sus reintentos ya
+    # iniciados) y la pestaña queda marcada como parcial
+    'deadline_minutes': '0',
+    'service_budget_minutes': '',
+    # Cada cuántos segundos se registra el avance (unidades y filas por servicio)
+    'progress_interval_seconds': '60',
+    # Modo servicio (`python main.py --daemon`): refresco de cada servicio cada N
+    # minutos (con excepciones por servicio, p. ej. compute=15, buckets=360) y
+    # API HTTP/JSON local para consultas y exportación del reporte
+    'daemon_refresh_minutes': '60',
+    'daemon_service_minutes': '',
+    'daemon_host': '127.0.0.1',
+    'daemon_port': '8765',
+    # Actualización incremental en modo servicio: archivo JSONL con eventos de
+    # OCI Events / Audit (vacío = solo POST /events) y cada cuántos segundos se lee
+    'events_source': '',
+    'events_poll_seconds': '30',
+    # Bitácora de avance (unidades terminadas y cursores de buckets) para
+    # continuar una ejecución interrumpida con `python main.py --resume`
+    'checkpoint': 'true',
+    'checkpoint_path': 'reports/checkpoint.jsonl',
+    'checkpoint_cursor_pages': '20',
+    # Formatos de salida separados por coma: xlsx, csv, parquet (requiere pyarrow)
+    'output_formats': 'xlsx',
+    # Caché de detalles (imágenes, volúmenes, IPs) persistida entre ejecuciones
+    'detail_cache': 'true',
+    'detail_cache_path': 'reports/detail_cache.json',
+    'detail_cache_max_entries': '50000',
+    # Motor de recolección: threads (pool por colector) | async (un event loop con
+    # semáforos por servicio y un único pool de `async_max_in_flight` hilos para el SDK)
+    # | scheduler (ver abajo)
+    'runtime': 'threads',
+    'async_max_in_flight': '64',
+    'async_service_concurrency': '16',
+    # scheduler: un solo pool para todas las unidades (servicio, compartimento/bucket),
+    # las más costosas primero según los tiempos medidos en ejecuciones anteriores
+    'scheduler_workers': '64',
+    'unit_costs_path': 'reports/unit_costs.json',
+    # Instrumentación por llamada: resumen JSON (p50/p95/p99), textfile de
+    # Prometheus y línea de tiempo Chrome Trace junto al reporte
+    'metrics': 'true',
+    # Árbol de compartimentos en disco (se vuelve a listar pasado el TTL) y
+    # caché negativa: tras N ejecuciones vacías un compartimento solo se
+    # revisa cada `empty_recheck_hours` para ese servicio y región
+    'compartment_cache': 'false',
+    'compartment_cache_path': 'reports/compartment_cache.json',
+    'compartment_ttl_hours': '24',
+    'empty_skip_after': '3',
+    'empty_recheck_hours': '168',
+    # Confirmar en bloque con Resource Search (una consulta por servicio) si
+    # algún compartimento omitido ya tiene recursos
+    'empty_confirm': 'false',
+}
+
+def load_settings(path="config.ini"):
+    """Devuelve la sección [INVENTORY] combinada con los valores por defecto."""
+    cp = configparser.ConfigParser()
+    cp.read_dict({'INVENTORY': DEFAULTS})
+    if os.path.exists(path):
+        cp.read(path, encoding='utf-8')
+    return cp['INVENTORY']
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+# Columna que identifica al recurso dentro de la fila de cada servicio
+NAME_FIELDS = ('server_name', 'bucket_name', 'name', 'display_name')
+
+DELTA_COLUMNS = ['service', 'change', 'ocid', 'compartment_name', 'name', 'changed_fields']
+
+def fingerprint(*values):
+    """Marcador de cambio a partir de atributos baratos (estado, fechas, etag...)."""
+    raw = json.dumps(values, default=str, sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+class SnapshotStore:
+    """
+    Snapshot local en SQLite de lo recolectado en la ejecución anterior.
+
+    Cada recurso se guarda por (servicio, OCID) con un marcador de cambio, los
+    detalles costosos de obtener y la fila del reporte. En la siguiente
+    ejecución los colectores reutilizan los detalles cuando el marcador no
+    cambió, y el delta (altas/bajas/cambios) se calcula contra el snapshot.
+    """
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.path = path
+        self._lock = threading.Lock()
+        self._current = {}
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS resources ("
+                " service TEXT, ocid TEXT, marker TEXT, details TEXT, row TEXT, last_seen TEXT,"
+                " PRIMARY KEY (service, ocid))"
+            )
+            self._previous = {
+                (service, ocid): (marker, json.loads(details) if details else None, json.loads(row))
+                for service, ocid, marker, details, row in conn.execute(
+                    "SELECT service, ocid, marker, details, row FROM resources"
+                )
+            }
+
+    def _connect(self):
+        return sqlite3.connect(self.path)
+
+    def cached(self, service, ocid, marker):
+        """Detalles guardados del recurso si su marcador no cambió; None si hay que consultarlos."""
+        previous = self._previous.get((service, ocid))
+        if previous and previous[0] == marker:
+            return previous[1]
+        return None
+
+    def record(self, service, ocid, marker, row, details=None):
+        """Registra un recurso visto en esta ejecución (thread-safe)."""
+        # Misma normalización que al leer de SQLite, para comparar filas sin falsos cambios
+        row = json.loads(json.dumps(row, default=str))
+        with self._lock:
+            self._current[(service, ocid)] = (marker, details, row)
+
+    def delta(self, complete_services):
+        """
+        Filas de altas, bajas y cambios respecto al snapshot anterior.
+
+        Las bajas solo se calculan para servicios recolectados completos, para
+        no reportar como eliminado lo que falló por un error puntual. Un
+        servicio sin snapshot previo no genera delta (primera ejecución).
+        """
+        previous_services = {service for service, _ in self._previous}
+        rows = []
+        for (service, ocid), (marker, _, row) in self._current.items():
+            if service not in previous_services:
+                continue
+            previous = self._previous.get((service, ocid))
+            if previous is None:
+                rows.append(_delta_row(service, 'added', ocid, row))
+            elif previous[2] != row:
+                changed = sorted(k for k in row if previous[2].get(k) != row.get(k))
+                rows.append(_delta_row(service, 'changed', ocid, row, changed))
+        for (service, ocid), (_, _, row) in self._previous.items():
+            if service in complete_services and (service, ocid) not in self._current:
+                rows.append(_delta_row(service, 'removed', ocid, row))
+        return rows
+
+    def save(self, complete_services):
+        """Persiste la ejecución: reemplaza los servicios completos y actualiza el resto."""
+        now = datetime.now().isoformat(timespec='seconds')
+        with self._lock, self._connect() as conn:
+            for service in complete_services:
+                conn.execute("DELETE FROM resources WHERE service = ?", (service,))
+            conn.executemany(
+                "INSERT OR REPLACE INTO resources VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (service, ocid, marker, json.dumps(details, default=str) if details is not None else None,
+                     json.dumps(row, default=str), now)
+                    for (service, ocid), (marker, details, row) in self._current.items()
+                ]
+            )
+
+def _delta_row(service, change, ocid, row, changed=None):
+    name = next((row[f] for f in NAME_FIELDS if f in row), "N/A")
+    return {
+        'service': service,
+        'change': change,
+        'ocid': ocid,
+        'compartment_name': row.get('compartment_name', "N/A"),
+        'name': name,
+        'changed_fields': ", ".join(changed) if changed else "",
+    }
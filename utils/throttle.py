@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+"""
+Nombre del Proyecto: oci-inventory-unified
+Autor: Daniel de Jesús Cervantes Velázquez
+Equipo: Automatización OCI
+Licencia: MIT
+"""
+import random
+import threading
+import time
+
+from utils.budget import check_deadline
+
+# Códigos que indican saturación del servicio y que vale la pena reintentar
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+# Conflictos transitorios (409) que el SDK también reintenta por defecto
+RETRYABLE_CONFLICTS = {'IncorrectState', 'LockConflict'}
+
+_TRANSPORT_ERRORS = None
+
+def _transport_errors():
+    """Timeouts y conexiones caídas: los clientes con limitador no usan la estrategia de reintentos del SDK."""
+    global _TRANSPORT_ERRORS
+    if _TRANSPORT_ERRORS is None:
+        errors = [ConnectionError, TimeoutError]
+        try:
+            from oci._vendor.requests.exceptions import ConnectionError as RequestsConnectionError, Timeout
+            from oci.exceptions import ConnectTimeout, RequestException
+            errors += [RequestsConnectionError, Timeout, ConnectTimeout, RequestException]
+        except ImportError:
+            pass
+        _TRANSPORT_ERRORS = tuple(errors)
+    return _TRANSPORT_ERRORS
+
+def is_retryable(error):
+    """429/5xx, 409 transitorio o error de red/timeout."""
+    status = getattr(error, 'status', None)
+    if status in RETRYABLE_STATUS:
+        return True
+    if status == 409:
+        return getattr(error, 'code', None) in RETRYABLE_CONFLICTS
+    return isinstance(error, _transport_errors())
+
+class _Bucket:
+    __slots__ = ('rate', 'tokens', 'updated', 'last_decrease', 'limited', 'window', 'count', 'observed')
+
+    def __init__(self, rate):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.last_decrease = 0.0
+        # Sin límite hasta el primer 429/5xx; mientras tanto se mide el tráfico real
+        self.limited = False
+        self.window = self.updated
+        self.count = 0
+        self.observed = 0.0
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket compartido por todos los colectores, con un cubo por endpoint.
+
+    Un endpoint no se limita hasta su primer 429/5xx: hasta entonces solo se
+    mide cuántas llamadas por segundo recibe. Al primer rechazo la tasa arranca
+    en la mitad de lo medido (o en `rate` si aún no hay medición) y desde ahí
+    se ajusta con AIMD: sube poco a poco con cada respuesta exitosa y se
+    reduce a la mitad ante cada 429/5xx, de modo que el throughput se
+    estabiliza cerca del límite real del servicio.
+    """
+
+    def __init__(self, rate=20.0, min_rate=1.0, max_rate=100.0, increase=0.1,
+                 decrease=0.5, max_retries=6, base_delay=0.5, max_delay=30.0):
+        self.initial_rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, key):
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.initial_rate)
+        return bucket
+
+    def acquire(self, key):
+        """Bloquea hasta que haya un token disponible para el endpoint."""
+        while True:
+            with self._lock:
+                bucket = self._bucket(key)
+                now = time.monotonic()
+                if not bucket.limited:
+                    bucket.count += 1
+                    if now - bucket.window >= 1.0:
+                        bucket.observed = bucket.count / (now - bucket.window)
+                        bucket.window, bucket.count = now, 0
+                    return
+                # La capacidad del cubo es un segundo de tráfico a la tasa actual
+                bucket.tokens = min(bucket.rate, bucket.tokens + (now - bucket.updated) * bucket.rate)
+                bucket.updated = now
+                if bucket.tokens >= 1:
+                    bucket.tokens -= 1
+                    return
+                wait = (1 - bucket.tokens) / bucket.rate
+            time.sleep(wait)
+
+    def on_success(self, key):
+        with self._lock:
+            bucket = self._bucket(key)
+            if bucket.limited:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def on_throttle(self, key):
+        with self._lock:
+            bucket = self._bucket(key)
+            now = time.monotonic()
+            if not bucket.limited:
+                # Primer rechazo: se parte de la mitad del tráfico medido
+                elapsed = now - bucket.window
+                current = bucket.count / elapsed if elapsed >= 0.1 else 0.0
+                observed = max(bucket.observed, current) or self.initial_rate
+                bucket.rate = min(self.max_rate, max(self.min_rate, observed * self.decrease))
+                bucket.limited = True
+                bucket.last_decrease = now
+                bucket.updated = now
+            # Varios hilos reciben el mismo 429 casi a la vez: una sola reducción por segundo
+            elif now - bucket.last_decrease >= 1.0:
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+                bucket.last_decrease = now
+            bucket.tokens = 0
+
+    def backoff(self, attempt):
+        """Espera exponencial con jitter completo."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def call(self, key, func, *args, **kwargs):
+        """Ejecuta una llamada al SDK respetando el límite y reintentando 429/5xx, 409 transitorios y errores de red."""
+        return self.call_observed(key, func, args, kwargs)
+
+    def call_observed(self, key, func, args, kwargs, observer=None):
+        """
+        Igual que call(); `observer(attempt, status, start, end)` se invoca por
+        cada intento HTTP (incluidos los reintentos) para la instrumentación.
+        """
+        attempt = 0
+        while True:
+            self.acquire(key)
+            start = time.perf_counter()
+            try:
+                result = func(*args, **kwargs)
+            except Exception as e:
+                status = getattr(e, 'status', None)
+                if observer:
+                    observer(attempt, status or 'error', start, time.perf_counter())
+                if not is_retryable(e) or attempt >= self.max_retries:
+                    raise
+                # Solo la saturación del servicio baja la tasa; un timeout o un 409 solo espera
+                if status in RETRYABLE_STATUS:
+                    self.on_throttle(key)
+                # Vencido el plazo de la unidad no se reintenta
+                check_deadline()
+                time.sleep(self.backoff(attempt))
+                attempt += 1
+                continue
+            if observer:
+                observer(attempt, getattr(result, 'status', 200), start, time.perf_counter())
+            self.on_success(key)
+            return result
+
+def call_once(func, args, kwargs, observer=None):
+    """Llamada sin limitador, con el mismo protocolo de observador que call_observed."""
+    start = time.perf_counter()
+    try:
+        result = func(*args, **kwargs)
+    except Exception as e:
+        if observer:
+            observer(0, getattr(e, 'status', None) or 'error', start, time.perf_counter())
+        raise
+    if observer:
+        observer(0, getattr(result, 'status', 200), start, time.perf_counter())
+    return result
+
+class ThrottledClient:
+    """
+    Proxy de un cliente OCI: cada método público pasa por el limitador (si
+    hay uno) y cada intento se reporta al recorder de instrumentación (si hay uno).
+    Antes de cada llamada se revisa el plazo de la unidad en curso (ver BudgetedRunner).
+    """
+
+    def __init__(self, client, limiter, key, recorder=None, service=None, region=None):
+        self._client = client
+        self._limiter = limiter
+        self._key = key
+        self._recorder = recorder
+        self._service = service or key
+        self._region = region
+
+    def __getattr__(self, name):
+        attr = getattr(self._client, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def throttled(*args, **kwargs):
+            check_deadline()
+            observer = None
+            if self._recorder:
+                observer = self._recorder.observer(self._service, name, self._region, args, kwargs)
+            if self._limiter:
+                return self._limiter.call_observed(self._key, attr, args, kwargs, observer)
+            return call_once(attr, args, kwargs, observer)
+        throttled.__name__ = name
+        return throttled